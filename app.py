@@ -1,39 +1,16 @@
+import time
+
 import streamlit as st
 import pandas as pd
-import random
-import time
-from datetime import date
-
-# --- Placeholder classes ---
-class CustomData:
-    def __init__(self, weather, road_condition, time_of_day, traffic, accident_type,
-                 latitude, longitude, accident_date):
-        self.weather = weather
-        self.road_condition = road_condition
-        self.time_of_day = time_of_day
-        self.traffic = traffic
-        self.accident_type = accident_type
-        self.latitude = latitude
-        self.longitude = longitude
-        self.accident_date = accident_date
-
-    def get_data_as_data_frame(self):
-        return pd.DataFrame({
-            'weather': [self.weather],
-            'road_condition': [self.road_condition],
-            'time_of_day': [self.time_of_day],
-            'traffic': [self.traffic],
-            'accident_type': [self.accident_type],
-            'latitude': [self.latitude],
-            'longitude': [self.longitude],
-            'date': [self.accident_date]
-        })
-
-
-class PredictPipeline:
-    def predict(self, features):
-        severities = ["Low", "Medium", "High"]
-        return [random.choice(severities)]
+
+from src.dtypes import read_accidents
+from src.Pipeline.predict_pipeline import PREDICTION_COLUMN, VALID_INPUT_COLUMN, CustomData, PredictPipeline
+
+
+# --- Model, loaded once per process and shared across sessions and reruns ---
+@st.cache_resource(show_spinner="Loading model...")
+def load_pipeline():
+    return PredictPipeline()
 
 
 # --- Streamlit Page Config ---
@@ -49,66 +26,123 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
+try:
+    predict_pipeline = load_pipeline()
+except FileNotFoundError:
+    st.error("⚠ No trained model found in artifacts/. Run the training pipeline first.")
+    st.stop()
+
+# Selectbox options come from the categories the fitted encoder learned
+categories = predict_pipeline.get_categories()
+
+
+def select_options(column, placeholder):
+    return [placeholder] + [str(c) for c in categories[column]]
+
+
+# Colors & enhanced awareness captions
+severity_color = {"Low": "#2ECC71", "Medium": "#F39C12", "High": "#E74C3C"}
+severity_messages = {
+    "Low": "✅ Minor Accident: Stay alert but no immediate danger.",
+    "Medium": "⚠ Medium Severity: Take safety precautions, drive carefully.",
+    "High": "🚨 High Severity: Emergency response may be needed immediately!"
+}
+severity_icons = {"Low": "🟢", "Medium": "🟠", "High": "🔴"}
+
+single_tab, batch_tab = st.tabs(["📋 Single Accident", "📂 Batch Upload"])
+
 # --- Input Form ---
-st.subheader("📋 Enter Accident Details")
-with st.form("prediction_form", clear_on_submit=False):
-    col1, col2 = st.columns(2)
-
-    with col1:
-        weather = st.selectbox("🌤 Weather", ["Select Weather", "Clear", "Rainy", "Foggy", "Snowy"])
-        time_of_day = st.selectbox("⏰ Time of Day", ["Select Time", "Morning", "Afternoon", "Evening", "Night"])
-        traffic = st.selectbox("🚗 Traffic Level", ["Select Traffic", "Low", "Medium", "High"])
-        latitude = st.number_input("📍 Latitude", min_value=-90.0, max_value=90.0, value=20.5937)
-
-    with col2:
-        road_condition = st.selectbox("🛣 Road Condition", ["Select Road Condition", "Dry", "Wet", "Icy", "Snowy"])
-        accident_type = st.selectbox("💥 Accident Type", ["Select Type", "Rear-end", "Head-on", "Side-impact", "Rollover"])
-        longitude = st.number_input("📍 Longitude", min_value=-180.0, max_value=180.0, value=78.9629)
-        accident_date = st.date_input("📅 Date of Accident", value=date.today())
-
-    submitted = st.form_submit_button("🔮 Predict Severity")
-
-# --- Prediction Logic ---
-if submitted:
-    if (
-        weather.startswith("Select") or
-        road_condition.startswith("Select") or
-        time_of_day.startswith("Select") or
-        traffic.startswith("Select") or
-        accident_type.startswith("Select")
-    ):
-        st.warning("⚠ Please select all fields before predicting.")
-    else:
-        with st.spinner("Analyzing accident details... 🔍"):
-            time.sleep(2)
-
-        # Prepare data and predict
-        data = CustomData(weather, road_condition, time_of_day, traffic, accident_type, latitude, longitude, accident_date)
-        pred_df = data.get_data_as_data_frame()
-        predict_pipeline = PredictPipeline()
-        results = predict_pipeline.predict(pred_df)[0]
-
-        # Colors & enhanced awareness captions
-        severity_color = {"Low": "#2ECC71", "Medium": "#F39C12", "High": "#E74C3C"}
-        severity_messages = {
-            "Low": "✅ Minor Accident: Stay alert but no immediate danger.",
-            "Medium": "⚠ Medium Severity: Take safety precautions, drive carefully.",
-            "High": "🚨 High Severity: Emergency response may be needed immediately!"
-        }
-        severity_icons = {"Low": "🟢", "Medium": "🟠", "High": "🔴"}
-
-        # Display result with enhanced visuals
-        st.markdown(
-            f"""
-            <div style="background-color:{severity_color[results]};
-                        padding:25px; border-radius:15px; text-align:center;
-                        box-shadow: 0 4px 10px rgba(0,0,0,0.4);">
-                <h2 style="color:white;">{severity_icons[results]} Predicted Severity: {results}</h2>
-                <p style="color:white; font-size:16px;">{severity_messages[results]}</p>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
-
-        st.subheader("📊 Input Data")
-        st.dataframe(pred_df)
+with single_tab:
+    st.subheader("📋 Enter Accident Details")
+    with st.form("prediction_form", clear_on_submit=False):
+        col1, col2 = st.columns(2)
+
+        with col1:
+            weather = st.selectbox("🌤 Weather", select_options("Weather", "Select Weather"))
+            time_of_day = st.selectbox("⏰ Time of Day", select_options("Time_of_Day", "Select Time"))
+            traffic = st.selectbox("🚗 Traffic Level", select_options("Traffic", "Select Traffic"))
+            vehicle_type = st.selectbox("🚙 Vehicle Type", select_options("Vehicle_Type", "Select Vehicle"))
+            latitude = st.number_input("📍 Latitude", min_value=-90.0, max_value=90.0, value=40.7335, format="%.6f")
+
+        with col2:
+            road_condition = st.selectbox("🛣 Road Condition", select_options("Road_Condition", "Select Road Condition"))
+            accident_type = st.selectbox("💥 Accident Type", select_options("Accident_Type", "Select Type"))
+            accident_reason = st.selectbox("❓ Accident Reason", select_options("Accident_Reason", "Select Reason"))
+            longitude = st.number_input("📍 Longitude", min_value=-180.0, max_value=180.0, value=-73.9246, format="%.6f")
+
+        submitted = st.form_submit_button("🔮 Predict Severity")
+
+    # --- Prediction Logic ---
+    if submitted:
+        selections = [weather, road_condition, time_of_day, traffic, accident_type, vehicle_type, accident_reason]
+        # Coordinates are checked against the range the model was trained on
+        coordinate_errors = predict_pipeline.schema.record_errors({"Latitude": latitude, "Longitude": longitude})
+        if any(value.startswith("Select") for value in selections):
+            st.warning("⚠ Please select all fields before predicting.")
+        elif coordinate_errors:
+            st.warning("⚠ " + "; ".join(f"{column} {reason}" for column, reason in coordinate_errors.items()))
+        else:
+            data = CustomData(
+                Weather=weather,
+                Road_Condition=road_condition,
+                Time_of_Day=time_of_day,
+                Traffic=traffic,
+                Accident_Type=accident_type,
+                Vehicle_Type=vehicle_type,
+                Accident_Reason=accident_reason,
+                Latitude=latitude,
+                Longitude=longitude,
+            )
+            start = time.perf_counter()
+            results, probabilities = predict_pipeline.predict_record(data.get_data_as_dict())
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            # Display result with enhanced visuals
+            st.markdown(
+                f"""
+                <div style="background-color:{severity_color.get(results, '#7F8C8D')};
+                            padding:25px; border-radius:15px; text-align:center;
+                            box-shadow: 0 4px 10px rgba(0,0,0,0.4);">
+                    <h2 style="color:white;">{severity_icons.get(results, '')} Predicted Severity: {results}</h2>
+                    <p style="color:white; font-size:16px;">{severity_messages.get(results, '')}</p>
+                </div>
+                """,
+                unsafe_allow_html=True,
+            )
+            st.caption(f"Predicted in {elapsed_ms:.1f} ms")
+
+            if probabilities:
+                st.subheader("📈 Class Probabilities")
+                st.bar_chart(pd.Series(probabilities, name="Probability"))
+
+            st.subheader("📊 Input Data")
+            st.dataframe(data.get_data_as_dataframe())
+
+# --- Batch scoring ---
+with batch_tab:
+    st.subheader("📂 Score a CSV of Accidents")
+    st.write("Upload a CSV with the columns of the training dataset; all rows are scored in one call.")
+    uploaded = st.file_uploader("CSV file", type=["csv"])
+
+    if uploaded is not None:
+        batch_df = read_accidents(uploaded, timestamps=False, compact_coordinates=False)
+        try:
+            start = time.perf_counter()
+            scored = pd.concat([batch_df, predict_pipeline.predict_batch(batch_df)], axis=1)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+        except KeyError as e:
+            st.error(f"⚠ The uploaded file is missing required columns: {e}")
+        else:
+            st.caption(f"Scored {len(scored)} rows in {elapsed_ms:.1f} ms")
+            if VALID_INPUT_COLUMN in scored.columns and not scored[VALID_INPUT_COLUMN].all():
+                st.warning(f"⚠ {int((~scored[VALID_INPUT_COLUMN]).sum())} rows have unknown categories or "
+                           f"out-of-range coordinates; those values were scored as missing "
+                           f"(see the {VALID_INPUT_COLUMN} column).")
+            st.bar_chart(scored[PREDICTION_COLUMN].value_counts())
+            st.dataframe(scored)
+            st.download_button(
+                "⬇ Download predictions",
+                scored.to_csv(index=False).encode("utf-8"),
+                file_name="predictions.csv",
+                mime="text/csv",
+            )
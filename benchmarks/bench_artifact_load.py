@@ -0,0 +1,141 @@
+"""Load time and resident memory of N worker processes: pickled model vs mmap artifact.
+
+Fits a RandomForest on the transformed dataset, saves it as
+  - pickle   : InferenceModel with the sklearn forest, joblib.dump / joblib.load
+  - artifact : InferenceModel with the packed forest, save_artifact / load_artifact (mmap)
+then starts N processes that each load one format and score a batch, all alive at once.
+Reports per-worker load time, RSS added by the load, RSS and PSS (proportional
+set size: shared pages are split between the processes mapping them, so summed
+PSS is the real memory cost).
+
+Usage:
+    python benchmarks/bench_artifact_load.py [--workers 1,4,8] [--trees 200]
+"""
+import argparse
+import multiprocessing as mp
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# Ensure project root is in sys.path for src imports
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+RAW_DATA_PATH = os.path.join(PROJECT_ROOT, "rawdata", "Traffic_Accident_Severity_Dataset.csv")
+
+
+def memory_mb():
+    """
+    Returns (rss_mb, pss_mb) of this process from /proc; None where unavailable.
+    """
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        return None, None
+    kb = lambda name: int(fields[name].split()[0]) / 1024 if name in fields else None  # noqa: E731
+    return kb("Rss"), kb("Pss")
+
+
+def _worker(fmt, path, sample, ready, release, results):
+    from src.utils import load_artifact, load_object
+
+    rss_before, _ = memory_mb()
+    start = time.perf_counter()
+    model = load_artifact(path) if fmt == "artifact" else load_object(path)
+    load_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    model.predict_proba(sample)
+    predict_seconds = time.perf_counter() - start
+
+    ready.wait()      # every worker has loaded and scored...
+    rss, pss = memory_mb()
+    release.wait()    # ...and measured before any of them exits
+    results.put({
+        "load_s": load_seconds,
+        "predict_s": predict_seconds,
+        "rss_growth_mb": None if rss is None else rss - rss_before,
+        "rss_mb": rss,
+        "pss_mb": pss,
+    })
+
+
+def run_workers(fmt, path, sample, n_workers):
+    ctx = mp.get_context("spawn")
+    ready, release = ctx.Barrier(n_workers), ctx.Barrier(n_workers)
+    results = ctx.Queue()
+    processes = [ctx.Process(target=_worker, args=(fmt, path, sample, ready, release, results))
+                 for _ in range(n_workers)]
+    for process in processes:
+        process.start()
+    rows = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default=RAW_DATA_PATH)
+    parser.add_argument("--workers", default="1,4,8", help="comma-separated worker counts")
+    parser.add_argument("--trees", type=int, default=200)
+    parser.add_argument("--max-depth", type=int, default=None)
+    parser.add_argument("--rows", type=int, default=200_000, help="training rows (resampled from --data)")
+    args = parser.parse_args(argv)
+
+    from sklearn.ensemble import RandomForestClassifier
+
+    from src.Components.data_transformation import DataTransformation
+    from src.Components.compiled_preprocessor import compile_preprocessor
+    from src.Components.packed_forest import pack_model, verify_packed
+    from src.Pipeline.inference_model import FEATURE_COLUMNS, InferenceModel
+    from src.utils import save_artifact, save_object
+
+    df = pd.read_csv(args.data)
+    df = df.sample(args.rows, replace=len(df) < args.rows, random_state=0).reset_index(drop=True)
+    df["Latitude"] += np.random.default_rng(0).normal(0, 0.001, len(df))
+    preprocessor = DataTransformation().get_data_transformer_object().fit(df[FEATURE_COLUMNS])
+    compiled = compile_preprocessor(preprocessor)
+    X = compiled.transform(df)
+    forest = RandomForestClassifier(args.trees, max_depth=args.max_depth, n_jobs=-1, random_state=0)
+    forest.fit(X, df["Severity"])
+    packed = pack_model(forest)
+    verify_packed(forest, packed, X[:2000])
+    sample = df[FEATURE_COLUMNS].head(1000)
+
+    work_dir = tempfile.mkdtemp(prefix="bench_artifact_")
+    try:
+        paths = {
+            "pickle": os.path.join(work_dir, "inference_model.pkl"),
+            "artifact": os.path.join(work_dir, "inference_model"),
+        }
+        save_object(paths["pickle"], InferenceModel(compiled, forest))
+        save_artifact(paths["artifact"], InferenceModel(compiled, packed))
+        size_mb = {
+            "pickle": os.path.getsize(paths["pickle"]) / 1024 ** 2,
+            "artifact": sum(os.path.getsize(os.path.join(paths["artifact"], name))
+                            for name in os.listdir(paths["artifact"])) / 1024 ** 2,
+        }
+        print(f"{args.trees} trees on {len(df)} rows; "
+              f"pickle {size_mb['pickle']:.1f} MB, artifact {size_mb['artifact']:.1f} MB")
+        print(f"{'format':<9} {'workers':>7} {'load s':>8} {'predict s':>10} "
+              f"{'load RSS MB/w':>13} {'RSS MB/w':>9} {'PSS MB/w':>9} {'total PSS MB':>13}")
+        for n_workers in (int(n) for n in args.workers.split(",")):
+            for fmt in ("pickle", "artifact"):
+                rows = run_workers(fmt, paths[fmt], sample, n_workers)
+                mean = lambda key: np.mean([r[key] for r in rows]) if rows[0][key] is not None else float("nan")  # noqa: E731
+                total_pss = sum(r["pss_mb"] for r in rows) if rows[0]["pss_mb"] is not None else float("nan")
+                print(f"{fmt:<9} {n_workers:>7} {mean('load_s'):8.3f} {mean('predict_s'):10.3f} "
+                      f"{mean('rss_growth_mb'):13.1f} {mean('rss_mb'):9.1f} {mean('pss_mb'):9.1f} {total_pss:13.1f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
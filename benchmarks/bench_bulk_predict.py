@@ -0,0 +1,64 @@
+"""Rows/sec of PredictPipeline.predict_batch against the per-row CustomData loop.
+
+Usage:
+    python benchmarks/bench_bulk_predict.py [--rows-per-row-loop 500] [--chunksize 50000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+# Ensure project root is in sys.path for src imports
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.Pipeline.predict_pipeline import (
+    FEATURE_COLUMNS,
+    CustomData,
+    PredictPipeline,
+    PredictPipelineConfig,
+)
+
+RAW_DATA_PATH = os.path.join(PROJECT_ROOT, "rawdata", "Traffic_Accident_Severity_Dataset.csv")
+
+
+def bench_per_row(pipeline, df):
+    start = time.perf_counter()
+    for record in df[FEATURE_COLUMNS].to_dict(orient="records"):
+        pipeline.predict(CustomData(**record).get_data_as_dataframe())
+    return len(df) / (time.perf_counter() - start)
+
+
+def bench_batch(pipeline, df, chunksize):
+    start = time.perf_counter()
+    for _ in pipeline.predict_batch(df, chunksize=chunksize):
+        pass
+    return len(df) / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default=RAW_DATA_PATH)
+    parser.add_argument("--model-path", default=None)
+    parser.add_argument("--rows-per-row-loop", type=int, default=500,
+                        help="rows scored by the (slow) per-row loop")
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    args = parser.parse_args(argv)
+
+    config = PredictPipelineConfig(inference_model_path=args.model_path) if args.model_path else None
+    pipeline = PredictPipeline(config)
+    df = pd.read_csv(args.data)
+
+    per_row = bench_per_row(pipeline, df.head(args.rows_per_row_loop))
+    batch = bench_batch(pipeline, df, args.chunksize)
+
+    print(f"per-row loop : {per_row:12,.0f} rows/sec ({min(len(df), args.rows_per_row_loop)} rows)")
+    print(f"predict_batch: {batch:12,.0f} rows/sec ({len(df)} rows, chunksize={args.chunksize})")
+    print(f"speedup      : {batch / per_row:12,.1f}x")
+
+
+if __name__ == "__main__":
+    main()
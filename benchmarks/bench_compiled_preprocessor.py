@@ -0,0 +1,57 @@
+"""Transform latency of the sklearn preprocessor against its compiled lookup-table export.
+
+Usage:
+    python benchmarks/bench_compiled_preprocessor.py [--repeat 2000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+# Ensure project root is in sys.path for src imports
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.Components.compiled_preprocessor import compile_preprocessor, verify_parity
+from src.Components.data_transformation import DataTransformation
+
+RAW_DATA_PATH = os.path.join(PROJECT_ROOT, "rawdata", "Traffic_Accident_Severity_Dataset.csv")
+
+
+def time_per_call(fn, repeat):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default=RAW_DATA_PATH)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    df = pd.read_csv(args.data)
+    preprocessor = DataTransformation().get_data_transformer_object().fit(df)
+    compiled = compile_preprocessor(preprocessor)
+    verify_parity(preprocessor, compiled, df)
+
+    row = df.head(1)
+    record = row.iloc[0].to_dict()
+    cases = [
+        ("sklearn, 1-row frame", lambda: preprocessor.transform(row), args.repeat // 10),
+        ("compiled, 1-row frame", lambda: compiled.transform(row), args.repeat),
+        ("compiled, record", lambda: compiled.transform_record(record), args.repeat),
+        (f"sklearn, {len(df)} rows", lambda: preprocessor.transform(df), 20),
+        (f"compiled, {len(df)} rows", lambda: compiled.transform(df), 20),
+    ]
+    for name, fn, repeat in cases:
+        print(f"{name:<24}: {time_per_call(fn, max(repeat, 1)) * 1e6:12,.1f} us/call")
+
+
+if __name__ == "__main__":
+    main()
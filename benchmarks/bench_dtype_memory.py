@@ -0,0 +1,64 @@
+"""Memory and speed of the accident frame with and without the src.dtypes registry.
+
+Writes `--rows` synthetic rows to a CSV and reads it three ways:
+  - default    : pd.read_csv with inferred dtypes (object strings, float64)
+  - registry   : read_accidents(timestamps=False); categories, float32 coordinates,
+                 Date/Time as raw categories (what DataIngestion holds)
+  - timestamps : read_accidents(); Date/Time replaced by int8/int16 timestamp
+                 features (what read_dataset returns to the transformation stage)
+and reports the read time, MB per million rows and the time of a groupby over
+two categorical columns (severity mix per Weather x Traffic).
+
+Usage:
+    python benchmarks/bench_dtype_memory.py [--rows 1000000]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+# Ensure project root is in sys.path for src imports
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from run_benchmarks import make_synthetic_dataset  # noqa: E402  (sibling script)
+
+from src.dtypes import memory_per_million_rows, read_accidents  # noqa: E402
+
+READERS = {
+    "default": pd.read_csv,
+    "registry": lambda path: read_accidents(path, timestamps=False),
+    "timestamps": read_accidents,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix="bench_dtype_memory_")
+    try:
+        data_path = make_synthetic_dataset(os.path.join(work_dir, "accidents.csv"), args.rows)
+        print(f"{args.rows} rows")
+        print(f"{'reader':<12} {'read s':>8} {'MB / 1M rows':>13} {'groupby s':>10}")
+        for name, reader in READERS.items():
+            start = time.perf_counter()
+            df = reader(data_path)
+            read_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            df.groupby(["Weather", "Traffic"], observed=True)["Severity"].value_counts()
+            groupby_seconds = time.perf_counter() - start
+            print(f"{name:<12} {read_seconds:8.2f} {memory_per_million_rows(df) / 1e6:13.1f} {groupby_seconds:10.3f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Import time and cold start of the prediction path.
+
+Runs `python -X importtime -c "import <module>"` in fresh interpreters and
+reports, per module, the best cumulative import time over `--repeat` runs, the
+modules with the largest self time and which heavy training libraries
+(sklearn, scipy, joblib, xgboost, catboost, lightgbm) were loaded. Exits
+non-zero when `src.Pipeline.predict_pipeline` exceeds `--budget-ms`.
+
+With --artifact it also times a cold start in a fresh interpreter: import,
+PredictPipeline construction and the first predict_record against that
+artifact, which loads only the libraries the artifact's objects need.
+
+Usage:
+    python benchmarks/bench_import_time.py [--budget-ms 600] [--repeat 5] [--artifact artifacts/inference_model]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Ensure project root is in sys.path for src imports
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+BUDGETED_MODULE = "src.Pipeline.predict_pipeline"
+DEFAULT_BUDGET_MS = 600.0
+DEFAULT_MODULES = (
+    BUDGETED_MODULE,
+    "src.Pipeline.prediction_server",
+    "src.Components.model_trainer",
+    "src.Pipeline.train_pipeline",
+)
+HEAVY_MODULES = ("sklearn", "scipy", "joblib", "xgboost", "catboost", "lightgbm")
+
+COLD_START_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from src.Pipeline.predict_pipeline import PredictPipeline, PredictPipelineConfig
+imported = time.perf_counter()
+pipeline = PredictPipeline(PredictPipelineConfig(inference_model_path=sys.argv[1]))
+pipeline.predict_record(json.loads(sys.argv[2]))
+done = time.perf_counter()
+print(json.dumps({
+    "import_seconds": imported - start,
+    "first_prediction_seconds": done - imported,
+    "seconds": done - start,
+    "heavy_modules": sorted(m for m in json.loads(sys.argv[3]) if m in sys.modules),
+}))
+"""
+
+
+def _run_python(args, cwd=PROJECT_ROOT):
+    env = {**os.environ, "PYTHONPATH": PROJECT_ROOT + os.pathsep + os.environ.get("PYTHONPATH", "")}
+    return subprocess.run([sys.executable, *args], cwd=cwd, env=env, capture_output=True, text=True, check=True)
+
+
+def parse_importtime(stderr):
+    """
+    Returns [(module, self_us, cumulative_us, depth)] from -X importtime output.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def import_time(module, repeat=5, top=10):
+    """
+    Best-of-`repeat` import time of `module` in a fresh interpreter, as
+    {"module", "seconds", "top_self", "heavy_modules"}. The first run also
+    warms the bytecode cache, so it is one of the repeats, not the result.
+    """
+    best = None
+    for _ in range(repeat):
+        entries = parse_importtime(_run_python(["-X", "importtime", "-c", f"import {module}"]).stderr)
+        cumulative = next(c for name, _, c, depth in reversed(entries) if name == module and depth <= 1)
+        if best is None or cumulative < best[0]:
+            best = (cumulative, entries)
+    cumulative, entries = best
+    loaded = {name.split(".")[0] for name, _, _, _ in entries}
+    return {
+        "module": module,
+        "seconds": cumulative / 1e6,
+        "top_self": [
+            {"module": name, "self_ms": self_us / 1e3}
+            for name, self_us, _, _ in sorted(entries, key=lambda e: e[1], reverse=True)[:top]
+        ],
+        "heavy_modules": sorted(m for m in HEAVY_MODULES if m in loaded),
+    }
+
+
+def cold_start(artifact_path, record):
+    """
+    Import + load + first predict_record against `artifact_path` in a fresh
+    interpreter. Returns the timings and the heavy modules that got loaded.
+    """
+    result = _run_python(["-c", COLD_START_SCRIPT, os.path.abspath(artifact_path),
+                          json.dumps(record), json.dumps(list(HEAVY_MODULES))])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", default=",".join(DEFAULT_MODULES), help="comma-separated modules to import")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"import budget for {BUDGETED_MODULE}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="modules with the largest self time to list")
+    parser.add_argument("--artifact", default=None, help="inference artifact to time a cold start against")
+    args = parser.parse_args(argv)
+
+    over_budget = False
+    for module in args.modules.split(","):
+        result = import_time(module, args.repeat, args.top)
+        budget = args.budget_ms if module == BUDGETED_MODULE else None
+        status = "" if budget is None else ("  OVER BUDGET" if result["seconds"] * 1e3 > budget else "  ok")
+        print(f"{module:<36} {result['seconds'] * 1e3:9.1f} ms"
+              f"{'' if budget is None else f' (budget {budget:.0f} ms)'}{status}")
+        print(f"  heavy modules: {', '.join(result['heavy_modules']) or 'none'}")
+        for entry in result["top_self"]:
+            print(f"    {entry['self_ms']:8.1f} ms  {entry['module']}")
+        over_budget |= status == "  OVER BUDGET"
+
+    if args.artifact:
+        import pandas as pd
+
+        from src.Pipeline.inference_model import FEATURE_COLUMNS
+
+        sample = pd.read_csv(os.path.join(PROJECT_ROOT, "rawdata", "Traffic_Accident_Severity_Dataset.csv"), nrows=1)
+        result = cold_start(args.artifact, sample[FEATURE_COLUMNS].iloc[0].to_dict())
+        print(f"cold start: import {result['import_seconds'] * 1e3:.1f} ms, "
+              f"load + first prediction {result['first_prediction_seconds'] * 1e3:.1f} ms; "
+              f"heavy modules: {', '.join(result['heavy_modules']) or 'none'}")
+
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""Retrain time for a 1% data append: incremental update vs full retrain.
+
+Trains one candidate model with the full TrainPipeline on N synthetic rows, then
+appends a batch of `--append` x N rows drawn from the same distribution and
+times
+  - incremental : IncrementalPipeline.run (drift check, append, continued training,
+                  evaluation and artifact export)
+  - full        : TrainPipeline.run on the whole history (model search included)
+and reports each one's test accuracy.
+
+Usage:
+    python benchmarks/bench_incremental.py [--rows 1000000] [--append 0.01] [--model XGBClassifier]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Ensure project root is in sys.path for src imports
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from run_benchmarks import make_synthetic_dataset  # noqa: E402  (sibling script)
+
+from src.Components.model_trainer import ModelTrainer  # noqa: E402
+from src.Pipeline.incremental_pipeline import IncrementalPipeline  # noqa: E402
+from src.Pipeline.train_pipeline import TrainPipeline  # noqa: E402
+from src.utils import read_manifest  # noqa: E402
+
+
+class SingleModelTrainer(ModelTrainer):
+    """
+    ModelTrainer restricted to one candidate, so the full retrain measures one
+    model's search rather than all of them.
+    """
+
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+
+    def get_model_candidates(self):
+        models, params = super().get_model_candidates()
+        return {self.name: models[self.name]}, {self.name: params.get(self.name, {})}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--append", type=float, default=0.01, help="batch size as a fraction of --rows")
+    parser.add_argument("--model", default="XGBClassifier")
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix="bench_incremental_")
+    base_path = make_synthetic_dataset(os.path.join(work_dir, "base.csv"), args.rows, seed=0)
+    batch_path = make_synthetic_dataset(os.path.join(work_dir, "batch.csv"), int(args.rows * args.append), seed=1)
+    # Artifact and cache paths are relative to the working directory
+    os.chdir(work_dir)
+
+    def train_pipeline():
+        pipeline = TrainPipeline()
+        pipeline.model_trainer = SingleModelTrainer(args.model)
+        return pipeline
+
+    def accuracy():
+        manifest = read_manifest(os.path.join("artifacts", "inference_model"))
+        return manifest["metrics"]["test_accuracy"]
+
+    initial = train_pipeline()
+    initial.data_ingestion.ingestion_config.source_data_path = base_path
+    start = time.perf_counter()
+    initial.run()
+    initial_seconds = time.perf_counter() - start
+    initial_accuracy = accuracy()
+
+    result = IncrementalPipeline(train_pipeline=train_pipeline()).run(batch_path)
+    incremental_accuracy = accuracy()
+
+    full = IncrementalPipeline(train_pipeline=train_pipeline())
+    start = time.perf_counter()
+    full.full_retrain()
+    full_seconds = time.perf_counter() - start
+
+    print(f"{args.model}: {args.rows} rows + {int(args.rows * args.append)}-row batch; work dir {work_dir}")
+    print(f"{'step':<28} {'seconds':>9} {'test accuracy':>14}")
+    print(f"{'initial full train':<28} {initial_seconds:9.2f} {initial_accuracy:14.4f}")
+    print(f"{'incremental (' + result['mode'] + ')':<28} {result['seconds']:9.2f} {incremental_accuracy:14.4f}")
+    print(f"{'full retrain on history':<28} {full_seconds:9.2f} {accuracy():14.4f}")
+    print(f"speedup: {full_seconds / result['seconds']:.1f}x")
+    for reason in result["reasons"]:
+        print(f"  full retrain reason: {reason}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Scaling of BatchScoringEngine from 1 to N worker processes.
+
+Writes `--rows` synthetic rows to a CSV, builds a memory-mappable inference
+artifact (compiled preprocessor + packed RandomForest) unless --model-path is
+given, then scores the file
+  - in-process : PredictPipeline.predict_batch over pd.read_csv chunks (one core)
+  - engine     : BatchScoringEngine.score_file with each worker count
+and reports rows/sec, the speedup over the first worker count (normally 1) and
+the parallel efficiency (speedup / worker ratio). Engine runs include worker
+start-up and writing the output CSV.
+
+Usage:
+    python benchmarks/bench_parallel_scoring.py [--rows 1000000] [--workers 1,2,4,8] [--chunk-size 100000]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+# Ensure project root is in sys.path for src imports
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from run_benchmarks import make_synthetic_dataset  # noqa: E402  (sibling script)
+
+from src.Pipeline.batch_scoring import BatchScoringConfig, BatchScoringEngine  # noqa: E402
+from src.Pipeline.predict_pipeline import PredictPipeline, PredictPipelineConfig  # noqa: E402
+
+
+def default_workers():
+    counts, n = [], 1
+    while n < (os.cpu_count() or 1):
+        counts.append(n)
+        n *= 2
+    return ",".join(str(c) for c in counts + [os.cpu_count() or 1])
+
+
+def build_artifact(data_path, artifact_path, trees, training_rows):
+    """
+    Fits the compiled preprocessor and a packed RandomForest on the first
+    `training_rows` rows and saves them as a memory-mappable artifact.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import LabelEncoder
+
+    from src.Components.compiled_preprocessor import compile_preprocessor
+    from src.Components.data_transformation import TARGET_COLUMN, DataTransformation
+    from src.Components.packed_forest import pack_model
+    from src.Pipeline.inference_model import FEATURE_COLUMNS, InferenceModel
+    from src.utils import save_artifact
+
+    df = pd.read_csv(data_path, nrows=training_rows)
+    preprocessor = DataTransformation().get_data_transformer_object().fit(df[FEATURE_COLUMNS])
+    compiled = compile_preprocessor(preprocessor)
+    label_encoder = LabelEncoder().fit(df[TARGET_COLUMN])
+    forest = RandomForestClassifier(trees, max_depth=20, n_jobs=-1, random_state=0)
+    forest.fit(compiled.transform(df), label_encoder.transform(df[TARGET_COLUMN]))
+    save_artifact(artifact_path, InferenceModel(compiled, pack_model(forest), classes=label_encoder.classes_))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", default=default_workers(), help="comma-separated worker counts")
+    parser.add_argument("--chunk-size", type=int, default=BatchScoringConfig.chunk_size)
+    parser.add_argument("--model-path", default=None, help="inference artifact to score with")
+    parser.add_argument("--trees", type=int, default=100, help="trees of the generated RandomForest")
+    parser.add_argument("--training-rows", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix="bench_parallel_scoring_")
+    try:
+        data_path = make_synthetic_dataset(os.path.join(work_dir, "accidents.csv"), args.rows)
+        model_path = args.model_path
+        if model_path is None:
+            model_path = os.path.join(work_dir, "inference_model")
+            build_artifact(data_path, model_path, args.trees, args.training_rows)
+
+        pipeline = PredictPipeline(PredictPipelineConfig(inference_model_path=model_path))
+        start = time.perf_counter()
+        for _ in pipeline.predict_batch(pd.read_csv(data_path, chunksize=args.chunk_size)):
+            pass
+        in_process = args.rows / (time.perf_counter() - start)
+
+        print(f"{args.rows} rows, chunk size {args.chunk_size}, {os.cpu_count()} CPUs")
+        print(f"{'scorer':<14} {'seconds':>9} {'rows/sec':>12} {'speedup':>8} {'efficiency':>11}")
+        print(f"{'in-process':<14} {args.rows / in_process:9.2f} {in_process:12,.0f}")
+        baseline = first_workers = None
+        for workers in (int(n) for n in args.workers.split(",")):
+            engine = BatchScoringEngine(BatchScoringConfig(
+                inference_model_path=model_path, workers=workers, chunk_size=args.chunk_size,
+            ))
+            summary = engine.score_file(data_path, os.path.join(work_dir, "predictions.csv"))
+            if baseline is None:
+                baseline, first_workers = summary["rows_per_sec"], workers
+            speedup = summary["rows_per_sec"] / baseline
+            print(f"{f'{workers} workers':<14} {summary['seconds']:9.2f} {summary['rows_per_sec']:12,.0f} "
+                  f"{speedup:7.2f}x {speedup * first_workers / workers:10.0%}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Load generator for the prediction server: reports p50/p99 latency and throughput.
+
+Usage:
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --requests 2000 --concurrency 32
+    python benchmarks/load_test.py --model-path artifacts/inference_model   # starts a local server
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+
+import numpy as np
+import pandas as pd
+
+# Ensure project root is in sys.path for src imports
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.Pipeline.predict_pipeline import FEATURE_COLUMNS
+
+RAW_DATA_PATH = os.path.join(PROJECT_ROOT, "rawdata", "Traffic_Accident_Severity_Dataset.csv")
+
+
+def post_json(url, body):
+    request = urllib.request.Request(
+        url, data=json.dumps(body).encode("utf-8"), headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def run_load(url, records, n_requests, concurrency, batch_size):
+    """
+    Sends `n_requests` requests from `concurrency` threads; returns client-side
+    latencies in seconds and the total wall time.
+    """
+    endpoint = f"{url}/predict" if batch_size == 1 else f"{url}/predict/batch"
+    latencies = []
+    lock = threading.Lock()
+    counter = iter(range(n_requests))
+
+    def worker():
+        local = []
+        for i in counter:
+            start = i * batch_size % len(records)
+            chunk = records[start:start + batch_size] or records[:batch_size]
+            body = chunk[0] if batch_size == 1 else {"records": chunk}
+            t0 = time.perf_counter()
+            post_json(endpoint, body)
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    wall_start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return np.array(latencies), time.perf_counter() - wall_start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=None, help="server to target; omit to start one in-process")
+    parser.add_argument("--model-path", default=None, help="artifact for the in-process server")
+    parser.add_argument("--data", default=RAW_DATA_PATH)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=1, help="records per request (1 = /predict)")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    records = pd.read_csv(args.data, usecols=FEATURE_COLUMNS).to_dict(orient="records")
+
+    server = None
+    url = args.url
+    if url is None:
+        from src.Pipeline.prediction_server import PredictionServer, PredictionServerConfig
+
+        server = PredictionServer(PredictionServerConfig(
+            port=0,
+            max_batch_size=args.max_batch_size,
+            max_wait_ms=args.max_wait_ms,
+            model_path=args.model_path,
+        ))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}"
+
+    try:
+        latencies, wall = run_load(url, records, args.requests, args.concurrency, args.batch_size)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    n_records = len(latencies) * args.batch_size
+    print(f"requests     : {len(latencies)} ({args.concurrency} concurrent, {args.batch_size} records each)")
+    print(f"latency p50  : {np.percentile(latencies, 50) * 1000:8.2f} ms")
+    print(f"latency p99  : {np.percentile(latencies, 99) * 1000:8.2f} ms")
+    print(f"throughput   : {len(latencies) / wall:8.1f} req/s, {n_records / wall:10.1f} records/s")
+
+
+if __name__ == "__main__":
+    main()
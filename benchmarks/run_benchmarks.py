@@ -0,0 +1,314 @@
+"""Performance benchmark suite for every pipeline stage.
+
+Runs each stage on synthetic data in the Traffic_Accident_Severity_Dataset schema
+at several sizes and writes machine-readable JSON. With --compare it checks the
+results against a stored baseline and exits non-zero on regressions.
+
+Usage:
+    python benchmarks/run_benchmarks.py --sizes 5000,100000,1000000 --output bench.json
+    python benchmarks/run_benchmarks.py --sizes 5000 --output new.json --compare benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --compare-only new.json benchmarks/baseline.json
+"""
+import argparse
+import functools
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+# Ensure project root is in sys.path for src imports
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from bench_import_time import BUDGETED_MODULE, cold_start, import_time  # noqa: E402  (sibling script)
+from sklearn.ensemble import RandomForestClassifier
+
+from src.Components.data_ingestion import DataIngestion, DataIngestionConfig
+from src.Components.data_transformation import DataTransformation, DataTransformationConfig
+from src.Components.model_trainer import MODEL_INPUT_FORMATS, ModelTrainer
+from src.Components.synthetic_data import SyntheticAccidentGenerator, SyntheticDataConfig
+from src.Pipeline.predict_pipeline import (
+    FEATURE_COLUMNS,
+    CustomData,
+    PredictPipeline,
+    PredictPipelineConfig,
+)
+from src.Components.packed_forest import pack_model
+from src.Pipeline.inference_model import InferenceModel
+from src.utils import as_model_input, evaluate_models, load_artifact, load_object, save_artifact, save_object
+
+RAW_DATA_PATH = os.path.join(PROJECT_ROOT, "rawdata", "Traffic_Accident_Severity_Dataset.csv")
+DEFAULT_SIZES = "5000,100000,1000000"
+
+
+def make_synthetic_dataset(path, n_rows, seed=0, chunksize=250_000):
+    """
+    Writes `n_rows` rows in the raw schema to `path` (.csv or .parquet) with the
+    SyntheticAccidentGenerator fitted on the real dataset, one chunk at a time.
+    """
+    return synthetic_generator().generate(path, n_rows, seed=seed, chunksize=chunksize)
+
+
+@functools.lru_cache(maxsize=1)
+def synthetic_generator():
+    return SyntheticAccidentGenerator.from_csv(SyntheticDataConfig(source_data_path=RAW_DATA_PATH))
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.seconds = time.perf_counter() - self.start
+
+
+class BenchmarkRun:
+    def __init__(self):
+        self.results = []
+
+    def record(self, benchmark, rows, seconds, **extra):
+        entry = {
+            "benchmark": benchmark,
+            "rows": rows,
+            "seconds": seconds,
+            "rows_per_sec": rows / seconds if seconds else None,
+            **extra,
+        }
+        self.results.append(entry)
+        print(f"  {benchmark:<40} {rows:>9} rows {seconds:10.4f}s")
+        return entry
+
+
+def bench_size(run, n_rows, work_dir, model_rows_limit, models_filter, single_row_limit):
+    raw_path = make_synthetic_dataset(os.path.join(work_dir, "raw.csv"), n_rows)
+
+    # --- Data ingestion (both modes) ---
+    ingestion = DataIngestion()
+    ingestion.ingestion_config = DataIngestionConfig(
+        source_data_path=raw_path,
+        raw_data_path=os.path.join(work_dir, "data.csv"),
+        train_data_path=os.path.join(work_dir, "train.csv"),
+        test_data_path=os.path.join(work_dir, "test.csv"),
+    )
+    with Timer() as t:
+        train_path, test_path = ingestion.initiate_data_ingestion()
+    run.record("data_ingestion[memory]", n_rows, t.seconds)
+
+    streaming = DataIngestion()
+    streaming.ingestion_config = DataIngestionConfig(
+        source_data_path=raw_path,
+        mode="streaming",
+        train_dataset_dir=os.path.join(work_dir, "train_parts"),
+        test_dataset_dir=os.path.join(work_dir, "test_parts"),
+    )
+    with Timer() as t:
+        streaming.initiate_data_ingestion()
+    run.record("data_ingestion[streaming]", n_rows, t.seconds)
+
+    # --- Data transformation ---
+    transformation = DataTransformation()
+    transformation.data_transformation_config = DataTransformationConfig(
+        preprocessor_obj_file_path=os.path.join(work_dir, "preprocessor.pkl"),
+        compiled_preprocessor_obj_file_path=os.path.join(work_dir, "preprocessor_compiled.pkl"),
+        label_encoder_obj_file_path=os.path.join(work_dir, "label_encoder.pkl"),
+        native_preprocessor_obj_file_path=os.path.join(work_dir, "preprocessor_native.pkl"),
+        geo_index_file_path=os.path.join(work_dir, "geo_index"),
+    )
+    with Timer() as t:
+        X_train, y_train, X_test, y_test, preprocessor_path = transformation.initiate_data_transformation(
+            train_path, test_path
+        )
+    run.record("data_transformation", n_rows, t.seconds)
+    with Timer() as t:
+        native_train, native_test, _ = transformation.initiate_native_transformation(train_path, test_path)
+    run.record("data_transformation[native]", n_rows, t.seconds)
+    classes = load_object(transformation.data_transformation_config.label_encoder_obj_file_path).classes_
+
+    # --- One fit per model inside evaluate_models (default hyperparameters) ---
+    models, _ = ModelTrainer().get_model_candidates()
+    if models_filter:
+        models = {name: model for name, model in models.items() if name in models_filter}
+    if n_rows <= model_rows_limit:
+        report = evaluate_models(
+            X_train, y_train, X_test, y_test, models, {name: {} for name in models}, search="halving",
+            input_formats=MODEL_INPUT_FORMATS, feature_sets={"native": (native_train, native_test)},
+            cross_validate=False,
+        )
+        for name, (_, score, fit_seconds, evaluation) in report.items():
+            run.record(f"evaluate_models.fit[{name}]", X_train.shape[0], fit_seconds, score=score,
+                       macro_f1=evaluation["test"]["macro_f1"],
+                       predict_us_per_row=evaluation["test"]["predict_us_per_row"])
+    else:
+        print(f"  skipping model fits above {model_rows_limit} rows")
+
+    # --- Reference model for the artifact and prediction benchmarks ---
+    reference = RandomForestClassifier(n_estimators=100, max_depth=20, random_state=0)
+    reference.fit(as_model_input(X_train, "dense"), y_train)
+    inference_model = InferenceModel(load_object(preprocessor_path), reference, classes=classes, input_format="dense")
+
+    # --- save_object / load_object ---
+    artifact_path = os.path.join(work_dir, "inference_model.pkl")
+    with Timer() as t:
+        save_object(artifact_path, inference_model)
+    run.record("save_object", n_rows, t.seconds, bytes=os.path.getsize(artifact_path))
+    with Timer() as t:
+        load_object(artifact_path)
+    run.record("load_object", n_rows, t.seconds, bytes=os.path.getsize(artifact_path))
+
+    # --- save_artifact / load_artifact (packed forest, memory-mapped) ---
+    artifact_dir = os.path.join(work_dir, "inference_model")
+    with Timer() as t:
+        manifest = save_artifact(artifact_dir, InferenceModel(
+            inference_model.preprocessor, pack_model(reference), classes=classes, input_format="dense"
+        ))
+    run.record("save_artifact", n_rows, t.seconds, bytes=manifest["payload_bytes"])
+    with Timer() as t:
+        load_artifact(artifact_dir)
+    run.record("load_artifact", n_rows, t.seconds, bytes=manifest["payload_bytes"])
+
+    # --- Cold start: fresh interpreter, import + load + first single-record prediction ---
+    sample = pd.read_csv(test_path, nrows=1)[FEATURE_COLUMNS].iloc[0].to_dict()
+    started = cold_start(artifact_dir, sample)
+    run.record("cold_start[predict_record]", 1, started["seconds"],
+               import_seconds=started["import_seconds"], heavy_modules=started["heavy_modules"])
+
+    # --- PredictPipeline: single-row vs batch ---
+    pipeline = PredictPipeline(PredictPipelineConfig(inference_model_path=artifact_path))
+    test_df = pd.read_csv(test_path)
+    records = test_df[FEATURE_COLUMNS].head(single_row_limit).to_dict(orient="records")
+
+    with Timer() as t:
+        for record in records:
+            pipeline.predict(CustomData(**record).get_data_as_dataframe())
+    run.record("predict[single_row_dataframe]", len(records), t.seconds)
+
+    with Timer() as t:
+        for record in records:
+            pipeline.predict_record(record)
+    run.record("predict[single_record]", len(records), t.seconds)
+
+    with Timer() as t:
+        pipeline.predict_batch(test_df)
+    run.record("predict[batch]", len(test_df), t.seconds)
+
+    # --- Input validation overhead: predict[batch] validates ("flag"), this one does not ---
+    unvalidated_pipeline = PredictPipeline(PredictPipelineConfig(inference_model_path=artifact_path, validation="off"))
+    with Timer() as t:
+        unvalidated_pipeline.predict_batch(test_df)
+    run.record("predict[batch,validation_off]", len(test_df), t.seconds)
+    with Timer() as t:
+        validation = pipeline.validate(test_df)
+    run.record("validate[batch]", len(test_df), t.seconds, invalid_rows=validation.n_invalid)
+
+    # --- Prediction cache: repeated feature combinations, second pass fully cached ---
+    cached_pipeline = PredictPipeline(PredictPipelineConfig(inference_model_path=artifact_path, cache_size=100_000))
+    cached_pipeline.predict_batch(test_df)
+    with Timer() as t:
+        cached_pipeline.predict_batch(test_df)
+    run.record("predict[batch,cached]", len(test_df), t.seconds)
+    with Timer() as t:
+        for record in records:
+            cached_pipeline.predict_record(record)
+    run.record("predict[single_record,cached]", len(records), t.seconds,
+               hit_rate=cached_pipeline.cache_stats()["hit_rate"])
+
+    # --- Geo index lookups (part of every prediction above) ---
+    geo_index = transformation.load_geo_index()
+    if geo_index is not None:
+        with Timer() as t:
+            geo_index.add_features(test_df)
+        run.record("geo_features[batch]", len(test_df), t.seconds, cells=int(len(geo_index.cell_keys)))
+        with Timer() as t:
+            for record in records:
+                geo_index.record_features(record)
+        run.record("geo_features[single_record]", len(records), t.seconds)
+
+
+def compare(results, baseline, tolerance):
+    """
+    Returns a list of regression messages: benchmarks present in both runs whose
+    time grew by more than `tolerance` (0.2 = 20%) at the same row count.
+    """
+    previous = {(r["benchmark"], r["rows"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results["results"]:
+        old = previous.get((result["benchmark"], result["rows"]))
+        if old is None or not old["seconds"]:
+            continue
+        ratio = result["seconds"] / old["seconds"]
+        status = "REGRESSION" if ratio > 1 + tolerance else "ok"
+        print(f"  {status:<10} {result['benchmark']:<40} {result['rows']:>9} rows "
+              f"{old['seconds']:9.4f}s -> {result['seconds']:9.4f}s ({ratio:5.2f}x)")
+        if status == "REGRESSION":
+            regressions.append(f"{result['benchmark']} @ {result['rows']} rows: {ratio:.2f}x slower")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on synthetic data.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated row counts")
+    parser.add_argument("--output", default="bench_output.json")
+    parser.add_argument("--compare", default=None, help="baseline JSON to check this run against")
+    parser.add_argument("--compare-only", nargs=2, metavar=("RESULTS", "BASELINE"),
+                        help="compare two existing result files without running anything")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before flagging")
+    parser.add_argument("--model-rows-limit", type=int, default=100_000,
+                        help="skip the per-model fit benchmarks above this many rows")
+    parser.add_argument("--models", default=None, help="comma-separated subset of model names")
+    parser.add_argument("--single-row-limit", type=int, default=200,
+                        help="rows scored one at a time in the single-row predict benchmarks")
+    args = parser.parse_args(argv)
+
+    if args.compare_only:
+        with open(args.compare_only[0]) as f:
+            results = json.load(f)
+        with open(args.compare_only[1]) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        return 1 if regressions else 0
+
+    run = BenchmarkRun()
+    imported = import_time(BUDGETED_MODULE, repeat=3)
+    run.record(f"import[{BUDGETED_MODULE}]", 0, imported["seconds"], heavy_modules=imported["heavy_modules"])
+    models_filter = set(args.models.split(",")) if args.models else None
+    for n_rows in (int(size) for size in args.sizes.split(",")):
+        print(f"[{n_rows} rows]")
+        work_dir = tempfile.mkdtemp(prefix="bench_")
+        try:
+            bench_size(run, n_rows, work_dir, args.model_rows_limit, models_filter, args.single_row_limit)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": run.results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("Regressions:\n  " + "\n  ".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
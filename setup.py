@@ -6,4 +6,10 @@ with open("requirements.txt") as f:
         version="0.1",
         author="Jayanth",
         packages=find_packages(),
-        install_requires=requirements,)    
\ No newline at end of file
+        install_requires=requirements,
+        entry_points={
+            "console_scripts": [
+                "bulk-predict=src.Pipeline.bulk_predict:main",
+                "stream-predict=src.Pipeline.stream_pipeline:main",
+            ],
+        },)    
\ No newline at end of file
@@ -0,0 +1,246 @@
+"""Compiles the fitted severity preprocessor into plain lookup tables for inference.
+
+The sklearn ColumnTransformer built by DataTransformation.get_data_transformer_object
+runs every call through SimpleImputer -> OneHotEncoder -> StandardScaler objects and
+sparse-matrix allocations. Once fitted, the whole graph reduces to:
+
+    numeric column  : fill NaN with the median, then (x - mean) / scale
+    categorical col : category -> (output column, pre-scaled value); unknown -> nothing
+
+CompiledPreprocessor stores exactly those tables and reproduces the sklearn output
+bit for bit (as a dense float64 array), which verify_parity checks at export time.
+"""
+import numpy as np
+import pandas as pd
+
+from src.utils import issparse
+
+# Frames up to this many rows use per-value dict lookups instead of vectorized indexing
+SMALL_BATCH_ROWS = 32
+
+
+def categorical_codes(values: pd.Series, index: pd.Index, fill):
+    """
+    index.get_indexer for a pandas Categorical column (e.g. coerced by
+    InputSchema.validate): its categories are looked up once and the integer
+    codes remapped, instead of hashing every row. Missing values take `fill`'s code.
+    """
+    remap = np.append(index.get_indexer(values.cat.categories), index.get_indexer([fill]))
+    # Code -1 (missing) picks the appended fill code
+    return remap[values.cat.codes.to_numpy()]
+
+
+class CompiledPreprocessor:
+    """
+    Dictionary/array-backed equivalent of the fitted severity ColumnTransformer.
+    """
+
+    def __init__(self, numerical_columns, medians, means, scales,
+                 categorical_columns, categories, fill_values, offsets, values):
+        self.numerical_columns = list(numerical_columns)
+        self.medians = np.asarray(medians, dtype=np.float64)
+        self.means = np.asarray(means, dtype=np.float64)
+        self.scales = np.asarray(scales, dtype=np.float64)
+
+        self.categorical_columns = list(categorical_columns)
+        # Per categorical column: learned categories, the imputation fill value,
+        # the first output column of its one-hot block and the pre-scaled values
+        self.categories = [np.asarray(c, dtype=object) for c in categories]
+        self.fill_values = list(fill_values)
+        self.offsets = [int(o) for o in offsets]
+        self.values = [np.asarray(v, dtype=np.float64) for v in values]
+
+        self.n_features_out = len(self.numerical_columns) + sum(len(c) for c in self.categories)
+        self._build_lookups()
+
+    def _build_lookups(self):
+        # category -> (absolute output column, value), used by the single-record path
+        self._lookups = []
+        # category -> code hash tables, built once and reused by the batch path
+        self._indexes = []
+        for cats, offset, vals, fill in zip(self.categories, self.offsets, self.values, self.fill_values):
+            lookup = {cat: (offset + i, vals[i]) for i, cat in enumerate(cats)}
+            self._lookups.append((lookup, lookup.get(fill)))
+            self._indexes.append(pd.Index(cats))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_lookups", None)
+        state.pop("_indexes", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._build_lookups()
+
+    def fit(self, X=None, y=None):
+        # Already fitted by construction; present so it can sit in a Pipeline
+        return self
+
+    def transform(self, X: pd.DataFrame) -> np.ndarray:
+        """
+        Vectorized transform of a DataFrame; returns a dense float64 array.
+        """
+        n_rows = len(X)
+        out = np.zeros((n_rows, self.n_features_out), dtype=np.float64)
+
+        n_num = len(self.numerical_columns)
+        num = X[self.numerical_columns].to_numpy(dtype=np.float64)
+        num = np.where(np.isnan(num), self.medians, num)
+        num -= self.means
+        num /= self.scales
+        out[:, :n_num] = num
+
+        if n_rows <= SMALL_BATCH_ROWS:
+            # Hash-table setup in get_indexer costs more than it saves on a few rows
+            for column, (lookup, filled) in zip(self.categorical_columns, self._lookups):
+                for i, value in enumerate(X[column].tolist()):
+                    hit = filled if value is None or value != value else lookup.get(value)
+                    if hit is not None:
+                        out[i, hit[0]] = hit[1]
+            return out
+
+        rows = np.arange(n_rows)
+        for column, index, fill, offset, vals in zip(
+            self.categorical_columns, self._indexes, self.fill_values, self.offsets, self.values
+        ):
+            if isinstance(X[column].dtype, pd.CategoricalDtype):
+                codes = categorical_codes(X[column], index, fill)
+            else:
+                column_values = X[column].to_numpy(dtype=object)
+                column_values = np.where(pd.isna(column_values), fill, column_values)
+                codes = index.get_indexer(column_values)
+            known = codes >= 0
+            out[rows[known], offset + codes[known]] = vals[codes[known]]
+        return out
+
+    def transform_record(self, record) -> np.ndarray:
+        """
+        Transforms one mapping of column -> value (e.g. CustomData.__dict__)
+        without building a DataFrame; returns a (1, n_features_out) array.
+        """
+        out = np.zeros((1, self.n_features_out), dtype=np.float64)
+        row = out[0]
+        for j, column in enumerate(self.numerical_columns):
+            x = record.get(column)
+            x = self.medians[j] if x is None or x != x else np.float64(x)
+            row[j] = (x - self.means[j]) / self.scales[j]
+        for column, (lookup, filled) in zip(self.categorical_columns, self._lookups):
+            value = record.get(column)
+            hit = filled if value is None or value != value else lookup.get(value)
+            if hit is not None:
+                row[hit[0]] = hit[1]
+        return out
+
+    def get_categories(self):
+        """
+        Returns {categorical column: list of categories learned at fit time}.
+        """
+        return {c: list(cats) for c, cats in zip(self.categorical_columns, self.categories)}
+
+    def get_feature_names_out(self):
+        """
+        Output column names, spelled the way the sklearn ColumnTransformer spells them.
+        """
+        names = [f"num_pipeline__{column}" for column in self.numerical_columns]
+        for column, cats in zip(self.categorical_columns, self.categories):
+            names.extend(f"cat_pipeline__{column}_{cat}" for cat in cats)
+        return np.asarray(names, dtype=object)
+
+
+def compile_preprocessor(preprocessor) -> CompiledPreprocessor:
+    """
+    Compiles a fitted ColumnTransformer made of
+        ("num_pipeline", SimpleImputer(median) -> StandardScaler)
+        ("cat_pipeline", SimpleImputer(most_frequent) -> OneHotEncoder(ignore) -> StandardScaler(with_mean=False))
+    into a CompiledPreprocessor. Raises ValueError for any other layout.
+    """
+    names = [name for name, _, _ in preprocessor.transformers_ if name != "remainder"]
+    if names != ["num_pipeline", "cat_pipeline"]:
+        raise ValueError(f"Unsupported preprocessor layout: {names}")
+    transformers = {name: (pipe, cols) for name, pipe, cols in preprocessor.transformers_}
+
+    num_pipe, numerical_columns = transformers["num_pipeline"]
+    num_imputer, num_scaler = num_pipe.named_steps["imputer"], num_pipe.named_steps["scaler"]
+    if num_imputer.strategy != "median" or not (num_scaler.with_mean and num_scaler.with_std):
+        raise ValueError("Unsupported numerical pipeline")
+
+    cat_pipe, categorical_columns = transformers["cat_pipeline"]
+    cat_imputer = cat_pipe.named_steps["imputer"]
+    encoder = cat_pipe.named_steps["one_hot_encoder"]
+    cat_scaler = cat_pipe.named_steps["scaler"]
+    if encoder.handle_unknown != "ignore" or encoder.drop_idx_ is not None or cat_scaler.with_mean:
+        raise ValueError("Unsupported categorical pipeline")
+
+    # StandardScaler scales sparse input as data *= 1 / scale_, and the one-hot
+    # data is exactly 1.0, so each category's output value is 1 / scale_ itself
+    inverse_scale = 1 / cat_scaler.scale_
+    offsets, values = [], []
+    start = 0
+    for cats in encoder.categories_:
+        offsets.append(len(numerical_columns) + start)
+        values.append(inverse_scale[start:start + len(cats)])
+        start += len(cats)
+
+    return CompiledPreprocessor(
+        numerical_columns=numerical_columns,
+        medians=num_imputer.statistics_,
+        means=num_scaler.mean_,
+        scales=num_scaler.scale_,
+        categorical_columns=categorical_columns,
+        categories=encoder.categories_,
+        fill_values=cat_imputer.statistics_,
+        offsets=offsets,
+        values=values,
+    )
+
+
+def parity_frames(compiled: CompiledPreprocessor, df: pd.DataFrame):
+    """
+    Yields (name, frame) cases for verify_parity: the given data, every learned
+    category in every column, unseen categories, missing values and a single row.
+    """
+    columns = compiled.numerical_columns + compiled.categorical_columns
+    base = df[columns].reset_index(drop=True)
+    yield "data", base
+    if base.empty:
+        return
+
+    n = max(len(c) for c in compiled.categories)
+    every_category = base.iloc[np.arange(n) % len(base)].reset_index(drop=True)
+    for column, cats in zip(compiled.categorical_columns, compiled.categories):
+        every_category[column] = [cats[i % len(cats)] for i in range(n)]
+    yield "every_category", every_category
+
+    unseen = base.head(5).copy()
+    for column in compiled.categorical_columns:
+        unseen[column] = "__unseen__"
+    yield "unseen_categories", unseen
+
+    missing = base.head(5).copy()
+    for column in columns:
+        missing[column] = np.nan
+    yield "missing_values", missing
+
+    yield "single_row", base.head(1)
+
+
+def verify_parity(preprocessor, compiled: CompiledPreprocessor, df: pd.DataFrame):
+    """
+    Checks that `compiled` reproduces `preprocessor.transform` bit for bit on
+    every parity frame, through both the batch and the single-record paths.
+    Raises AssertionError describing the first mismatch.
+    """
+    for name, frame in parity_frames(compiled, df):
+        expected = preprocessor.transform(frame)
+        if issparse(expected):
+            expected = expected.toarray()
+        expected = np.asarray(expected, dtype=np.float64)
+
+        actual = compiled.transform(frame)
+        if actual.shape != expected.shape or not np.array_equal(actual, expected):
+            raise AssertionError(f"Compiled preprocessor differs from sklearn on '{name}' (batch path)")
+
+        for i, record in enumerate(frame.head(50).to_dict(orient="records")):
+            if not np.array_equal(compiled.transform_record(record)[0], expected[i]):
+                raise AssertionError(f"Compiled preprocessor differs from sklearn on '{name}' row {i} (record path)")
@@ -8,31 +8,18 @@ PROJECT_ROOT = Path(__file__).resolve().parents[2]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from src.exception import exception   # Custom exception class for better error handling
+from src.exception import CustomException   # Custom exception class for better error handling
 from src.logger import logging              # Custom logging utility for logging info/errors
+from src.logger import set_stage_rows, timed_stage  # Stage timing / memory records
+import shutil            # For clearing old partition directories before a streaming run
+import numpy as np       # NumPy for the vectorized hash-based split
 import pandas as pd      # Pandas library for data manipulation and analysis (read CSV, create DataFrames, etc.)
-
-# Scikit-learn function for splitting dataset into training and testing sets
-from sklearn.model_selection import train_test_split  
 from dataclasses import dataclass   # Decorator for creating simple classes to store configurations
 
-# Importing Data Transformation components (custom code from your project)
-try:
-    # Use the actual case of the folder (Components) for clarity; Windows is case-insensitive
-    from src.Components.data_transformation import DataTransformation  
-    from src.Components.data_transformation import DataTransformationConfig  
-except (ImportError, AttributeError):
-    # Graceful fallback if the module/classes are not implemented yet
-    DataTransformation = None  # type: ignore
-    DataTransformationConfig = None  # type: ignore
-
-# Importing Model Trainer components (custom code from your project)
-try:
-    from src.Components.model_trainer import ModelTrainerConfig  
-    from src.Components.model_trainer import ModelTrainer  
-except (ImportError, AttributeError):
-    ModelTrainerConfig = None  # type: ignore
-    ModelTrainer = None  # type: ignore
+from src.dtypes import memory_per_million_rows, read_accidents  # Shared dtype registry for the accident schema
+
+# scikit-learn and the downstream Data Transformation / Model Trainer components are
+# imported where they are used, so importing this module stays cheap
 
 # Configuration class for Data Ingestion (stores file paths for train, test, and raw datasets)
 @dataclass
@@ -40,6 +27,50 @@ class DataIngestionConfig:
     train_data_path: str = os.path.join('artifacts', "train.csv")   # Path to store training dataset
     test_data_path: str = os.path.join('artifacts', "test.csv")     # Path to store testing dataset
     raw_data_path: str = os.path.join('artifacts', "data.csv")      # Path to store raw dataset
+    source_data_path: str = str(PROJECT_ROOT / 'rawdata' / 'Traffic_Accident_Severity_Dataset.csv')  # Input file
+    test_size: float = 0.2                                          # Fraction of rows assigned to the test set
+
+    # "memory" reads the whole file and writes CSVs; "streaming" reads it in chunks
+    # and writes partitioned columnar datasets the transformation stage memory-maps
+    mode: str = "memory"
+    chunksize: int = 100_000                                        # Rows per chunk / partition in streaming mode
+    artifact_format: str = "feather"                                # "feather" (memory-mappable) or "parquet"
+    train_dataset_dir: str = os.path.join('artifacts', "train")     # Partition directory for the training set
+    test_dataset_dir: str = os.path.join('artifacts', "test")       # Partition directory for the testing set
+    write_csv: bool = False                                         # Also write the CSV outputs in streaming mode
+
+
+def hash_split_mask(df, test_size, buckets=1_000_000):
+    """
+    Deterministic train/test assignment: True for rows hashed into the test set.
+    Each row's bucket depends only on its own values, so the split is identical
+    whatever the chunk size or row order, and duplicate rows never straddle sets.
+    """
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return (row_hashes % np.uint64(buckets)) < np.uint64(int(test_size * buckets))
+
+
+def write_partition(df, directory, part_index, artifact_format="feather"):
+    """
+    Writes one chunk as a partition file and returns its path. Feather files are
+    written uncompressed so readers can memory-map them.
+    """
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if artifact_format == "feather":
+        import pyarrow.feather as feather
+
+        path = os.path.join(directory, f"part-{part_index:05d}.feather")
+        feather.write_feather(table, path, compression="uncompressed")
+    elif artifact_format == "parquet":
+        import pyarrow.parquet as pq
+
+        path = os.path.join(directory, f"part-{part_index:05d}.parquet")
+        pq.write_table(table, path)
+    else:
+        raise ValueError(f"Unknown artifact format: {artifact_format}")
+    return path
 
 # Main class responsible for reading raw data and splitting into train/test sets
 class DataIngestion:
@@ -47,15 +78,22 @@ class DataIngestion:
         # Initialize ingestion configuration (paths)
         self.ingestion_config = DataIngestionConfig()
 
+    @timed_stage("data_ingestion")
     def initiate_data_ingestion(self):
         logging.info("Entered the data ingestion method or component")   # Log entry into method
+        if self.ingestion_config.mode == "streaming":
+            return self.initiate_streaming_data_ingestion()
         try:
-            # Build absolute path to the CSV so it works regardless of current working directory
-            data_csv_path = PROJECT_ROOT / 'rawdata' / 'Traffic_Accident_Severity_Dataset.csv'
+            # Absolute path to the CSV so it works regardless of current working directory
+            data_csv_path = Path(self.ingestion_config.source_data_path)
             if not data_csv_path.exists():
                 raise FileNotFoundError(f"Input data file not found: {data_csv_path}")
-            df = pd.read_csv(data_csv_path)
-            logging.info('Read the dataset as dataframe')   # Log successful read
+            # Registry dtypes (categories); Date/Time stay raw and the coordinates
+            # float64 so the artifact CSVs keep the source file's columns and values
+            df = read_accidents(data_csv_path, timestamps=False, compact_coordinates=False)
+            set_stage_rows(len(df))                         # Report the row count in the stage record
+            logging.info(f"Read the dataset as dataframe "
+                         f"({memory_per_million_rows(df) / 1e6:.1f} MB per million rows)")   # Log successful read
 
             # Create directories if they do not exist (for saving processed data)
             os.makedirs(os.path.dirname(self.ingestion_config.train_data_path), exist_ok=True)
@@ -64,8 +102,11 @@ class DataIngestion:
             df.to_csv(self.ingestion_config.raw_data_path, index=False, header=True)
 
             logging.info("Train test split initiated")  # Log start of train-test split
+            # Scikit-learn function for splitting dataset into training and testing sets
+            from sklearn.model_selection import train_test_split
+
             # Split dataset into training and testing sets (80% train, 20% test)
-            train_set, test_set = train_test_split(df, test_size=0.2, random_state=42)
+            train_set, test_set = train_test_split(df, test_size=self.ingestion_config.test_size, random_state=42)
 
             # Save training dataset to artifacts/train.csv
             train_set.to_csv(self.ingestion_config.train_data_path, index=False, header=True)
@@ -81,10 +122,125 @@ class DataIngestion:
             )
         except Exception as e:
             # If error occurs, raise a custom exception with traceback details
-            raise exception(e, sys)
+            raise CustomException(e, sys)
+
+    @timed_stage("data_ingestion[streaming]")
+    def initiate_streaming_data_ingestion(self):
+        """
+        Out-of-core ingestion: reads the raw file in chunks with explicit dtypes,
+        splits each chunk with hash_split_mask and writes it as one train and one
+        test partition. Peak memory is one chunk, whatever the file size.
+        Returns the train and test partition directories.
+        """
+        config = self.ingestion_config
+        logging.info(f"Streaming ingestion started (chunksize={config.chunksize}, format={config.artifact_format})")
+        try:
+            if not os.path.exists(config.source_data_path):
+                raise FileNotFoundError(f"Input data file not found: {config.source_data_path}")
+
+            # Start from empty partition directories so stale parts never leak into a run
+            for directory in (config.train_dataset_dir, config.test_dataset_dir):
+                shutil.rmtree(directory, ignore_errors=True)
+                os.makedirs(directory, exist_ok=True)
+            if config.write_csv:
+                os.makedirs(os.path.dirname(config.train_data_path), exist_ok=True)
+
+            n_train = n_test = 0
+            reader = read_accidents(config.source_data_path, timestamps=False, compact_coordinates=False,
+                                    chunksize=config.chunksize)
+            for part_index, chunk in enumerate(reader):
+                is_test = hash_split_mask(chunk, config.test_size)
+                train_part, test_part = chunk[~is_test], chunk[is_test]
+
+                if len(train_part):
+                    write_partition(train_part, config.train_dataset_dir, part_index, config.artifact_format)
+                if len(test_part):
+                    write_partition(test_part, config.test_dataset_dir, part_index, config.artifact_format)
+
+                # Optional CSV copies for consumers that still expect the old outputs
+                if config.write_csv:
+                    mode, header = ("w", True) if part_index == 0 else ("a", False)
+                    chunk.to_csv(config.raw_data_path, mode=mode, header=header, index=False)
+                    train_part.to_csv(config.train_data_path, mode=mode, header=header, index=False)
+                    test_part.to_csv(config.test_data_path, mode=mode, header=header, index=False)
+
+                n_train += len(train_part)
+                n_test += len(test_part)
+
+            set_stage_rows(n_train + n_test)
+            logging.info(f"Streaming ingestion completed: {n_train} train rows, {n_test} test rows")
+            return config.train_dataset_dir, config.test_dataset_dir
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def split_batch(self, batch):
+        """
+        Returns the (train rows, test rows) split initiate_batch_append stores a
+        batch (read with read_accidents(path, timestamps=False, compact_coordinates=False)) as.
+        """
+        is_test = hash_split_mask(batch, self.ingestion_config.test_size)
+        return batch[~is_test], batch[is_test]
+
+    @timed_stage("data_ingestion[append]")
+    def initiate_batch_append(self, batch_path):
+        """
+        Appends a new batch of accidents to the stored dataset without re-reading it:
+        the batch goes onto the raw copy (raw_data_path, the source of the next full
+        retrain) and is split with hash_split_mask onto the train/test CSVs, or as
+        one new partition each in streaming mode. Returns the batch's train and
+        test rows.
+        """
+        config = self.ingestion_config
+        logging.info(f"Appending batch {batch_path} to the stored dataset")
+        try:
+            if not os.path.exists(batch_path):
+                raise FileNotFoundError(f"Batch file not found: {batch_path}")
+            batch = read_accidents(batch_path, timestamps=False, compact_coordinates=False)
+            set_stage_rows(len(batch))
+            train_part, test_part = self.split_batch(batch)
+
+            # The raw copy only exists after a memory-mode run; start it from the source file
+            if not os.path.exists(config.raw_data_path):
+                os.makedirs(os.path.dirname(config.raw_data_path), exist_ok=True)
+                shutil.copyfile(config.source_data_path, config.raw_data_path)
+
+            # Appended CSV rows must follow the column order of the existing header
+            def append_csv(df, path):
+                columns = pd.read_csv(path, nrows=0).columns
+                df[columns].to_csv(path, mode="a", header=False, index=False)
+
+            append_csv(batch, config.raw_data_path)
+            if config.mode == "streaming":
+                for part, directory in ((train_part, config.train_dataset_dir), (test_part, config.test_dataset_dir)):
+                    if len(part):
+                        # Next free partition number after the ones already written
+                        part_index = len([name for name in os.listdir(directory) if name.startswith("part-")])
+                        write_partition(part, directory, part_index, config.artifact_format)
+            else:
+                append_csv(train_part, config.train_data_path)
+                append_csv(test_part, config.test_data_path)
+
+            logging.info(f"Appended {len(train_part)} train rows and {len(test_part)} test rows")
+            return train_part, test_part
+        except Exception as e:
+            raise CustomException(e, sys)
 
 # Entry point of the script
 if __name__ == "__main__":
+    # Importing Data Transformation components (custom code from your project)
+    try:
+        # Use the actual case of the folder (Components) for clarity; Windows is case-insensitive
+        from src.Components.data_transformation import DataTransformation
+    except (ImportError, AttributeError):
+        # Graceful fallback if the module/classes are not implemented yet
+        DataTransformation = None  # type: ignore
+
+    # Importing Model Trainer components (custom code from your project)
+    try:
+        from src.Components.model_trainer import ModelTrainer
+    except (ImportError, AttributeError):
+        ModelTrainer = None  # type: ignore
+
     obj = DataIngestion()
     train_data, test_data = obj.initiate_data_ingestion()
     print(f"Train data saved to: {train_data}")
@@ -93,8 +249,16 @@ if __name__ == "__main__":
     # Only proceed with downstream steps if the stubs are available
     if DataTransformation and ModelTrainer:
         data_transformation = DataTransformation()
-        train_arr, test_arr, _ = data_transformation.initiate_data_transformation(train_data, test_data)
+        X_train, y_train, X_test, y_test, preprocessor_path = data_transformation.initiate_data_transformation(
+            train_data, test_data
+        )
+        native_features = data_transformation.initiate_native_transformation(train_data, test_data)
         modeltrainer = ModelTrainer()
-        print(modeltrainer.initiate_model_trainer(train_arr, test_arr))
+        print(modeltrainer.initiate_model_trainer(
+            X_train, y_train, X_test, y_test, preprocessor_path,
+            label_encoder_path=data_transformation.data_transformation_config.label_encoder_obj_file_path,
+            input_schema_path=data_transformation.data_transformation_config.input_schema_file_path,
+            native_features=native_features,
+        ))
     else:
         print("DataTransformation / ModelTrainer not implemented yet. Skipping those steps.")
\ No newline at end of file
@@ -7,16 +7,26 @@ if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
 from dataclasses import dataclass
-import numpy as np
 import pandas as pd
+from scipy import sparse
 from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.preprocessing import LabelEncoder, OneHotEncoder, StandardScaler
 
+from src.Components.compiled_preprocessor import compile_preprocessor, verify_parity
+from src.Components.geo_features import GeoFeatureIndex, GeoFeaturePreprocessor
+from src.Components.model_evaluation import FoldCache
+from src.Components.native_preprocessor import NativeCategoricalEncoder
+from src.dtypes import CATEGORICAL_FEATURES, memory_per_million_rows
 from src.exception import CustomException
-from src.logger import logging
-from src.utils import save_object
+from src.logger import logging, set_stage_rows, timed_stage
+from src.Pipeline.input_schema import InputSchema
+from src.utils import load_artifact, load_object, read_dataset, save_artifact, save_object
+
+NUMERICAL_COLUMNS = ["Latitude", "Longitude"]
+CATEGORICAL_COLUMNS = list(CATEGORICAL_FEATURES)
+TARGET_COLUMN = "Severity"
 
 
 @dataclass
@@ -26,6 +36,22 @@ class DataTransformationConfig:
     The preprocessor will be saved in the 'artifacts' directory.
     """
     preprocessor_obj_file_path: str = os.path.join('artifacts', "severity_preprocessor.pkl")
+    # Lookup-table export of the fitted preprocessor, used at inference time
+    compiled_preprocessor_obj_file_path: str = os.path.join('artifacts', "severity_preprocessor_compiled.pkl")
+    # Severity label <-> integer code mapping the models are trained on
+    label_encoder_obj_file_path: str = os.path.join('artifacts', "severity_label_encoder.pkl")
+    # Integer-coded categorical features for the native-categorical boosting models
+    native_preprocessor_obj_file_path: str = os.path.join('artifacts', "severity_preprocessor_native.pkl")
+    # Grid index of historical accidents behind the geo features (an artifact directory)
+    geo_index_file_path: str = os.path.join('artifacts', "geo_index")
+    # Input schema (categories, coordinate ranges) learned from the training rows, as JSON
+    input_schema_file_path: str = os.path.join('artifacts', "input_schema.json")
+    geo_features: bool = True
+    geo_cell_size: float = 0.01         # Grid cell edge in degrees (~1 km of latitude)
+    # Training rows get out-of-fold geo features from these stratified folds (the
+    # ModelTrainer search's cv=3, random_state=42, so CV folds see the same split)
+    geo_folds: int = 3
+    geo_folds_seed: int = 42
 
 
 class DataTransformation:
@@ -39,23 +65,16 @@ class DataTransformation:
         # ✅ Correct constructor so config is initialized
         self.data_transformation_config = DataTransformationConfig()
 
-    def get_data_transformer_object(self):
+    def get_data_transformer_object(self, geo_columns=()):
         """
         Creates and returns the data preprocessor object.
         Handles feature engineering and scaling for both
-        numerical and categorical features.
+        numerical and categorical features; `geo_columns` are the
+        GeoFeatureIndex columns, scaled like the other numerical ones.
         """
         try:
-            numerical_columns = ["Latitude", "Longitude"]
-            categorical_columns = [
-                "Weather",
-                "Road_Condition",
-                "Time_of_Day",
-                "Traffic",
-                "Accident_Type",
-                "Vehicle_Type",
-                "Accident_Reason",
-            ]
+            numerical_columns = NUMERICAL_COLUMNS + list(geo_columns)
+            categorical_columns = CATEGORICAL_COLUMNS
 
             numerical_pipeline = Pipeline(steps=[
                 ("imputer", SimpleImputer(strategy="median")),
@@ -85,51 +104,193 @@ class DataTransformation:
             logging.error(f"Error in get_data_transformer_object: {e}")
             raise CustomException(e, sys)
 
+    @timed_stage("data_transformation")
     def initiate_data_transformation(self, train_path, test_path):
         """
-        Initiates the data transformation process by loading,
-        preprocessing, and combining the data.
+        Initiates the data transformation process: loads the data, fits the
+        preprocessor on the training set and label-encodes the target.
+
+        Returns X_train, y_train, X_test, y_test and the compiled preprocessor path.
+        X is a CSR matrix when the encoder output is sparse (a dense array
+        otherwise) and y holds integer codes; the fitted LabelEncoder is saved
+        to label_encoder_obj_file_path.
         """
         try:
-            # Load datasets
-            train_df = pd.read_csv(train_path)
-            test_df = pd.read_csv(test_path)
+            # Load datasets (CSV files or the partition directories of streaming ingestion)
+            # Coordinates in float64, as the stored data and the requests served later
+            train_df = read_dataset(train_path, compact_coordinates=False)
+            test_df = read_dataset(test_path, compact_coordinates=False)
+            set_stage_rows(len(train_df) + len(test_df))
 
-            logging.info("Read train and test data completed.")
-            logging.info("Obtaining preprocessing object.")
+            logging.info(f"Read train and test data completed "
+                         f"({memory_per_million_rows(train_df) / 1e6:.1f} MB per million rows).")
+            target_column_name = TARGET_COLUMN
 
-            preprocessing_obj = self.get_data_transformer_object()
-            target_column_name = "Severity"
+            # Date/Time arrive as compact timestamp features (src.dtypes); they are
+            # kept on the frames, and the preprocessors select their own columns
+            input_feature_train_df = train_df.drop(columns=[target_column_name])
+            target_feature_train_df = train_df[target_column_name]
 
-            # Drop target + optional Date/Time columns if present
-            input_feature_train_df = train_df.drop(
-                columns=[c for c in [target_column_name, "Date", "Time"] if c in train_df.columns]
+            input_feature_test_df = test_df.drop(columns=[target_column_name])
+            target_feature_test_df = test_df[target_column_name]
+
+            # Categories and coordinate ranges requests are validated against at serving time
+            InputSchema.from_frame(input_feature_train_df, CATEGORICAL_COLUMNS, NUMERICAL_COLUMNS).save(
+                self.data_transformation_config.input_schema_file_path
             )
-            target_feature_train_df = train_df[target_column_name]
 
-            input_feature_test_df = test_df.drop(
-                columns=[c for c in [target_column_name, "Date", "Time"] if c in test_df.columns]
+            # Integer targets instead of gluing the string labels onto the features
+            label_encoder = LabelEncoder().fit(target_feature_train_df)
+            y_train = label_encoder.transform(target_feature_train_df)
+            y_test = label_encoder.transform(target_feature_test_df)
+
+            geo_index = None
+            if self.data_transformation_config.geo_features:
+                geo_index = self.fit_geo_index(input_feature_train_df, y_train, label_encoder.classes_)
+                # Training rows are scored out of fold so their own label never reaches their features
+                input_feature_train_df = geo_index.add_features(input_feature_train_df, y_train, self.geo_folds(y_train))
+                input_feature_test_df = geo_index.add_features(input_feature_test_df)
+
+            logging.info("Obtaining preprocessing object.")
+            preprocessing_obj = self.get_data_transformer_object(
+                geo_columns=() if geo_index is None else geo_index.feature_names_out
             )
-            target_feature_test_df = test_df[target_column_name]
 
             logging.info("Applying preprocessing object on training and testing data.")
 
-            input_feature_train_arr = preprocessing_obj.fit_transform(input_feature_train_df)
-            input_feature_test_arr = preprocessing_obj.transform(input_feature_test_df)
+            X_train = preprocessing_obj.fit_transform(input_feature_train_df)
+            X_test = preprocessing_obj.transform(input_feature_test_df)
 
-            train_arr = np.c_[input_feature_train_arr, np.array(target_feature_train_df)]
-            test_arr = np.c_[input_feature_test_arr, np.array(target_feature_test_df)]
+            # Keep the encoder's sparse output sparse; models pick their own layout later
+            if sparse.issparse(X_train):
+                X_train, X_test = sparse.csr_matrix(X_train), sparse.csr_matrix(X_test)
+            logging.info(f"Feature matrix: {X_train.shape[1]} columns, "
+                         f"{'CSR' if sparse.issparse(X_train) else 'dense'}")
 
             # ✅ Save the preprocessor
             logging.info(f"Saving preprocessor to {self.data_transformation_config.preprocessor_obj_file_path}")
             save_object(
                 file_path=self.data_transformation_config.preprocessor_obj_file_path,
-                obj=preprocessing_obj
+                obj=self.with_geo_features(preprocessing_obj, geo_index)
             )
             logging.info("Preprocessor saved successfully")
+            save_object(
+                file_path=self.data_transformation_config.label_encoder_obj_file_path,
+                obj=label_encoder
+            )
 
-            return train_arr, test_arr, self.data_transformation_config.preprocessor_obj_file_path
+            compiled_path = self.export_compiled_preprocessor(
+                preprocessing_obj, pd.concat([input_feature_train_df, input_feature_test_df]), geo_index
+            )
+
+            return X_train, y_train, X_test, y_test, compiled_path
 
         except Exception as e:
             logging.error(f"Error in initiate_data_transformation: {e}")
-            raise CustomException(e, sys)
\ No newline at end of file
+            raise CustomException(e, sys)
+
+    def get_native_transformer_object(self, geo_columns=()):
+        """
+        Creates the preprocessor of the native-categorical path: median-imputed,
+        unscaled numerical columns and integer-coded categorical columns.
+        """
+        return NativeCategoricalEncoder(NUMERICAL_COLUMNS + list(geo_columns), CATEGORICAL_COLUMNS)
+
+    @timed_stage("data_transformation[native]")
+    def initiate_native_transformation(self, train_path, test_path):
+        """
+        Builds the native-categorical features for the same rows (and the same
+        targets) as initiate_data_transformation, reusing the geo index and label
+        encoder it saved. Returns the train and test feature frames and the
+        path of the saved native preprocessor.
+        """
+        try:
+            train_df = read_dataset(train_path, compact_coordinates=False)
+            test_df = read_dataset(test_path, compact_coordinates=False)
+            set_stage_rows(len(train_df) + len(test_df))
+
+            geo_index = self.load_geo_index()
+            geo_columns = ()
+            if geo_index is not None:
+                # Same out-of-fold geo features (same folds) as the one-hot path
+                label_encoder = load_object(self.data_transformation_config.label_encoder_obj_file_path)
+                y_train = label_encoder.transform(train_df[TARGET_COLUMN])
+                train_df = geo_index.add_features(train_df, y_train, self.geo_folds(y_train))
+                test_df = geo_index.add_features(test_df)
+                geo_columns = geo_index.feature_names_out
+
+            native_obj = self.get_native_transformer_object(geo_columns)
+            native_train = native_obj.fit_transform(train_df)
+            native_test = native_obj.transform(test_df)
+
+            file_path = self.data_transformation_config.native_preprocessor_obj_file_path
+            save_object(file_path=file_path, obj=self.with_geo_features(native_obj, geo_index))
+            logging.info(f"Native categorical preprocessor saved to {file_path}")
+            return native_train, native_test, file_path
+
+        except Exception as e:
+            logging.error(f"Error in initiate_native_transformation: {e}")
+            raise CustomException(e, sys)
+
+    def export_compiled_preprocessor(self, preprocessing_obj, reference_df, geo_index=None):
+        """
+        Compiles the fitted preprocessor into lookup tables, checks that it
+        reproduces the sklearn output bit for bit on `reference_df` and edge
+        cases, and saves it (behind the geo feature stage when `geo_index` is
+        given). Returns the path of the compiled artifact.
+        """
+        try:
+            compiled = compile_preprocessor(preprocessing_obj)
+            verify_parity(preprocessing_obj, compiled, reference_df)
+            logging.info("Compiled preprocessor matches sklearn output on all parity checks")
+
+            file_path = self.data_transformation_config.compiled_preprocessor_obj_file_path
+            save_object(file_path=file_path, obj=self.with_geo_features(compiled, geo_index))
+            logging.info(f"Compiled preprocessor saved to {file_path}")
+            return file_path
+
+        except Exception as e:
+            logging.error(f"Error in export_compiled_preprocessor: {e}")
+            raise CustomException(e, sys)
+
+    def fit_geo_index(self, train_df, y_train, classes):
+        """
+        Builds the grid index of the training accidents and saves it as an
+        artifact (geo_index_file_path). Returns the fitted GeoFeatureIndex.
+        """
+        try:
+            geo_index = GeoFeatureIndex(cell_size=self.data_transformation_config.geo_cell_size).fit(
+                train_df["Latitude"], train_df["Longitude"], y_train, classes
+            )
+            file_path = self.data_transformation_config.geo_index_file_path
+            save_artifact(file_path, geo_index, manifest=geo_index.describe())
+            logging.info(f"Geo index with {len(geo_index.cell_keys)} cells saved to {file_path}")
+            return geo_index
+
+        except Exception as e:
+            logging.error(f"Error in fit_geo_index: {e}")
+            raise CustomException(e, sys)
+
+    def geo_folds(self, y_train):
+        """
+        The stratified folds the training rows' geo features are computed out of.
+        """
+        config = self.data_transformation_config
+        return FoldCache(y_train, n_splits=config.geo_folds, random_state=config.geo_folds_seed).splits
+
+    def load_geo_index(self):
+        """
+        Returns the geo index saved by initiate_data_transformation, or None
+        when geo features are disabled.
+        """
+        if not self.data_transformation_config.geo_features:
+            return None
+        return load_artifact(self.data_transformation_config.geo_index_file_path, mmap_mode=None)
+
+    @staticmethod
+    def with_geo_features(preprocessor, geo_index):
+        """
+        Puts the geo feature stage in front of a fitted preprocessor, so saved
+        preprocessors take the raw CustomData columns.
+        """
+        return preprocessor if geo_index is None else GeoFeaturePreprocessor(geo_index, preprocessor)
@@ -0,0 +1,190 @@
+"""Mergeable dataset statistics and the drift check of incremental training.
+
+RunningFeatureStats summarizes a dataset in one pass and can absorb new batches
+without revisiting old rows:
+
+    numeric column  : count, mean and sum of squared deviations (Chan et al.
+                      parallel merge), missing count, and a fixed-size uniform
+                      reservoir sample for the median
+    categorical col : per-category counts (vocabulary and frequencies)
+    target          : per-class counts
+
+check_drift compares a new batch against the statistics of the data the
+current model was trained on and decides whether appending it and continuing
+training is enough, or whether a full retrain is needed.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# Numeric values kept per column for the median estimate
+RESERVOIR_SIZE = 100_000
+
+
+class RunningFeatureStats:
+    def __init__(self, numerical_columns, categorical_columns, target_column=None, seed=0):
+        self.numerical_columns = list(numerical_columns)
+        self.categorical_columns = list(categorical_columns)
+        self.target_column = target_column
+        self.n_rows = 0
+        self.count = {c: 0 for c in self.numerical_columns}
+        self.mean = {c: 0.0 for c in self.numerical_columns}
+        self.m2 = {c: 0.0 for c in self.numerical_columns}
+        self.missing = {c: 0 for c in self.numerical_columns + self.categorical_columns}
+        self.reservoir = {c: np.empty(0) for c in self.numerical_columns}
+        self.category_counts = {c: {} for c in self.categorical_columns}
+        self.target_counts = {}
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def from_frame(cls, df, numerical_columns, categorical_columns, target_column=None):
+        return cls(numerical_columns, categorical_columns, target_column).update(df)
+
+    def update(self, df: pd.DataFrame):
+        """
+        Merges the statistics of `df` into this summary; returns self.
+        """
+        for column in self.numerical_columns:
+            values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float64)
+            present = values[~np.isnan(values)]
+            self.missing[column] += len(values) - len(present)
+            self._merge_moments(column, present)
+            self._merge_reservoir(column, present)
+        for column in self.categorical_columns:
+            counts = self.category_counts[column]
+            for value, n in df[column].value_counts(dropna=True).items():
+                counts[value] = counts.get(value, 0) + int(n)
+            self.missing[column] += int(df[column].isna().sum())
+        if self.target_column is not None and self.target_column in df.columns:
+            for value, n in df[self.target_column].value_counts(dropna=True).items():
+                self.target_counts[value] = self.target_counts.get(value, 0) + int(n)
+        self.n_rows += len(df)
+        return self
+
+    def _merge_moments(self, column, values):
+        n_b = len(values)
+        if n_b == 0:
+            return
+        n_a, mean_a = self.count[column], self.mean[column]
+        mean_b = float(values.mean())
+        m2_b = float(((values - mean_b) ** 2).sum())
+        n = n_a + n_b
+        delta = mean_b - mean_a
+        self.mean[column] = mean_a + delta * n_b / n
+        self.m2[column] += m2_b + delta ** 2 * n_a * n_b / n
+        self.count[column] = n
+
+    def _merge_reservoir(self, column, values):
+        # Algorithm R, vectorized per batch: the kept rows stay a uniform sample of everything seen
+        reservoir = self.reservoir[column]
+        seen_before = self.count[column] - len(values)
+        room = RESERVOIR_SIZE - len(reservoir)
+        if room > 0:
+            reservoir = np.concatenate([reservoir, values[:room]])
+            values, seen_before = values[room:], seen_before + min(room, len(values))
+        if len(values):
+            slots = self._rng.integers(0, seen_before + np.arange(1, len(values) + 1))
+            keep = slots < RESERVOIR_SIZE
+            reservoir[slots[keep]] = values[keep]
+        self.reservoir[column] = reservoir
+
+    def median(self, column):
+        return float(np.median(self.reservoir[column])) if len(self.reservoir[column]) else float("nan")
+
+    def std(self, column):
+        n = self.count[column]
+        return float(np.sqrt(self.m2[column] / n)) if n else float("nan")
+
+    def most_frequent(self, column):
+        counts = self.category_counts[column]
+        return max(counts, key=counts.get) if counts else None
+
+    def frequencies(self, column):
+        counts = self.category_counts[column]
+        total = sum(counts.values())
+        return {value: n / total for value, n in counts.items()} if total else {}
+
+    def target_frequencies(self):
+        total = sum(self.target_counts.values())
+        return {value: n / total for value, n in self.target_counts.items()} if total else {}
+
+
+def population_stability_index(expected: dict, actual: dict, floor=1e-4):
+    """
+    PSI between two {category: frequency} distributions; > 0.2 is the usual
+    threshold for a material shift.
+    """
+    keys = set(expected) | set(actual)
+    e = np.array([max(expected.get(k, 0.0), floor) for k in keys])
+    a = np.array([max(actual.get(k, 0.0), floor) for k in keys])
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+@dataclass
+class DriftThresholds:
+    mean_shift_std: float = 0.25        # |mean_new - mean_ref| in reference standard deviations
+    category_psi: float = 0.2           # PSI of a categorical column's frequencies
+    target_psi: float = 0.2             # PSI of the Severity class frequencies
+    unseen_category_rate: float = 0.0   # Share of batch rows with a category the encoder never saw
+    accuracy_drop: float = 0.05         # Current model accuracy on the batch vs its test accuracy
+
+
+@dataclass
+class DriftReport:
+    needs_full_retrain: bool = False
+    reasons: list = field(default_factory=list)
+    metrics: dict = field(default_factory=dict)
+
+    def flag(self, reason):
+        self.needs_full_retrain = True
+        self.reasons.append(reason)
+
+
+def check_drift(reference: RunningFeatureStats, batch: RunningFeatureStats,
+                thresholds: DriftThresholds = None, batch_accuracy=None, reference_accuracy=None):
+    """
+    Compares `batch` against `reference` (the data the model was trained on).
+    Returns a DriftReport; needs_full_retrain is set when any threshold is crossed.
+    """
+    thresholds = thresholds or DriftThresholds()
+    report = DriftReport()
+
+    for column in reference.numerical_columns:
+        std = reference.std(column)
+        if not batch.count[column] or not std:
+            continue
+        shift = abs(batch.mean[column] - reference.mean[column]) / std
+        report.metrics[f"{column}.mean_shift_std"] = shift
+        if shift > thresholds.mean_shift_std:
+            report.flag(f"{column}: mean moved {shift:.2f} standard deviations")
+
+    for column in reference.categorical_columns:
+        known = reference.category_counts[column]
+        unseen = sum(n for value, n in batch.category_counts[column].items() if value not in known)
+        rate = unseen / batch.n_rows if batch.n_rows else 0.0
+        psi = population_stability_index(reference.frequencies(column), batch.frequencies(column))
+        report.metrics[f"{column}.unseen_rate"] = rate
+        report.metrics[f"{column}.psi"] = psi
+        if rate > thresholds.unseen_category_rate:
+            new_values = sorted(str(v) for v in batch.category_counts[column] if v not in known)
+            report.flag(f"{column}: categories not in the encoder vocabulary {new_values}")
+        elif psi > thresholds.category_psi:
+            report.flag(f"{column}: category frequencies shifted (PSI {psi:.3f})")
+
+    if reference.target_counts and batch.target_counts:
+        unseen_labels = set(batch.target_counts) - set(reference.target_counts)
+        psi = population_stability_index(reference.target_frequencies(), batch.target_frequencies())
+        report.metrics["target.psi"] = psi
+        if unseen_labels:
+            report.flag(f"target: new classes {sorted(map(str, unseen_labels))}")
+        elif psi > thresholds.target_psi:
+            report.flag(f"target: class frequencies shifted (PSI {psi:.3f})")
+
+    if batch_accuracy is not None and reference_accuracy is not None:
+        drop = reference_accuracy - batch_accuracy
+        report.metrics["accuracy_drop"] = drop
+        if drop > thresholds.accuracy_drop:
+            report.flag(f"accuracy on the batch is {drop:.3f} below the model's test accuracy")
+
+    return report
@@ -0,0 +1,224 @@
+"""Geo features from a precomputed grid index over historical accidents.
+
+Latitude/Longitude otherwise reach the models only as two scaled numbers.
+GeoFeatureIndex buckets the training accidents into a regular grid of
+`cell_size`-degree cells and stores, for every cell within one cell of an
+accident, the totals over its 3x3 neighbourhood:
+
+    cell_keys    : sorted int64 cell ids (row * KEY_STRIDE + column)
+    counts       : accidents in the neighbourhood
+    class_counts : accidents per Severity class in the neighbourhood
+
+These are plain arrays, so the index is saved as a memory-mappable artifact.
+Batches are looked up with one np.searchsorted (O(log cells) per row), single
+records through a cell id -> position dict (O(1)). Each point gets
+
+    geo_density          : log1p(neighbourhood accident count)
+    geo_severity_<class> : share of each class in the neighbourhood, smoothed
+                           towards the overall class mix for sparse cells
+
+Training rows are scored out of fold (out_of_fold_features): each fold's rows
+get the features of an index fitted on the other folds only, with the counts
+scaled up to the full training set. Scoring them against the full index, or
+leave-one-out, would let a model read a row's own label back from its cell's
+severity mix. Test rows and served requests use the index fitted on all
+training rows.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+# Cell ids are row * KEY_STRIDE + column; rows and columns are clipped to +-KEY_LIMIT
+KEY_STRIDE = np.int64(1 << 32)
+KEY_LIMIT = 1 << 30
+
+
+class GeoFeatureIndex:
+    """
+    Grid index of historical accident counts and severity mix around each cell.
+    """
+
+    def __init__(self, cell_size=0.01, smoothing=10.0, latitude_column="Latitude", longitude_column="Longitude"):
+        self.cell_size = float(cell_size)
+        self.smoothing = float(smoothing)
+        self.latitude_column = latitude_column
+        self.longitude_column = longitude_column
+
+    def _cells(self, latitude, longitude):
+        """
+        Returns (row, column, valid) grid coordinates; invalid rows have a missing coordinate.
+        """
+        latitude = np.asarray(latitude, dtype=np.float64)
+        longitude = np.asarray(longitude, dtype=np.float64)
+        valid = ~(np.isnan(latitude) | np.isnan(longitude))
+        with np.errstate(invalid="ignore"):
+            rows = np.floor((np.where(valid, latitude, self.origin[0]) - self.origin[0]) / self.cell_size)
+            cols = np.floor((np.where(valid, longitude, self.origin[1]) - self.origin[1]) / self.cell_size)
+        rows = np.clip(rows, -KEY_LIMIT, KEY_LIMIT).astype(np.int64)
+        cols = np.clip(cols, -KEY_LIMIT, KEY_LIMIT).astype(np.int64)
+        return rows, cols, valid
+
+    def fit(self, latitude, longitude, y, classes, origin=None):
+        """
+        Builds the index from training coordinates and integer-coded targets
+        (codes into `classes`). Rows with a missing coordinate are skipped.
+        `origin` pins the grid to another index's cells.
+        """
+        self.classes = np.asarray(classes)
+        latitude = np.asarray(latitude, dtype=np.float64)
+        longitude = np.asarray(longitude, dtype=np.float64)
+        present = ~(np.isnan(latitude) | np.isnan(longitude))
+        self.origin = origin if origin is not None else (
+            np.floor(np.min(latitude[present], initial=0.0)),
+            np.floor(np.min(longitude[present], initial=0.0)),
+        )
+        rows, cols, _ = self._cells(latitude[present], longitude[present])
+        y = np.asarray(y, dtype=np.int64)[present]
+        n_classes = len(self.classes)
+
+        # Every accident counts towards the 3x3 block of cells around its own
+        keys = rows * KEY_STRIDE + cols
+        shifted = np.concatenate([keys + dr * KEY_STRIDE + dc for dr in (-1, 0, 1) for dc in (-1, 0, 1)])
+        labels = np.tile(y, 9)
+        self.cell_keys, inverse = np.unique(shifted, return_inverse=True)
+        n_cells = len(self.cell_keys)
+        self.counts = np.bincount(inverse, minlength=n_cells).astype(np.int32)
+        self.class_counts = (
+            np.bincount(inverse * n_classes + labels, minlength=n_cells * n_classes)
+            .reshape(n_cells, n_classes).astype(np.int32)
+        )
+        self.prior = np.bincount(y, minlength=n_classes) / max(len(y), 1)
+        return self
+
+    @property
+    def feature_names_out(self):
+        return ["geo_density"] + [f"geo_severity_{c}" for c in self.classes]
+
+    def features(self, latitude, longitude, count_scale=1.0):
+        """
+        Returns the (n, 1 + n_classes) geo feature array for the given points.
+        Counts are multiplied by `count_scale` (see out_of_fold_features).
+        """
+        rows, cols, valid = self._cells(latitude, longitude)
+        keys = rows * KEY_STRIDE + cols
+        position = np.minimum(np.searchsorted(self.cell_keys, keys), len(self.cell_keys) - 1)
+        found = valid & (self.cell_keys[position] == keys)
+
+        counts = np.where(found, self.counts[position], 0) * float(count_scale)
+        class_counts = np.where(found[:, None], self.class_counts[position], 0) * float(count_scale)
+
+        out = np.empty((len(keys), 1 + len(self.classes)), dtype=np.float64)
+        out[:, 0] = np.log1p(counts)
+        out[:, 1:] = (class_counts + self.smoothing * self.prior) / (counts + self.smoothing)[:, None]
+        return out
+
+    def out_of_fold_features(self, latitude, longitude, y, folds):
+        """
+        Geo features of the training rows this index was fitted on: for every
+        (train_idx, valid_idx) in `folds` (e.g. FoldCache.splits), the valid rows
+        are looked up in an index fitted on the train rows only, on the same
+        grid, with counts scaled by the fold's share of the rows so densities
+        match the full index's. No row's feature depends on its own label.
+        """
+        latitude = np.asarray(latitude, dtype=np.float64)
+        longitude = np.asarray(longitude, dtype=np.float64)
+        y = np.asarray(y, dtype=np.int64)
+        out = np.empty((len(y), 1 + len(self.classes)), dtype=np.float64)
+        for train_idx, valid_idx in folds:
+            fold_index = GeoFeatureIndex(self.cell_size, self.smoothing, self.latitude_column, self.longitude_column)
+            fold_index.fit(latitude[train_idx], longitude[train_idx], y[train_idx], self.classes, origin=self.origin)
+            out[valid_idx] = fold_index.features(latitude[valid_idx], longitude[valid_idx],
+                                                 count_scale=len(y) / max(len(train_idx), 1))
+        return out
+
+    def add_features(self, df: pd.DataFrame, y=None, folds=None) -> pd.DataFrame:
+        """
+        Returns a copy of `df` with the geo feature columns appended. Pass the
+        training rows' integer targets `y` and `folds` to score them out of fold.
+        """
+        latitude = pd.to_numeric(df[self.latitude_column], errors="coerce")
+        longitude = pd.to_numeric(df[self.longitude_column], errors="coerce")
+        if folds is None:
+            values = self.features(latitude, longitude)
+        else:
+            values = self.out_of_fold_features(latitude, longitude, y, folds)
+        return df.assign(**dict(zip(self.feature_names_out, values.T)))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_record_tables", None)
+        return state
+
+    def record_features(self, record) -> dict:
+        """
+        Geo features of one {column: value} mapping, as {feature name: value}.
+        The lookup tables are built on first use; the array path's per-call
+        overhead would dominate for a single row.
+        """
+        tables = self.__dict__.get("_record_tables")
+        if tables is None:
+            tables = self._record_tables = (
+                {key: i for i, key in enumerate(self.cell_keys.tolist())},
+                self.feature_names_out,
+                self.prior.tolist(),
+                float(self.origin[0]), float(self.origin[1]),
+            )
+        positions, names, prior, latitude_origin, longitude_origin = tables
+
+        latitude, longitude = record.get(self.latitude_column), record.get(self.longitude_column)
+        position = None
+        if latitude is not None and longitude is not None and latitude == latitude and longitude == longitude:
+            row = min(max(math.floor((float(latitude) - latitude_origin) / self.cell_size), -KEY_LIMIT), KEY_LIMIT)
+            col = min(max(math.floor((float(longitude) - longitude_origin) / self.cell_size), -KEY_LIMIT), KEY_LIMIT)
+            position = positions.get(row * (1 << 32) + col)
+
+        count = 0 if position is None else int(self.counts[position])
+        class_counts = [0] * len(prior) if position is None else self.class_counts[position].tolist()
+        values = [math.log1p(count)] + [
+            (n + self.smoothing * p) / (count + self.smoothing) for n, p in zip(class_counts, prior)
+        ]
+        return dict(zip(names, values))
+
+    def describe(self):
+        """
+        JSON-ready summary for the artifact manifest.
+        """
+        return {
+            "cell_size": self.cell_size,
+            "smoothing": self.smoothing,
+            "cells": int(len(self.cell_keys)),
+            "classes": [str(c) for c in self.classes],
+            "feature_names": self.feature_names_out,
+        }
+
+
+class GeoFeaturePreprocessor:
+    """
+    Adds the geo features to each frame or record, then runs the wrapped
+    preprocessor (sklearn, compiled or native), which was fitted with the geo
+    columns as extra numerical columns. Other attributes are read from the
+    wrapped preprocessor.
+    """
+
+    def __init__(self, geo_index: GeoFeatureIndex, preprocessor):
+        self.geo_index = geo_index
+        self.preprocessor = preprocessor
+
+    def __getattr__(self, name):
+        # Only reached for attributes not set on the wrapper itself; private names
+        # are never forwarded so pickling and copying see a plain object
+        if name.startswith("_") or name in ("geo_index", "preprocessor"):
+            raise AttributeError(name)
+        return getattr(self.preprocessor, name)
+
+    def fit(self, X=None, y=None):
+        return self
+
+    def transform(self, X: pd.DataFrame):
+        return self.preprocessor.transform(self.geo_index.add_features(X))
+
+    def transform_record(self, record):
+        if not hasattr(self.preprocessor, "transform_record"):
+            return self.transform(pd.DataFrame([record]))
+        return self.preprocessor.transform_record({**record, **self.geo_index.record_features(record)})
@@ -0,0 +1,106 @@
+"""Continues training a fitted model on a new batch instead of refitting it.
+
+    boosting (XGBoost, CatBoost, LightGBM) : adds `boosting_rounds` trees starting
+                                             from the fitted booster
+    sklearn boosting (HistGradientBoosting, : warm_start with `boosting_rounds`
+    GradientBoosting)                         more iterations
+    forests (RandomForest, ExtraTrees)      : warm_start with `forest_trees` more
+                                             trees grown on the batch
+    anything with partial_fit (SGD, ...)   : one partial_fit pass over the batch
+
+Other models (Decision Tree, Logistic Regression, AdaBoost, KNN) have no way to
+absorb new rows without a refit; continue_training returns None for them and
+the caller falls back to a full retrain.
+"""
+import copy
+import sys
+from dataclasses import dataclass
+
+from src.exception import CustomException
+from src.logger import logging, set_stage_rows, timed_stage
+
+
+def _is_instance(model, module, *names):
+    """
+    isinstance(model, module.<name>) for any of `names`, without importing
+    `module`: a fitted model's library is always loaded, so one that is not
+    loaded (or not installed) cannot match.
+    """
+    loaded = sys.modules.get(module)
+    if loaded is None:
+        return False
+    classes = tuple(getattr(loaded, name) for name in names if hasattr(loaded, name))
+    return isinstance(model, classes)
+
+
+@dataclass
+class IncrementalTrainerConfig:
+    boosting_rounds: int = 20     # Trees / iterations added per batch by the boosting models
+    forest_trees: int = 10        # Trees added per batch by the forests
+
+
+class IncrementalTrainer:
+    def __init__(self, config: IncrementalTrainerConfig = None):
+        self.incremental_trainer_config = config or IncrementalTrainerConfig()
+
+    @staticmethod
+    def supports(model):
+        """
+        True when continue_training can update `model` without a refit.
+        """
+        return (
+            _is_instance(model, "xgboost", "XGBClassifier")
+            or _is_instance(model, "catboost", "CatBoostClassifier")
+            or _is_instance(model, "lightgbm", "LGBMClassifier")
+            or _is_instance(model, "sklearn.ensemble", "HistGradientBoostingClassifier", "GradientBoostingClassifier",
+                            "RandomForestClassifier", "ExtraTreesClassifier")
+            or hasattr(model, "partial_fit")
+        )
+
+    @timed_stage("incremental_trainer")
+    def continue_training(self, model, X, y):
+        """
+        Returns a copy of `model` updated with the batch (X, y), or None when the
+        model type cannot be updated incrementally. `model` itself is not modified,
+        so the served model stays valid if the update fails.
+        """
+        try:
+            set_stage_rows(X.shape[0])
+            rounds = self.incremental_trainer_config.boosting_rounds
+
+            if _is_instance(model, "xgboost", "XGBClassifier"):
+                updated = copy.deepcopy(model)
+                updated.set_params(n_estimators=rounds)
+                updated.fit(X, y, xgb_model=model.get_booster())
+            elif _is_instance(model, "catboost", "CatBoostClassifier"):
+                updated = type(model)(**{**model.get_params(), "iterations": rounds})
+                updated.fit(X, y, init_model=model)
+            elif _is_instance(model, "lightgbm", "LGBMClassifier"):
+                updated = copy.deepcopy(model)
+                updated.set_params(n_estimators=rounds)
+                updated.fit(X, y, init_model=model.booster_)
+            elif _is_instance(model, "sklearn.ensemble", "HistGradientBoostingClassifier"):
+                updated = copy.deepcopy(model)
+                updated.set_params(warm_start=True, max_iter=model.n_iter_ + rounds)
+                updated.fit(X, y)
+            elif _is_instance(model, "sklearn.ensemble", "GradientBoostingClassifier"):
+                updated = copy.deepcopy(model)
+                updated.set_params(warm_start=True, n_estimators=model.n_estimators_ + rounds)
+                updated.fit(X, y)
+            elif _is_instance(model, "sklearn.ensemble", "RandomForestClassifier", "ExtraTreesClassifier"):
+                updated = copy.deepcopy(model)
+                updated.set_params(warm_start=True,
+                                   n_estimators=len(model.estimators_) + self.incremental_trainer_config.forest_trees)
+                updated.fit(X, y)
+            elif hasattr(model, "partial_fit"):
+                updated = copy.deepcopy(model)
+                updated.partial_fit(X, y)
+            else:
+                logging.info(f"{type(model).__name__} cannot be updated incrementally")
+                return None
+
+            logging.info(f"Continued training {type(model).__name__} on {X.shape[0]} new rows")
+            return updated
+
+        except Exception as e:
+            raise CustomException(e, sys)
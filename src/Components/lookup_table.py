@@ -0,0 +1,163 @@
+"""Per-category lookup-table classifier, the smallest student ModelDistiller exports.
+
+Once the served model is trained, the severity it predicts for a row is mostly a
+function of a few categorical columns. LookupTableClassifier stores the teacher's
+mean class probabilities for every combination of those columns' categories in
+one contiguous array:
+
+    codes : (n_rows, n_columns) integer category codes (CategoryCodeEncoder)
+    cell  : codes @ strides   (mixed-radix index of the combination)
+    proba : table[cell]
+
+so a batch costs one matrix-vector product and one gather, and a single record a
+handful of dict lookups. Like PackedForestClassifier it depends on NumPy and
+pandas only, and its arrays load as memory maps from an artifact directory.
+"""
+import numpy as np
+import pandas as pd
+
+from src.Components.compiled_preprocessor import categorical_codes
+
+
+class CategoryCodeEncoder:
+    """
+    Raw frame -> (n_rows, n_columns) int64 array of category codes 0..k-1 for
+    the learned categories. Missing values take the most frequent category (as
+    in the other preprocessors) and values unseen at fit time take code k.
+    """
+
+    def __init__(self, categorical_columns):
+        self.categorical_columns = list(categorical_columns)
+
+    def fit(self, X: pd.DataFrame, y=None):
+        self.categories = []
+        self.fill_values = []
+        for column in self.categorical_columns:
+            values = X[column].dropna()
+            self.categories.append(np.asarray(sorted(values.unique()), dtype=object))
+            self.fill_values.append(values.mode().iloc[0])
+        self._build_lookups()
+        return self
+
+    def _build_lookups(self):
+        self._indexes = [pd.Index(cats) for cats in self.categories]
+        self._lookups = [{cat: i for i, cat in enumerate(cats)} for cats in self.categories]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_indexes", None)
+        state.pop("_lookups", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._build_lookups()
+
+    @property
+    def radices(self):
+        # One code per learned category plus the unseen-value code
+        return [len(cats) + 1 for cats in self.categories]
+
+    def transform(self, X: pd.DataFrame) -> np.ndarray:
+        codes = np.empty((len(X), len(self.categorical_columns)), dtype=np.int64)
+        for j, (column, index, fill) in enumerate(zip(self.categorical_columns, self._indexes, self.fill_values)):
+            if isinstance(X[column].dtype, pd.CategoricalDtype):
+                column_codes = categorical_codes(X[column], index, fill)
+            else:
+                values = X[column].to_numpy(dtype=object)
+                column_codes = index.get_indexer(np.where(pd.isna(values), fill, values))
+            codes[:, j] = np.where(column_codes < 0, len(index), column_codes)
+        return codes
+
+    def fit_transform(self, X: pd.DataFrame, y=None) -> np.ndarray:
+        return self.fit(X).transform(X)
+
+    def transform_record(self, record) -> np.ndarray:
+        """
+        Codes of one {column: value} mapping, as a (1, n_columns) array.
+        """
+        codes = []
+        for column, lookup, fill in zip(self.categorical_columns, self._lookups, self.fill_values):
+            value = record.get(column)
+            value = fill if value is None or value != value else value
+            codes.append(lookup.get(value, len(lookup)))
+        return np.asarray([codes], dtype=np.int64)
+
+    def get_categories(self):
+        """
+        Returns {categorical column: list of categories learned at fit time}.
+        """
+        return {c: list(cats) for c, cats in zip(self.categorical_columns, self.categories)}
+
+    def get_feature_names_out(self):
+        return np.asarray(self.categorical_columns, dtype=object)
+
+
+def _strides(radices):
+    # Row-major mixed-radix strides: the last column varies fastest
+    radices = np.asarray(radices, dtype=np.int64)
+    return np.append(np.cumprod(radices[::-1])[::-1][1:], 1).astype(np.int64)
+
+
+class LookupTableClassifier:
+    """
+    Class probabilities per combination of category codes. `table` has one row
+    per cell of the mixed-radix code space given by `radices`.
+    """
+
+    def __init__(self, classes, radices, table):
+        self.classes_ = np.asarray(classes)
+        self.radices = np.asarray(radices, dtype=np.int64)
+        self.table = np.asarray(table, dtype=np.float64)
+        self.strides = _strides(self.radices)
+
+    @property
+    def n_cells(self):
+        return len(self.table)
+
+    @property
+    def n_features_in_(self):
+        return len(self.radices)
+
+    def predict_proba(self, codes):
+        return self.table[np.asarray(codes, dtype=np.int64) @ self.strides]
+
+    def predict(self, codes):
+        return self.classes_[self.predict_proba(codes).argmax(axis=1)]
+
+    def score(self, codes, y):
+        return float(np.mean(self.predict(codes) == np.asarray(y)))
+
+
+def fit_lookup_table(codes, proba, radices, classes):
+    """
+    Builds the LookupTableClassifier of the mean rows of `proba` (the
+    teacher's class probabilities) per cell of `codes`.
+
+    The last code of every column stands for values unseen at fit time; its
+    cells take the count-weighted mean over the column's known values, so an
+    unknown category falls back to the other columns. Cells no row reached
+    take the overall mean.
+    """
+    radices = [int(r) for r in radices]
+    proba = np.asarray(proba, dtype=np.float64)
+    n_cells, n_classes = int(np.prod(radices)), proba.shape[1]
+    cells = np.asarray(codes, dtype=np.int64) @ _strides(radices)
+
+    sums = np.stack([np.bincount(cells, weights=proba[:, c], minlength=n_cells) for c in range(n_classes)], axis=1)
+    counts = np.bincount(cells, minlength=n_cells).astype(np.float64)
+    prior = sums.sum(axis=0) / max(counts.sum(), 1.0)
+
+    sums = sums.reshape(*radices, n_classes)
+    counts = counts.reshape(radices)
+    for axis, radix in enumerate(radices):
+        # moveaxis returns views, so these assignments fill the unseen slot in place
+        for values in (sums, counts):
+            values = np.moveaxis(values, axis, 0)
+            values[radix - 1] = values[:radix - 1].sum(axis=0)
+
+    sums, counts = sums.reshape(n_cells, n_classes), counts.reshape(n_cells)
+    reached = counts > 0
+    table = np.tile(prior, (n_cells, 1))
+    table[reached] = sums[reached] / counts[reached, None]
+    return LookupTableClassifier(classes, radices, table)
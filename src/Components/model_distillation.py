@@ -0,0 +1,270 @@
+"""Distills the served model into a compact student for the low-latency serving path.
+
+ModelTrainer serves the model its leaderboard ranks first, which can be a deep
+ensemble costing tens of microseconds per row. ModelDistiller trains students on
+that model's (the teacher's) own predictions:
+
+    lookup table  : the teacher's mean class probabilities per combination of a
+                    greedily chosen set of categorical columns (LookupTableClassifier)
+    tree students : depth-limited decision trees and small forests on the compiled
+                    one-hot features, packed into flat arrays (PackedForestClassifier)
+
+The teacher labels a transfer set of training rows plus synthetic rows from a
+SyntheticAccidentGenerator fitted on the training split, so the students also
+see category combinations the training rows miss. Every student is scored on
+the test split through InferenceModel (accuracy, agreement with the teacher,
+batch and single-record latency). The fastest student that is faster than the
+teacher and within `max_accuracy_loss` of its accuracy is saved as a second
+inference artifact, which PredictPipeline serves with backend="distilled".
+"""
+import os
+import pickle
+import shutil
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.Components.data_transformation import CATEGORICAL_COLUMNS, TARGET_COLUMN, DataTransformationConfig
+from src.Components.lookup_table import CategoryCodeEncoder, fit_lookup_table
+from src.Components.model_trainer import ModelTrainerConfig
+from src.Components.packed_forest import pack_model
+from src.Components.synthetic_data import SyntheticAccidentGenerator, SyntheticDataConfig
+from src.exception import CustomException
+from src.logger import logging, set_stage_rows, timed_stage
+from src.Pipeline.inference_model import FEATURE_COLUMNS, InferenceModel
+from src.utils import load_artifact, load_object, read_dataset, read_manifest, save_artifact
+
+
+@dataclass
+class ModelDistillationConfig:
+    distilled_model_file_path: str = os.path.join("artifacts", "inference_model_distilled")
+    # Largest drop below the teacher's test accuracy a served student may have
+    max_accuracy_loss: float = 0.01
+    # Transfer set: up to this many training rows plus this many synthetic rows
+    max_train_rows: int = 200_000
+    synthetic_rows: int = 100_000
+    # Lookup table: cell budget, and the least agreement gain that justifies another column
+    max_table_cells: int = 1_000_000
+    min_column_gain: float = 0.001
+    # Tree students as (n_estimators, max_depth); one estimator is a single decision tree
+    tree_students: tuple = ((1, 8), (1, 12), (10, 10))
+    # Test records scored one at a time for the single-record latency
+    latency_records: int = 200
+    seed: int = 0
+
+
+def _predict_labels(model: InferenceModel, frame):
+    if hasattr(model.model, "predict_proba"):
+        return model.classes_[model.predict_proba(frame).argmax(axis=1)]
+    return model.predict(frame)
+
+
+def _teacher_proba(teacher: InferenceModel, frame):
+    """
+    The teacher's class probabilities (columns in teacher.model.classes_ order);
+    one-hot predictions for models without predict_proba.
+    """
+    if hasattr(teacher.model, "predict_proba"):
+        return teacher.predict_proba(frame)
+    predicted = np.asarray(teacher.model.predict(teacher.transform(frame))).reshape(-1, 1)
+    return (predicted == teacher.model.classes_).astype(np.float64)
+
+
+class ModelDistiller:
+    def __init__(self, config: ModelDistillationConfig = None):
+        self.model_distillation_config = config or ModelDistillationConfig()
+        self.model_trainer_config = ModelTrainerConfig()
+        self.data_transformation_config = DataTransformationConfig()
+
+    def transfer_set(self, train_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Feature columns of the training rows (at most max_train_rows) followed by
+        synthetic_rows rows drawn from a generator fitted on them.
+        """
+        config = self.model_distillation_config
+        rng = np.random.default_rng(config.seed)
+        if len(train_df) > config.max_train_rows:
+            train_df = train_df.iloc[np.sort(rng.choice(len(train_df), config.max_train_rows, replace=False))]
+        frames = [train_df[FEATURE_COLUMNS]]
+        if config.synthetic_rows > 0:
+            generator = SyntheticAccidentGenerator(SyntheticDataConfig(seed=config.seed)).fit(train_df)
+            frames.append(generator.sample(config.synthetic_rows, rng)[FEATURE_COLUMNS])
+        return pd.concat(frames, ignore_index=True)
+
+    def fit_lookup_student(self, transfer, proba, classes):
+        """
+        Chooses categorical columns greedily, each time adding the one whose
+        table agrees best with the teacher on a held-out fifth of the transfer
+        set, until the gain drops below min_column_gain or the table would
+        exceed max_table_cells. Returns (encoder, table) fitted on all rows.
+        """
+        config = self.model_distillation_config
+        encoder = CategoryCodeEncoder(CATEGORICAL_COLUMNS).fit(transfer)
+        codes, radices = encoder.transform(transfer), encoder.radices
+        labels = proba.argmax(axis=1)
+        holdout = np.random.default_rng(config.seed).random(len(codes)) < 0.2
+
+        chosen, agreement = [], 0.0
+        while True:
+            best = None
+            for j in range(len(radices)):
+                columns = chosen + [j]
+                if j in chosen or np.prod([radices[i] for i in columns]) > config.max_table_cells:
+                    continue
+                table = fit_lookup_table(codes[~holdout][:, columns], proba[~holdout],
+                                         [radices[i] for i in columns], classes)
+                score = float(np.mean(table.predict_proba(codes[holdout][:, columns]).argmax(axis=1)
+                                      == labels[holdout]))
+                if best is None or score > best[0]:
+                    best = (score, j)
+            if best is None or (chosen and best[0] - agreement < config.min_column_gain):
+                break
+            agreement = best[0]
+            chosen.append(best[1])
+            logging.info(f"Lookup table: + {CATEGORICAL_COLUMNS[best[1]]} (agreement {agreement:.4f})")
+
+        encoder = CategoryCodeEncoder([CATEGORICAL_COLUMNS[j] for j in chosen]).fit(transfer)
+        return encoder, fit_lookup_table(encoder.transform(transfer), proba, encoder.radices, classes)
+
+    def fit_tree_student(self, features, labels, n_estimators, max_depth):
+        """
+        A depth-limited tree (or forest of `n_estimators` trees) fitted on the
+        teacher's labels, packed into flat arrays.
+        """
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.tree import DecisionTreeClassifier
+
+        seed = self.model_distillation_config.seed
+        if n_estimators == 1:
+            model = DecisionTreeClassifier(max_depth=max_depth, random_state=seed)
+        else:
+            model = RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth,
+                                           random_state=seed, n_jobs=-1)
+        return pack_model(model.fit(features, labels))
+
+    def measure(self, name, kind, model: InferenceModel, test_df, y_test, teacher_labels=None):
+        """
+        Test-split accuracy, agreement with `teacher_labels`, batch latency (best
+        of three passes) and mean single-record latency of an inference model.
+        Returns (row, predicted labels).
+        """
+        frame = test_df[model.feature_columns]
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            labels = _predict_labels(model, frame)
+            timings.append(time.perf_counter() - start)
+        labels = np.asarray(labels).astype(str)
+
+        records = frame.iloc[:self.model_distillation_config.latency_records].to_dict("records")
+        start = time.perf_counter()
+        for record in records:
+            model.predict_record(record)
+        record_seconds = time.perf_counter() - start
+
+        row = {
+            "model": name,
+            "kind": kind,
+            "accuracy": float(np.mean(labels == y_test)),
+            "agreement": None if teacher_labels is None else float(np.mean(labels == teacher_labels)),
+            "batch_us_per_row": min(timings) / max(len(frame), 1) * 1e6,
+            "record_us": record_seconds / max(len(records), 1) * 1e6,
+            "model_bytes": len(pickle.dumps(model.model)),
+        }
+        return row, labels
+
+    @timed_stage("model_distillation")
+    def initiate_model_distillation(self, train_path, test_path):
+        """
+        Distills the inference model ModelTrainer saved, using the ingested
+        train/test splits. Returns (path of the saved student or None, report
+        rows: the teacher first, then every student).
+        """
+        try:
+            config = self.model_distillation_config
+            teacher_path = self.model_trainer_config.inference_model_file_path
+            teacher = load_artifact(teacher_path, mmap_mode=None)
+            teacher_name = read_manifest(teacher_path).get("metrics", {}).get("model") or type(teacher.model).__name__
+
+            train_df = read_dataset(train_path, timestamps=False)
+            test_df = read_dataset(test_path)
+            y_test = test_df[TARGET_COLUMN].astype(str).to_numpy()
+            transfer = self.transfer_set(train_df)
+            set_stage_rows(len(transfer) + len(test_df))
+            logging.info(f"Distilling {teacher_name} on {len(transfer)} transfer rows")
+
+            classes = teacher.model.classes_
+            proba = _teacher_proba(teacher, transfer)
+            teacher_row, teacher_labels = self.measure(f"{teacher_name} (served)", "teacher", teacher, test_df, y_test)
+
+            students = []
+            encoder, table = self.fit_lookup_student(transfer, proba, classes)
+            students.append((f"lookup table ({len(encoder.categorical_columns)} columns)", "lookup",
+                             InferenceModel(encoder, table, classes=teacher.classes, schema=teacher.schema)))
+
+            preprocessor = load_object(self.data_transformation_config.compiled_preprocessor_obj_file_path)
+            features = preprocessor.transform(transfer)
+            hard_labels = classes[proba.argmax(axis=1)]
+            for n_estimators, max_depth in config.tree_students:
+                name = (f"decision tree (depth {max_depth})" if n_estimators == 1
+                        else f"forest ({n_estimators} trees, depth {max_depth})")
+                model = self.fit_tree_student(features, hard_labels, n_estimators, max_depth)
+                students.append((name, "tree", InferenceModel(preprocessor, model, classes=teacher.classes,
+                                                              input_format="dense", schema=teacher.schema)))
+
+            rows = [teacher_row]
+            for name, kind, model in students:
+                rows.append(self.measure(name, kind, model, test_df, y_test, teacher_labels)[0])
+
+            eligible = [
+                i for i, row in enumerate(rows[1:])
+                if row["accuracy"] >= teacher_row["accuracy"] - config.max_accuracy_loss
+                and row["batch_us_per_row"] < teacher_row["batch_us_per_row"]
+            ]
+            selected = min(eligible, key=lambda i: rows[i + 1]["batch_us_per_row"]) if eligible else None
+            for i, row in enumerate(rows):
+                row["selected"] = selected is not None and i == selected + 1
+
+            path = config.distilled_model_file_path
+            if selected is None:
+                # A student left over from an earlier teacher must not be served
+                if os.path.exists(path):
+                    shutil.rmtree(path)
+                logging.info(f"No student within {config.max_accuracy_loss} accuracy of {teacher_name} "
+                             f"and faster than it; no distilled model saved")
+                return None, rows
+
+            name, _, model = students[selected]
+            save_artifact(path, model, manifest={
+                **model.describe(),
+                "distillation": {
+                    "teacher": teacher_name,
+                    "student": name,
+                    "max_accuracy_loss": config.max_accuracy_loss,
+                    "transfer_rows": len(transfer),
+                    "candidates": rows,
+                },
+            })
+            logging.info(f"Distilled {teacher_name} into {name}, saved to {path}")
+            return path, rows
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @staticmethod
+    def format_report(rows):
+        lines = [
+            "Distilled serving models (test split; * = saved for backend=\"distilled\"):",
+            f"  {'model':<34} {'accuracy':>8} {'agreement':>9} {'batch us/row':>12} {'record us':>9} {'size KB':>9}",
+        ]
+        for row in rows:
+            agreement = "-" if row["agreement"] is None else f"{row['agreement']:.4f}"
+            marker = "*" if row.get("selected") else " "
+            lines.append(
+                f"{marker} {row['model']:<34} {row['accuracy']:8.4f} {agreement:>9} "
+                f"{row['batch_us_per_row']:12.2f} {row['record_us']:9.1f} {row['model_bytes'] / 1024:9.1f}"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,369 @@
+"""Model evaluation: cached cross-validation folds, one-pass metrics and the leaderboard.
+
+    FoldCache            stratified folds of the training rows, computed once; each
+                         feature set's fold matrices are sliced once and shared by
+                         every model and hyperparameter candidate of the search
+    prediction_metrics   one timed predict pass -> accuracy, macro-F1, per-class
+                         recall, predict latency per row and the confusion matrix
+                         (also a GridSearchCV scoring callable)
+    ModelEvaluator       turns the search report into a leaderboard of held-out and
+                         cross-validated metrics, picks the model to serve on
+                         accuracy *and* predict cost, and writes the leaderboard as
+                         JSON and HTML artifacts
+
+The test-set metrics of every model come from the single predict pass
+evaluate_models makes, so nothing here predicts again; the classification
+report of the served model is rendered from its confusion matrix.
+"""
+import html
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.exception import CustomException
+from src.logger import logging
+
+
+class FoldCache:
+    """
+    Stratified K folds of (X_train, y_train). Training rows of each fold are
+    shuffled once, so a prefix of them is a random subsample (what successive
+    halving trains its early rounds on).
+    """
+
+    def __init__(self, y, n_splits=3, random_state=42):
+        from sklearn.model_selection import StratifiedKFold
+
+        self.y = np.asarray(y)
+        rng = np.random.RandomState(random_state)
+        self.splits = [
+            (rng.permutation(train_idx), valid_idx)
+            for train_idx, valid_idx in StratifiedKFold(n_splits, shuffle=True, random_state=random_state).split(
+                np.zeros(len(self.y)), self.y
+            )
+        ]
+        self._folds = {}
+
+    def __len__(self):
+        return len(self.splits)
+
+    @property
+    def min_train_rows(self):
+        return min(len(train_idx) for train_idx, _ in self.splits)
+
+    def fold(self, key, X, i):
+        """
+        Returns (X_train, y_train, X_valid, y_valid) of fold `i`, slicing X only
+        the first time a `key` (the name of X's feature set) asks for it.
+        """
+        if (key, i) not in self._folds:
+            train_idx, valid_idx = self.splits[i]
+            self._folds[key, i] = (_take_rows(X, train_idx), self.y[train_idx],
+                                   _take_rows(X, valid_idx), self.y[valid_idx])
+        return self._folds[key, i]
+
+    def folds(self, key, X):
+        return [self.fold(key, X, i) for i in range(len(self.splits))]
+
+
+def _take_rows(X, idx):
+    return X.iloc[idx] if isinstance(X, pd.DataFrame) else X[idx]
+
+
+def classification_metrics(y_true, y_pred, n_classes, seconds=None):
+    """
+    Accuracy, macro-F1, per-class recall ("recall_<code>") and the confusion
+    matrix (rows: true class, columns: predicted) of integer-coded labels, all
+    from one confusion matrix. With `seconds` (the predict time) also the
+    predict latency in microseconds per row.
+    """
+    y_true = np.asarray(y_true, dtype=np.int64).reshape(-1)
+    # CatBoost predicts an (n, 1) column
+    y_pred = np.asarray(y_pred, dtype=np.int64).reshape(-1)
+    n_classes = max(n_classes, int(y_true.max(initial=-1)) + 1, int(y_pred.max(initial=-1)) + 1)
+    confusion = np.bincount(y_true * n_classes + y_pred, minlength=n_classes ** 2).reshape(n_classes, n_classes)
+    hits = np.diag(confusion).astype(np.float64)
+    support, predicted = confusion.sum(1), confusion.sum(0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        recall = np.where(support > 0, hits / support, np.nan)
+        precision = np.where(predicted > 0, hits / predicted, 0.0)
+        f1 = np.where(precision + np.nan_to_num(recall) > 0,
+                      2 * precision * recall / (precision + recall), 0.0)
+    present = support > 0
+    metrics = {
+        "accuracy": float(hits.sum() / max(len(y_true), 1)),
+        "macro_f1": float(f1[present].mean()) if present.any() else float("nan"),
+        **{f"recall_{code}": float(recall[code]) for code in range(n_classes)},
+        "confusion": confusion.tolist(),
+    }
+    if seconds is not None:
+        metrics["predict_us_per_row"] = seconds / max(len(y_true), 1) * 1e6
+    return metrics
+
+
+def prediction_metrics(estimator, X, y, n_classes=None):
+    """
+    Predicts X once, timed, and returns classification_metrics for it. Takes
+    GridSearchCV's scoring-callable arguments; the confusion matrix is left out
+    when called that way (n_classes None), since scores must be numbers.
+    """
+    start = time.perf_counter()
+    y_pred = estimator.predict(X)
+    seconds = time.perf_counter() - start
+    metrics = classification_metrics(y, y_pred, n_classes or 0, seconds)
+    if n_classes is None:
+        metrics.pop("confusion")
+    return metrics
+
+
+def mean_metrics(fold_metrics):
+    """
+    Fold-averaged metrics (confusion matrices summed) of a list of
+    classification_metrics dicts; None for an empty list.
+    """
+    if not fold_metrics:
+        return None
+    summary = {}
+    for name in fold_metrics[0]:
+        values = [m[name] for m in fold_metrics if name in m]
+        if name == "confusion":
+            summary[name] = np.sum([np.asarray(v) for v in values], axis=0).tolist()
+        else:
+            summary[name] = float(np.nanmean(values)) if not np.all(np.isnan(values)) else float("nan")
+            summary[f"{name}_std"] = float(np.nanstd(values)) if not np.all(np.isnan(values)) else float("nan")
+    summary["folds"] = len(fold_metrics)
+    return summary
+
+
+@dataclass
+class ModelEvaluationConfig:
+    leaderboard_json_path: str = os.path.join("artifacts", "leaderboard.json")
+    leaderboard_html_path: str = os.path.join("artifacts", "leaderboard.html")
+    # Class whose recall gets its own leaderboard column (missing a severe accident costs most)
+    positive_class: str = "High"
+    # Models within this much of the best test accuracy compete on predict latency...
+    accuracy_tolerance: float = 0.005
+    # ...but must predict at least this many times faster than the most accurate model
+    min_speedup: float = 1.5
+    # Optional latency budget: slower models are only served when nothing meets it
+    max_predict_us_per_row: float = None
+
+
+class ModelEvaluator:
+    def __init__(self, config: ModelEvaluationConfig = None):
+        self.model_evaluation_config = config or ModelEvaluationConfig()
+
+    def build_leaderboard(self, model_report, class_names=None, features=None):
+        """
+        One row per model of an evaluate_models report: held-out test metrics,
+        fold-averaged cross-validation metrics and fit time. `features` maps
+        model name -> feature layout label. Rows are sorted best first (see
+        select_best); the first row is the model to serve.
+        """
+        config = self.model_evaluation_config
+        names = [str(c) for c in class_names] if class_names is not None else None
+        positive = names.index(config.positive_class) if names and config.positive_class in names else None
+
+        rows = []
+        for name, (_, _, fit_seconds, evaluation) in model_report.items():
+            test, cv = evaluation.get("test") or {}, evaluation.get("cv") or {}
+            row = {
+                "model": name,
+                "features": (features or {}).get(name),
+                "accuracy": test.get("accuracy"),
+                "macro_f1": test.get("macro_f1"),
+                "positive_recall": test.get(f"recall_{positive}") if positive is not None else None,
+                "predict_us_per_row": test.get("predict_us_per_row"),
+                "fit_seconds": float(fit_seconds),
+                "cv_accuracy": cv.get("accuracy"),
+                "cv_accuracy_std": cv.get("accuracy_std"),
+                "cv_macro_f1": cv.get("macro_f1"),
+                "cv_positive_recall": cv.get(f"recall_{positive}") if positive is not None else None,
+                "cv_predict_us_per_row": cv.get("predict_us_per_row"),
+                "cv_rows": evaluation.get("cv_rows"),
+                "confusion": test.get("confusion"),
+            }
+            # NaN (e.g. recall of a class missing from a fold) is not valid JSON
+            rows.append({key: None if isinstance(value, float) and np.isnan(value) else value
+                         for key, value in row.items()})
+        return self.select_best(rows)
+
+    def select_best(self, rows):
+        """
+        Orders leaderboard rows for serving. The most accurate model within the
+        latency budget is served, unless a model within `accuracy_tolerance` of
+        its accuracy predicts at least `min_speedup` times faster; then the
+        fastest such model is. The other rows follow by accuracy, models over
+        the budget last.
+        """
+        config = self.model_evaluation_config
+
+        def latency(row):
+            value = row["predict_us_per_row"]
+            return np.inf if value is None else value
+
+        def by_accuracy(row):
+            return -row["accuracy"], latency(row)
+
+        budget = config.max_predict_us_per_row
+        within_budget = sorted((row for row in rows if budget is None or latency(row) <= budget), key=by_accuracy)
+        over_budget = sorted((row for row in rows if budget is not None and latency(row) > budget), key=by_accuracy)
+        candidates = within_budget or over_budget
+        best = candidates[0]
+        faster = [row for row in candidates
+                  if row["accuracy"] >= best["accuracy"] - config.accuracy_tolerance
+                  and latency(row) * config.min_speedup <= latency(best)]
+        served = min(faster, key=latency) if faster else best
+        ordered = [served] + [row for row in within_budget + over_budget if row is not served]
+        for rank, row in enumerate(ordered, start=1):
+            row["rank"] = rank
+        return ordered
+
+    def write_leaderboard(self, rows, class_names=None, extra=None):
+        """
+        Writes the leaderboard as JSON and as a standalone HTML table; returns
+        the two paths.
+        """
+        config = self.model_evaluation_config
+        document = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "positive_class": config.positive_class,
+            "classes": None if class_names is None else [str(c) for c in class_names],
+            "selection": {
+                "accuracy_tolerance": config.accuracy_tolerance,
+                "min_speedup": config.min_speedup,
+                "max_predict_us_per_row": config.max_predict_us_per_row,
+            },
+            **(extra or {}),
+            "leaderboard": rows,
+        }
+        for path in (config.leaderboard_json_path, config.leaderboard_html_path):
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(config.leaderboard_json_path, "w") as f:
+            json.dump(document, f, indent=2, default=_json_default)
+        with open(config.leaderboard_html_path, "w") as f:
+            f.write(self.render_html(document))
+        return config.leaderboard_json_path, config.leaderboard_html_path
+
+    @staticmethod
+    def render_html(document):
+        positive = html.escape(str(document["positive_class"]))
+        columns = [
+            ("rank", "#", "{:d}"), ("model", "model", "{}"), ("features", "features", "{}"),
+            ("accuracy", "accuracy", "{:.4f}"), ("macro_f1", "macro F1", "{:.4f}"),
+            ("positive_recall", f"recall ({positive})", "{:.4f}"),
+            ("predict_us_per_row", "predict &micro;s/row", "{:.2f}"), ("fit_seconds", "fit s", "{:.2f}"),
+            ("cv_accuracy", "CV accuracy", "{:.4f}"), ("cv_macro_f1", "CV macro F1", "{:.4f}"),
+            ("cv_positive_recall", f"CV recall ({positive})", "{:.4f}"),
+        ]
+
+        def cell(row, key, fmt):
+            value = row.get(key)
+            if value is None or (isinstance(value, float) and np.isnan(value)):
+                return "&ndash;"
+            return html.escape(fmt.format(value)) if fmt == "{}" else fmt.format(value)
+
+        header = "".join(f"<th>{label}</th>" for _, label, _ in columns)
+        served = ' class="served"'
+        body = "\n".join(
+            f"<tr{served if row['rank'] == 1 else ''}>"
+            + "".join(f"<td>{cell(row, key, fmt)}</td>" for key, _, fmt in columns) + "</tr>"
+            for row in document["leaderboard"]
+        )
+        selection = document["selection"]
+        budget = selection["max_predict_us_per_row"]
+        return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Model leaderboard</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; }}
+th, td {{ border: 1px solid #ccc; padding: 4px 10px; text-align: right; }}
+td:nth-child(2), td:nth-child(3) {{ text-align: left; }}
+tr.served {{ background: #e6f4ea; font-weight: bold; }}
+</style></head><body>
+<h1>Model leaderboard</h1>
+<p>Generated {html.escape(document["created"])}. The highlighted model is served: the most accurate
+model{"" if budget is None else f" under {budget:.2f} &micro;s/row"}, or the fastest model within
+{selection["accuracy_tolerance"]:.4f} of its test accuracy that predicts at least {selection["min_speedup"]:g} times faster.</p>
+<table>
+<tr>{header}</tr>
+{body}
+</table></body></html>
+"""
+
+    def initiate_model_evaluation(self, model_report, class_names=None, features=None, extra=None):
+        """
+        Builds, logs and writes the leaderboard of an evaluate_models report;
+        returns its rows, the model to serve first.
+        """
+        try:
+            rows = self.build_leaderboard(model_report, class_names, features)
+            for row in rows:
+                logging.info(f"Leaderboard #{row['rank']} {row['model']}: accuracy {row['accuracy']:.4f}, "
+                             f"predict {row['predict_us_per_row'] or float('nan'):.2f} us/row")
+            json_path, html_path = self.write_leaderboard(rows, class_names, extra)
+            logging.info(f"Leaderboard written to {json_path} and {html_path}")
+            return rows
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @staticmethod
+    def format_leaderboard(rows, positive_class="High"):
+        lines = [
+            "Model leaderboard (served model first):",
+            f"  {'#':>2} {'model':<32} {'features':<16} {'accuracy':>8} {'macro F1':>8} "
+            f"{'recall ' + positive_class:>11} {'us/row':>8} {'fit s':>8} {'CV acc':>7}",
+        ]
+
+        def number(value, width, digits):
+            return f"{'-':>{width}}" if value is None or value != value else f"{value:{width}.{digits}f}"
+
+        for row in rows:
+            lines.append(
+                f"  {row['rank']:>2} {row['model']:<32} {str(row['features']):<16} "
+                f"{number(row['accuracy'], 8, 4)} {number(row['macro_f1'], 8, 4)} "
+                f"{number(row['positive_recall'], 11, 4)} {number(row['predict_us_per_row'], 8, 2)} "
+                f"{number(row['fit_seconds'], 8, 2)} {number(row['cv_accuracy'], 7, 4)}"
+            )
+        return "\n".join(lines)
+
+
+def format_classification_report(confusion, class_names=None, digits=2):
+    """
+    The table of sklearn's classification_report, rendered from a confusion
+    matrix instead of from the predictions.
+    """
+    confusion = np.asarray(confusion, dtype=np.float64)
+    names = [str(c) for c in class_names] if class_names is not None else [str(i) for i in range(len(confusion))]
+    hits, support, predicted = np.diag(confusion), confusion.sum(1), confusion.sum(0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, hits / predicted, 0.0)
+        recall = np.where(support > 0, hits / support, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    total = support.sum()
+    width = max(len(name) for name in names + ["weighted avg"])
+    lines = [f"{'':>{width}} {'precision':>9} {'recall':>9} {'f1-score':>9} {'support':>9}", ""]
+    for i, name in enumerate(names):
+        lines.append(f"{name:>{width}} {precision[i]:9.{digits}f} {recall[i]:9.{digits}f} "
+                     f"{f1[i]:9.{digits}f} {int(support[i]):9d}")
+    lines.append("")
+    lines.append(f"{'accuracy':>{width}} {'':>9} {'':>9} {hits.sum() / max(total, 1):9.{digits}f} {int(total):9d}")
+    for label, weights in (("macro avg", np.ones_like(support)), ("weighted avg", support)):
+        w = weights / max(weights.sum(), 1)
+        lines.append(f"{label:>{width}} {(precision * w).sum():9.{digits}f} {(recall * w).sum():9.{digits}f} "
+                     f"{(f1 * w).sum():9.{digits}f} {int(total):9d}")
+    return "\n".join(lines)
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
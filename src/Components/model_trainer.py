@@ -1,97 +1,288 @@
+import json
 import os
 import sys
 from dataclasses import dataclass
 
-from catboost import CatBoostClassifier
-from sklearn.ensemble import (
-    AdaBoostClassifier,
-    GradientBoostingClassifier,
-    RandomForestClassifier,
-)
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import accuracy_score, classification_report
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.tree import DecisionTreeClassifier
-from xgboost import XGBClassifier
-
 from src.exception import CustomException
-from src.logger import logging
-from src.utils import save_object, evaluate_models
+from src.logger import logging, set_stage_rows, timed_stage
+from src.dtypes import CATEGORICAL_FEATURES
+from src.utils import as_model_input, load_object, save_artifact, save_object, evaluate_models
+from src.Components.model_evaluation import ModelEvaluator, format_classification_report
+from src.Components.packed_forest import pack_model, verify_packed
+from src.Pipeline.inference_model import InferenceModel
+from src.Pipeline.input_schema import InputSchema
+
+
+# Feature layout each candidate is trained and served on (see src.utils.as_model_input).
+# Linear models and XGBoost consume CSR natively; sklearn trees, boosting, KNN and
+# CatBoost convert sparse input to dense internally, so they get dense float32 directly.
+# "native" models take the integer-coded categorical frames of
+# DataTransformation.initiate_native_transformation instead of the one-hot matrix.
+MODEL_INPUT_FORMATS = {
+    "Random Forest": "dense",
+    "Decision Tree": "dense",
+    "Gradient Boosting": "dense",
+    "Logistic Regression": "csr",
+    "SGD Classifier": "csr",
+    "XGBClassifier": "csr",
+    "CatBoostClassifier": "dense",
+    "AdaBoostClassifier": "dense",
+    "KNeighborsClassifier": "dense",
+    "HistGradientBoosting": "dense",
+    "LightGBM": "csr",
+    "XGBClassifier (native)": "native",
+    "CatBoostClassifier (native)": "native",
+    "HistGradientBoosting (native)": "native",
+    "LightGBM (native)": "native",
+}
+NATIVE_FORMAT = "native"
 
 
 @dataclass
 class ModelTrainerConfig:
-    trained_model_file_path = os.path.join("artifacts", "model.pkl")
+    trained_model_file_path: str = os.path.join("artifacts", "model.pkl")
+    # Which preprocessor, input format and label encoder model.pkl goes with, for
+    # PredictPipeline's fallback when no fused artifact exists
+    trained_model_metadata_file_path: str = os.path.join("artifacts", "model.json")
+    # Preprocessor + model fused into the single artifact PredictPipeline loads;
+    # an artifact directory (manifest + memory-mappable payload, see save_artifact)
+    inference_model_file_path: str = os.path.join("artifacts", "inference_model")
+    # Store tree ensembles in the served artifact as flat arrays, which serving and
+    # batch-scoring workers share via mmap (sklearn's pickled trees are copied into
+    # every process). model.pkl keeps the sklearn model: sklearn's predict_proba is
+    # about twice as fast on large batches of a big forest, so a single process
+    # scoring large batches can serve it with PredictPipelineConfig(inference_model_path=None)
+    pack_trees: bool = True
+    # Model search: "halving" shares one worker pool across all models and
+    # prunes weak configurations early; "grid" is one GridSearchCV per model
+    search: str = "halving"
+    n_jobs: int = -1
+    # Optional wall-clock / CPU-seconds budgets for the halving search
+    time_budget: float = None
+    cpu_budget: float = None
+
+    def search_settings(self):
+        """
+        The settings that change search results, which the model report cache
+        is keyed on; output paths and tree packing do not.
+        """
+        return {"search": self.search, "n_jobs": self.n_jobs,
+                "time_budget": self.time_budget, "cpu_budget": self.cpu_budget}
 
 
 class ModelTrainer:
     def __init__(self):
         self.model_trainer_config = ModelTrainerConfig()
 
-    def initiate_model_trainer(self, train_array, test_array):
+    def get_model_candidates(self):
+        """
+        Returns the candidate models and their hyperparameter grids. The model
+        libraries are imported here rather than at module level, so importing
+        this module (e.g. for MODEL_INPUT_FORMATS) stays cheap.
+        """
+        from catboost import CatBoostClassifier
+        from sklearn.ensemble import (
+            AdaBoostClassifier,
+            GradientBoostingClassifier,
+            HistGradientBoostingClassifier,
+            RandomForestClassifier,
+        )
+        from sklearn.linear_model import LogisticRegression, SGDClassifier
+        from sklearn.neighbors import KNeighborsClassifier
+        from sklearn.tree import DecisionTreeClassifier
+        from xgboost import XGBClassifier
+
         try:
-            logging.info("Splitting training and test input data")
-            X_train, y_train, X_test, y_test = (
-                train_array[:, :-1],
-                train_array[:, -1],
-                test_array[:, :-1],
-                test_array[:, -1],
-            )
+            # Optional: LightGBM candidates are skipped when it is not installed
+            from lightgbm import LGBMClassifier
+        except ImportError:  # pragma: no cover
+            LGBMClassifier = None
 
-            models = {
-                "Random Forest": RandomForestClassifier(),
-                "Decision Tree": DecisionTreeClassifier(),
-                "Gradient Boosting": GradientBoostingClassifier(),
-                "Logistic Regression": LogisticRegression(),
-                "XGBClassifier": XGBClassifier(),
-                "CatBoostClassifier": CatBoostClassifier(verbose=False),
-                "AdaBoostClassifier": AdaBoostClassifier(),
-                "KNeighborsClassifier": KNeighborsClassifier(),
-            }
-
-            params = {
-                "Decision Tree": {
-                    "criterion": ["gini", "entropy"],
-                    "max_depth": [5, 10, 20],
-                },
-                "Random Forest": {
-                    "n_estimators": [50, 100, 200],
-                    "max_depth": [5, 10, 20],
-                },
-                "Gradient Boosting": {
-                    "learning_rate": [0.01, 0.05, 0.1],
-                    "n_estimators": [50, 100, 200],
-                },
-                "Logistic Regression": {},
-                "XGBClassifier": {
-                    "learning_rate": [0.01, 0.05, 0.1],
-                    "n_estimators": [50, 100, 200],
-                },
-                "CatBoostClassifier": {
-                    "depth": [6, 8, 10],
-                    "learning_rate": [0.01, 0.05, 0.1],
-                    "iterations": [50, 100],
-                },
-                "AdaBoostClassifier": {
-                    "learning_rate": [0.01, 0.05, 0.1],
-                    "n_estimators": [50, 100, 200],
-                },
-                "KNeighborsClassifier": {"n_neighbors": [3, 5, 7]},
-            }
-
-            model_report = evaluate_models(
-                X_train=X_train,
-                y_train=y_train,
-                X_test=X_test,
-                y_test=y_test,
-                models=models,
-                param=params,
-            )
+        models = {
+            "Random Forest": RandomForestClassifier(),
+            "Decision Tree": DecisionTreeClassifier(),
+            "Gradient Boosting": GradientBoostingClassifier(),
+            "Logistic Regression": LogisticRegression(),
+            # Logistic loss fitted by SGD: the linear candidate that supports partial_fit
+            "SGD Classifier": SGDClassifier(loss="log_loss"),
+            "XGBClassifier": XGBClassifier(),
+            "CatBoostClassifier": CatBoostClassifier(verbose=False),
+            "AdaBoostClassifier": AdaBoostClassifier(),
+            "KNeighborsClassifier": KNeighborsClassifier(),
+            "HistGradientBoosting": HistGradientBoostingClassifier(),
+            # Native categorical path: split on the integer-coded columns directly
+            "XGBClassifier (native)": XGBClassifier(enable_categorical=True, tree_method="hist"),
+            # A tuple, because sklearn's clone rejects the list copy CatBoost makes of a list
+            "CatBoostClassifier (native)": CatBoostClassifier(verbose=False, cat_features=CATEGORICAL_FEATURES),
+            "HistGradientBoosting (native)": HistGradientBoostingClassifier(categorical_features="from_dtype"),
+        }
+        if LGBMClassifier is not None:
+            models["LightGBM"] = LGBMClassifier(verbose=-1)
+            models["LightGBM (native)"] = LGBMClassifier(verbose=-1)
+
+        params = {
+            "Decision Tree": {
+                "criterion": ["gini", "entropy"],
+                "max_depth": [5, 10, 20],
+            },
+            "Random Forest": {
+                "n_estimators": [50, 100, 200],
+                "max_depth": [5, 10, 20],
+            },
+            "Gradient Boosting": {
+                "learning_rate": [0.01, 0.05, 0.1],
+                "n_estimators": [50, 100, 200],
+            },
+            "Logistic Regression": {},
+            "SGD Classifier": {"alpha": [1e-5, 1e-4, 1e-3]},
+            "XGBClassifier": {
+                "learning_rate": [0.01, 0.05, 0.1],
+                "n_estimators": [50, 100, 200],
+            },
+            "CatBoostClassifier": {
+                "depth": [6, 8, 10],
+                "learning_rate": [0.01, 0.05, 0.1],
+                "iterations": [50, 100],
+            },
+            "AdaBoostClassifier": {
+                "learning_rate": [0.01, 0.05, 0.1],
+                "n_estimators": [50, 100, 200],
+            },
+            "KNeighborsClassifier": {"n_neighbors": [3, 5, 7]},
+            "HistGradientBoosting": {
+                "learning_rate": [0.05, 0.1],
+                "max_iter": [100, 200],
+            },
+            "LightGBM": {
+                "learning_rate": [0.05, 0.1],
+                "n_estimators": [100, 200],
+            },
+        }
+        # Native variants search the same grids as their one-hot counterparts
+        for name in models:
+            if name.endswith(" (native)"):
+                params[name] = params[name[:-len(" (native)")]]
+
+        return models, params
+
+    def export_model(self, model, X_check):
+        """
+        Returns the model to serve: tree ensembles packed into flat arrays (checked
+        against the fitted model on `X_check`), anything else unchanged.
+        """
+        if not self.model_trainer_config.pack_trees:
+            return model
+        packed = pack_model(model)
+        if packed is not model:
+            verify_packed(model, packed, X_check[:2000])
+            logging.info(f"Packed {type(model).__name__} into {packed.n_estimators} flat-array trees")
+        return packed
+
+    def save_model_metadata(self, model_name, input_format, preprocessor_path, label_encoder_path):
+        """
+        Writes the JSON sidecar of model.pkl: the preprocessor and input format
+        it was trained on, so the model is never paired with another one.
+        """
+        path = self.model_trainer_config.trained_model_metadata_file_path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "model": model_name,
+                "input_format": input_format,
+                "preprocessor_path": preprocessor_path,
+                "label_encoder_path": label_encoder_path,
+            }, f, indent=2)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def feature_label(name):
+        fmt = MODEL_INPUT_FORMATS.get(name)
+        return "native" if fmt == NATIVE_FORMAT else f"one-hot ({fmt})"
+
+    @timed_stage("model_trainer")
+    def initiate_model_trainer(self, X_train, y_train, X_test, y_test, preprocessor_path=None,
+                               label_encoder_path=None, model_cache=None, native_features=None,
+                               input_schema_path=None):
+        """
+        Searches every candidate model, saves the best one and returns a text report.
+
+        Takes the outputs of DataTransformation.initiate_data_transformation:
+        feature matrices (dense or CSR) and integer-coded targets. With
+        `label_encoder_path`, the saved inference model decodes predictions
+        back to the original labels.
+
+        `input_schema_path` is the InputSchema JSON written by DataTransformation;
+        it is saved in the inference artifact for request validation.
 
-            # Select best model
-            best_model_name, (best_model, best_model_score) = max(
-                model_report.items(), key=lambda x: x[1][1]
+        `native_features` is the (train frame, test frame, preprocessor path)
+        triple of DataTransformation.initiate_native_transformation; without it
+        the native-categorical candidates are skipped.
+
+        `model_cache` is an optional object with load(name, model, grid) -> report
+        entry or None and store(name, model, grid, entry); models with a cached
+        entry are not searched again (see TrainPipeline).
+        """
+        try:
+            set_stage_rows(X_train.shape[0])
+
+            models, params = self.get_model_candidates()
+            feature_sets = {}
+            if native_features is None:
+                models = {name: model for name, model in models.items()
+                          if MODEL_INPUT_FORMATS.get(name) != NATIVE_FORMAT}
+            else:
+                native_train, native_test, native_preprocessor_path = native_features
+                feature_sets[NATIVE_FORMAT] = (native_train, native_test)
+
+            model_report = {}
+            pending = dict(models)
+            if model_cache is not None:
+                for name, model in models.items():
+                    entry = model_cache.load(name, model, params.get(name, {}))
+                    if entry is not None:
+                        model_report[name] = entry
+                        del pending[name]
+                logging.info(f"Model cache: {len(model_report)} hits, {len(pending)} models to search")
+
+            if pending:
+                searched = evaluate_models(
+                    X_train=X_train,
+                    y_train=y_train,
+                    X_test=X_test,
+                    y_test=y_test,
+                    models=pending,
+                    param=params,
+                    search=self.model_trainer_config.search,
+                    n_jobs=self.model_trainer_config.n_jobs,
+                    time_budget=self.model_trainer_config.time_budget,
+                    cpu_budget=self.model_trainer_config.cpu_budget,
+                    input_formats=MODEL_INPUT_FORMATS,
+                    feature_sets=feature_sets,
+                )
+                if model_cache is not None:
+                    for name, entry in searched.items():
+                        model_cache.store(name, models[name], params.get(name, {}), entry)
+                model_report.update(searched)
+            # Keep the report in candidate order, whichever entries came from the cache
+            model_report = {name: model_report[name] for name in models}
+
+            for name, (_, score, fit_seconds, _) in model_report.items():
+                logging.info(f"Model report - {name}: score {score:.4f}, fit time {fit_seconds:.2f}s")
+
+            label_encoder = load_object(label_encoder_path) if label_encoder_path is not None else None
+            class_names = None if label_encoder is None else label_encoder.classes_
+
+            # Leaderboard of test and cross-validation metrics; its first row is the
+            # model to serve (the fastest of the near-best models)
+            evaluator = ModelEvaluator()
+            leaderboard = evaluator.initiate_model_evaluation(
+                model_report, class_names,
+                features={name: self.feature_label(name) for name in model_report},
+                extra={"train_rows": int(X_train.shape[0]), "test_rows": int(X_test.shape[0])},
             )
+            best_model_name = leaderboard[0]["model"]
+            best_model, best_model_score, _, best_evaluation = model_report[best_model_name]
 
             if best_model_score < 0.6:
                 raise CustomException(
@@ -102,18 +293,54 @@ class ModelTrainer:
                 f"Best model found: {best_model_name} with score {best_model_score:.2f}"
             )
 
+            input_format = MODEL_INPUT_FORMATS.get(best_model_name)
+            X_test_best = (feature_sets[input_format][1] if input_format in feature_sets
+                           else as_model_input(X_test, input_format))
+
+            # Native-categorical models are trained on the native preprocessor's features
+            model_preprocessor_path = native_preprocessor_path if input_format == NATIVE_FORMAT else preprocessor_path
+
             # Save best trained model
             save_object(
                 file_path=self.model_trainer_config.trained_model_file_path,
                 obj=best_model,
             )
+            self.save_model_metadata(best_model_name, input_format, model_preprocessor_path, label_encoder_path)
+
+            if preprocessor_path is not None:
+                logging.info(
+                    f"Saving fused inference model to {self.model_trainer_config.inference_model_file_path}"
+                )
+                inference_model = InferenceModel(
+                    preprocessor=load_object(model_preprocessor_path),
+                    model=self.export_model(best_model, X_test_best),
+                    classes=class_names,
+                    input_format=input_format,
+                    schema=InputSchema.load(input_schema_path) if input_schema_path is not None else None,
+                )
+                save_artifact(
+                    self.model_trainer_config.inference_model_file_path,
+                    inference_model,
+                    manifest={
+                        **inference_model.describe(),
+                        "metrics": {
+                            "model": best_model_name,
+                            "test_accuracy": best_model_score,
+                            "train_rows": int(X_train.shape[0]),
+                            "test_rows": int(X_test.shape[0]),
+                            "model_scores": {name: score for name, (_, score, _, _) in model_report.items()},
+                            "leaderboard": leaderboard,
+                        },
+                    },
+                )
 
-            # Evaluate on test
-            y_pred = best_model.predict(X_test)
-            accuracy = accuracy_score(y_test, y_pred)
-            report = classification_report(y_test, y_pred)
+            # The classification report comes from the confusion matrix of the
+            # search's test pass; the model is not run on the test set again
+            report = format_classification_report(best_evaluation["test"]["confusion"], class_names)
+            positive_class = evaluator.model_evaluation_config.positive_class
 
-            return f"Model: {best_model_name}\nAccuracy: {accuracy:.2f}\n\n{report}"
+            return (f"Model: {best_model_name}\nAccuracy: {best_model_score:.2f}\n\n{report}\n\n"
+                    f"{evaluator.format_leaderboard(leaderboard, positive_class)}")
 
         except Exception as e:
             raise CustomException(e, sys)
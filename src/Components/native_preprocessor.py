@@ -0,0 +1,98 @@
+"""Native-categorical feature path for histogram / gradient-boosting models.
+
+The one-hot path turns seven categorical columns into ~30 scaled indicator
+columns. XGBoost (enable_categorical), CatBoost (cat_features), LightGBM and
+HistGradientBoostingClassifier (categorical_features="from_dtype") can split on a
+categorical column directly, so for them NativeCategoricalEncoder emits:
+
+    numeric column  : median-imputed, unscaled (tree splits do not need scaling)
+    categorical col : pandas Categorical of integer codes 0..k-1 for the learned
+                      categories; missing values take the most frequent category
+                      (as in the one-hot path) and unseen values take code k
+"""
+import numpy as np
+import pandas as pd
+
+from src.Components.compiled_preprocessor import categorical_codes
+
+
+class NativeCategoricalEncoder:
+    """
+    Fits per-column category tables and returns DataFrames with integer-coded
+    categorical columns that the native-categorical models consume as-is.
+    """
+
+    def __init__(self, numerical_columns, categorical_columns):
+        self.numerical_columns = list(numerical_columns)
+        self.categorical_columns = list(categorical_columns)
+
+    def fit(self, X: pd.DataFrame, y=None):
+        self.medians = X[self.numerical_columns].median().to_numpy(dtype=np.float64)
+        self.categories = []
+        self.fill_values = []
+        for column in self.categorical_columns:
+            values = X[column].dropna()
+            self.categories.append(np.asarray(sorted(values.unique()), dtype=object))
+            self.fill_values.append(values.mode().iloc[0])
+        self._build_lookups()
+        return self
+
+    def _build_lookups(self):
+        self._indexes = [pd.Index(cats) for cats in self.categories]
+        self._lookups = [{cat: i for i, cat in enumerate(cats)} for cats in self.categories]
+        # Code k (one past the learned categories) marks values unseen at fit time
+        self._dtypes = [pd.CategoricalDtype(range(len(cats) + 1)) for cats in self.categories]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ("_indexes", "_lookups", "_dtypes"):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._build_lookups()
+
+    def transform(self, X: pd.DataFrame) -> pd.DataFrame:
+        out = {}
+        num = X[self.numerical_columns].to_numpy(dtype=np.float64)
+        num = np.where(np.isnan(num), self.medians, num)
+        for j, column in enumerate(self.numerical_columns):
+            out[column] = num[:, j]
+        for column, index, fill, dtype in zip(self.categorical_columns, self._indexes, self.fill_values, self._dtypes):
+            if isinstance(X[column].dtype, pd.CategoricalDtype):
+                codes = categorical_codes(X[column], index, fill)
+            else:
+                values = X[column].to_numpy(dtype=object)
+                values = np.where(pd.isna(values), fill, values)
+                codes = index.get_indexer(values)
+            codes[codes < 0] = len(index)
+            out[column] = pd.Categorical.from_codes(codes, dtype=dtype)
+        return pd.DataFrame(out, index=X.index)
+
+    def fit_transform(self, X: pd.DataFrame, y=None) -> pd.DataFrame:
+        return self.fit(X).transform(X)
+
+    def transform_record(self, record) -> pd.DataFrame:
+        """
+        Transforms one {column: value} mapping into a one-row frame, without
+        building the input DataFrame first.
+        """
+        out = {}
+        for j, column in enumerate(self.numerical_columns):
+            x = record.get(column)
+            out[column] = [self.medians[j] if x is None or x != x else float(x)]
+        for column, lookup, fill, dtype in zip(self.categorical_columns, self._lookups, self.fill_values, self._dtypes):
+            value = record.get(column)
+            value = fill if value is None or value != value else value
+            out[column] = pd.Categorical.from_codes([lookup.get(value, len(lookup))], dtype=dtype)
+        return pd.DataFrame(out)
+
+    def get_categories(self):
+        """
+        Returns {categorical column: list of categories learned at fit time}.
+        """
+        return {c: list(cats) for c, cats in zip(self.categorical_columns, self.categories)}
+
+    def get_feature_names_out(self):
+        return np.asarray(self.numerical_columns + self.categorical_columns, dtype=object)
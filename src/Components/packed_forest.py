@@ -0,0 +1,180 @@
+"""Packs fitted sklearn tree models into flat NumPy arrays for memory-mapped serving.
+
+sklearn keeps each fitted tree in a Cython `Tree` whose unpickling copies the node
+arrays into private buffers, so a RandomForest loaded with
+`joblib.load(..., mmap_mode="r")` still costs every worker process a full private
+copy. PackedForestClassifier stores all trees of an ensemble as a handful of
+plain ndarrays instead:
+
+    children_left / children_right / feature / threshold / missing_go_left : per node
+    leaf_proba : per node class probabilities (only read at leaves)
+    roots      : index of each tree's root node
+
+Saved uncompressed with joblib (see src.utils.save_artifact) these arrays load as
+read-only memory maps, so N workers share one copy through the page cache.
+Prediction descends every tree for a block of rows at once.
+"""
+import numpy as np
+
+from src.utils import issparse
+
+# Rows descended together; bounds the (rows x trees) working arrays
+BLOCK_ROWS = 2048
+
+# sklearn's marker for "no child" in children_left / children_right
+TREE_LEAF = -1
+
+
+class PackedForestClassifier:
+    """
+    Array-backed equivalent of a fitted DecisionTree/RandomForest/ExtraTrees
+    classifier: predict_proba averages the per-tree leaf probabilities exactly
+    like the forest it was packed from.
+    """
+
+    def __init__(self, classes, n_features_in, children_left, children_right, feature,
+                 threshold, missing_go_left, leaf_proba, roots, source=None):
+        self.classes_ = np.asarray(classes)
+        self.n_features_in_ = int(n_features_in)
+        self.children_left = np.asarray(children_left, dtype=np.int32)
+        self.children_right = np.asarray(children_right, dtype=np.int32)
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.missing_go_left = np.asarray(missing_go_left, dtype=bool)
+        self.leaf_proba = np.asarray(leaf_proba, dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.int64)
+        # Class name of the estimator this was packed from, for the artifact manifest
+        self.source = source
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    def _as_array(self, X):
+        if issparse(X):
+            X = X.toarray()
+        # sklearn trees compare float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has shape {X.shape}, expected (n, {self.n_features_in_})")
+        return X
+
+    def _apply_block(self, X):
+        n_rows, n_trees = X.shape[0], len(self.roots)
+        node = np.tile(self.roots, n_rows)
+        row = np.repeat(np.arange(n_rows), n_trees)
+        has_missing = np.isnan(X).any()
+
+        active = np.flatnonzero(self.children_left[node] != TREE_LEAF)
+        while active.size:
+            current = node[active]
+            x = X[row[active], self.feature[current]]
+            go_left = x <= self.threshold[current]
+            if has_missing:
+                go_left = np.where(np.isnan(x), self.missing_go_left[current], go_left)
+            current = np.where(go_left, self.children_left[current], self.children_right[current])
+            node[active] = current
+            active = active[self.children_left[current] != TREE_LEAF]
+        return node.reshape(n_rows, n_trees)
+
+    def apply(self, X):
+        """
+        Returns the (n_rows, n_trees) array of leaf node indices reached by each row.
+        """
+        X = self._as_array(X)
+        return np.vstack([self._apply_block(X[start:start + BLOCK_ROWS])
+                          for start in range(0, max(len(X), 1), BLOCK_ROWS)])
+
+    def predict_proba(self, X):
+        X = self._as_array(X)
+        out = np.empty((len(X), len(self.classes_)), dtype=np.float64)
+        for start in range(0, len(X), BLOCK_ROWS):
+            leaves = self._apply_block(X[start:start + BLOCK_ROWS])
+            out[start:start + BLOCK_ROWS] = self.leaf_proba[leaves].sum(axis=1) / len(self.roots)
+        return out
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def score(self, X, y):
+        return float(np.mean(self.predict(X) == np.asarray(y)))
+
+
+def _trees(model):
+    # Only needed when packing; serving loads PackedForestClassifier without sklearn
+    from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+    from sklearn.tree import DecisionTreeClassifier, ExtraTreeClassifier
+
+    if isinstance(model, (DecisionTreeClassifier, ExtraTreeClassifier)):
+        return [model]
+    if isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)):
+        return list(model.estimators_)
+    return None
+
+
+def can_pack(model):
+    """
+    True for the single-output tree classifiers pack_model supports.
+    """
+    trees = _trees(model)
+    return trees is not None and getattr(model, "n_outputs_", 1) == 1
+
+
+def pack_model(model):
+    """
+    Packs a fitted tree classifier into a PackedForestClassifier. Any other
+    model is returned unchanged.
+    """
+    if not can_pack(model):
+        return model
+
+    children_left, children_right, feature, threshold, missing_go_left, leaf_proba, roots = \
+        [], [], [], [], [], [], []
+    offset = 0
+    for estimator in _trees(model):
+        tree = estimator.tree_
+        left, right = tree.children_left.copy(), tree.children_right.copy()
+        # Shift child indices into the shared node numbering; leaves keep the marker
+        left[left != TREE_LEAF] += offset
+        right[right != TREE_LEAF] += offset
+        children_left.append(left)
+        children_right.append(right)
+        feature.append(tree.feature)
+        threshold.append(tree.threshold)
+        missing = getattr(tree, "missing_go_to_left", None)
+        missing_go_left.append(np.zeros(tree.node_count, dtype=bool) if missing is None else missing.astype(bool))
+
+        # Per-tree predict_proba normalizes each leaf's class weights to sum to one
+        value = tree.value[:, 0, :]
+        normalizer = value.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+        leaf_proba.append(value / normalizer)
+
+        roots.append(offset)
+        offset += tree.node_count
+
+    return PackedForestClassifier(
+        classes=model.classes_,
+        n_features_in=model.n_features_in_,
+        children_left=np.concatenate(children_left),
+        children_right=np.concatenate(children_right),
+        feature=np.concatenate(feature),
+        threshold=np.concatenate(threshold),
+        missing_go_left=np.concatenate(missing_go_left),
+        leaf_proba=np.concatenate(leaf_proba),
+        roots=roots,
+        source=type(model).__name__,
+    )
+
+
+def verify_packed(model, packed, X, atol=1e-9):
+    """
+    Checks that `packed` reproduces `model.predict_proba` on `X` (up to float
+    summation order). Raises AssertionError on a mismatch.
+    """
+    if packed is model:
+        return
+    expected = model.predict_proba(X)
+    actual = packed.predict_proba(X)
+    if actual.shape != expected.shape or not np.allclose(actual, expected, rtol=0.0, atol=atol):
+        raise AssertionError(f"Packed {packed.source} differs from the fitted model's predict_proba")
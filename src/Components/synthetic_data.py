@@ -0,0 +1,365 @@
+"""Synthetic accident data in the raw Traffic_Accident_Severity_Dataset schema, at any size.
+
+SyntheticAccidentGenerator learns from the raw file:
+
+    categorical columns, Date, hour of day, coordinate cluster
+        joint frequencies as a Chow-Liu forest: each column is drawn from its
+        empirical distribution given the one column it shares the most mutual
+        information with. Only dependencies a G-test finds significant, on
+        tables with enough rows per cell, become edges (Time_of_Day <- hour on
+        the raw file); other columns are drawn from their marginal
+    Latitude, Longitude
+        a k-means Gaussian mixture: cluster means and full covariances, clipped
+        to the observed bounding box; minutes and seconds of Time are uniform
+        within the drawn hour
+    Severity
+        P(Severity | categorical columns, cluster) as a multinomial logit, which
+        reproduces the raw labels exactly and also covers combinations the raw
+        file never shows
+
+Sampling is vectorized NumPy (inverse-CDF lookups with searchsorted) and
+generate() streams `chunksize` rows at a time to CSV or Parquet, so the output
+never has to fit in memory. The same seed and chunksize give the same rows.
+
+Usage:
+    python -m src.Components.synthetic_data out.parquet [--rows 10000000] [--seed 0] [--chunksize 500000]
+"""
+import argparse
+import os
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Ensure project root is in sys.path for src imports
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.dtypes import CATEGORICAL_FEATURES, DATE_FORMAT, TIME_FORMAT, read_accidents
+from src.exception import CustomException
+from src.logger import logging, set_stage_rows, timed_stage
+
+CATEGORICAL_COLUMNS = list(CATEGORICAL_FEATURES)
+# Column order of the raw file
+RAW_COLUMNS = ["Date", "Time", *CATEGORICAL_COLUMNS, "Latitude", "Longitude", "Severity"]
+# Every "HH:MM:SS" of a day, indexed by second of day
+TIME_STRINGS = np.array([f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in range(86_400)], dtype=object)
+
+
+@dataclass
+class SyntheticDataConfig:
+    source_data_path: str = os.path.join(PROJECT_ROOT, "rawdata", "Traffic_Accident_Severity_Dataset.csv")
+    n_clusters: int = 16            # Gaussian components of the coordinate mixture
+    severity_c: float = 100.0       # Inverse regularization of the Severity logit; larger = closer to deterministic
+    dependency_alpha: float = 1e-4  # G-test significance a dependency between two columns needs
+    min_expected_count: float = 5.0  # Rows per joint-table cell a dependency needs to be estimated
+    chunksize: int = 500_000        # Rows generated and written per chunk
+    seed: int = 0
+
+
+def _kmeans(points, k, rng, iterations=50):
+    """
+    Lloyd's k-means with k-means++ seeding; returns the labels.
+    """
+    centers = [points[rng.integers(len(points))]]
+    for _ in range(1, k):
+        distance = np.min([((points - c) ** 2).sum(1) for c in centers], axis=0)
+        centers.append(points[rng.choice(len(points), p=distance / distance.sum())])
+    centers = np.array(centers)
+    labels = None
+    for _ in range(iterations):
+        new_labels = ((points[:, None, :] - centers[None]) ** 2).sum(2).argmin(1)
+        if labels is not None and np.array_equal(labels, new_labels):
+            break
+        labels = new_labels
+        for j in range(k):
+            if (labels == j).any():
+                centers[j] = points[labels == j].mean(0)
+    return labels
+
+
+def _cdf_table(counts):
+    """
+    Row-wise cumulative distributions of a counts table, each row offset by its
+    index so one searchsorted over the flattened table samples every row.
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    totals = counts.sum(1, keepdims=True)
+    probabilities = np.divide(counts, totals, out=np.full_like(counts, 1 / counts.shape[1]), where=totals > 0)
+    cdf = np.cumsum(probabilities, axis=1)
+    cdf[:, -1] = 1.0
+    return (cdf + np.arange(len(cdf))[:, None]).ravel()
+
+
+def _draw(cdf_table, n_levels, rows, rng):
+    """
+    One code per entry of `rows` from row `rows[i]` of a _cdf_table.
+    """
+    flat = np.searchsorted(cdf_table, rows + rng.random(len(rows)), side="right")
+    return np.minimum(flat - rows * n_levels, n_levels - 1)
+
+
+class SyntheticAccidentGenerator:
+    """
+    Learns the raw dataset's distributions (fit) and samples new rows from them.
+    """
+
+    def __init__(self, config: SyntheticDataConfig = None):
+        self.synthetic_data_config = config or SyntheticDataConfig()
+
+    def fit(self, df: pd.DataFrame):
+        """
+        Learns the generator from a raw-schema frame; returns self.
+        """
+        config = self.synthetic_data_config
+        rng = np.random.default_rng(config.seed)
+        df = df.dropna(subset=RAW_COLUMNS)
+
+        # Coordinate mixture on standardized coordinates
+        coordinates = df[["Latitude", "Longitude"]].to_numpy(dtype=np.float64)
+        center, spread = coordinates.mean(0), coordinates.std(0)
+        clusters = _kmeans((coordinates - center) / spread, min(config.n_clusters, len(df)), rng)
+        self.cluster_means, self.cluster_chols = [], []
+        for j in range(clusters.max() + 1):
+            members = coordinates[clusters == j]
+            covariance = np.cov(members.T) if len(members) > 2 else np.diag((spread / 10) ** 2)
+            self.cluster_means.append(members.mean(0))
+            self.cluster_chols.append(np.linalg.cholesky(covariance + np.eye(2) * 1e-12))
+        self.cluster_means, self.cluster_chols = np.array(self.cluster_means), np.array(self.cluster_chols)
+        self.bounds = (coordinates.min(0), coordinates.max(0))
+
+        # Discrete columns of the forest, as integer codes
+        dates = pd.to_datetime(df["Date"].astype(str), format=DATE_FORMAT, errors="coerce")
+        hours = pd.to_datetime(df["Time"].astype(str), format=TIME_FORMAT, errors="coerce").dt.hour
+        keep = dates.notna().to_numpy() & hours.notna().to_numpy()
+        if not keep.any():
+            raise ValueError("No rows with a parseable Date and Time to fit the synthetic data generator on")
+        columns = {column: df[column].astype(str) for column in CATEGORICAL_COLUMNS}
+        columns["Date"] = dates.dt.strftime(DATE_FORMAT)
+        columns["Hour"] = hours
+        columns["Cluster"] = pd.Series(clusters, index=df.index)
+        self.nodes = list(columns)
+        self.levels, codes = {}, {}
+        for node, values in columns.items():
+            node_codes, uniques = pd.factorize(values[keep], sort=True)
+            codes[node], self.levels[node] = node_codes, np.asarray(uniques, dtype=object)
+        self._fit_forest(codes)
+        self._fit_severity(codes, df["Severity"].astype(str).to_numpy()[keep])
+        self._build_tables()
+        return self
+
+    def _fit_forest(self, codes):
+        """
+        Chow-Liu forest: maximum spanning tree over the pairwise mutual
+        information, restricted to significant, well-populated dependencies.
+        """
+        from scipy.stats import chi2
+
+        config = self.synthetic_data_config
+        n = len(next(iter(codes.values())))
+        gain = {}
+        for i, a in enumerate(self.nodes):
+            for b in self.nodes[i + 1:]:
+                ka, kb = len(self.levels[a]), len(self.levels[b])
+                joint = np.bincount(codes[a] * kb + codes[b], minlength=ka * kb).reshape(ka, kb) / n
+                outer = joint.sum(1, keepdims=True) * joint.sum(0, keepdims=True)
+                nonzero = joint > 0
+                mutual_information = (joint[nonzero] * np.log(joint[nonzero] / outer[nonzero])).sum()
+                # G = 2 n MI is chi-squared under independence, if the table is not too sparse
+                significant = chi2.sf(2 * n * mutual_information, (ka - 1) * (kb - 1)) < config.dependency_alpha
+                populated = n / (ka * kb) >= config.min_expected_count
+                gain[a, b] = gain[b, a] = mutual_information if significant and populated else 0.0
+
+        # Prim's algorithm from every not-yet-reached node; parents point towards the roots
+        self.parents = {}
+        self.order = []
+        for root in self.nodes:
+            if root in self.order:
+                continue
+            self.order.append(root)
+            self.parents[root] = None
+            tree = [root]
+            while True:
+                candidates = [(gain[a, b], a, b) for a in tree for b in self.nodes
+                              if b not in self.order and gain[a, b] > 0]
+                if not candidates:
+                    break
+                _, parent, child = max(candidates)
+                self.parents[child] = parent
+                self.order.append(child)
+                tree.append(child)
+
+        self.counts = {}
+        for node in self.order:
+            parent, k = self.parents[node], len(self.levels[node])
+            if parent is None:
+                self.counts[node] = np.bincount(codes[node], minlength=k)[None, :]
+            else:
+                kp = len(self.levels[parent])
+                self.counts[node] = np.bincount(codes[parent] * k + codes[node], minlength=kp * k).reshape(kp, k)
+
+    def _fit_severity(self, codes, severity):
+        """
+        Multinomial logit of Severity on the one-hot categorical columns and
+        cluster, stored as one (levels x classes) logit table per column.
+        """
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.preprocessing import OneHotEncoder
+
+        self.severity_inputs = [*CATEGORICAL_COLUMNS, "Cluster"]
+        categories = [np.arange(len(self.levels[column])) for column in self.severity_inputs]
+        encoder = OneHotEncoder(categories=categories)
+        X = encoder.fit_transform(np.column_stack([codes[column] for column in self.severity_inputs]))
+        model = LogisticRegression(C=self.synthetic_data_config.severity_c, max_iter=5000).fit(X, severity)
+        self.severity_classes = np.asarray(model.classes_, dtype=object)
+        coefficients, intercept = model.coef_.T, model.intercept_
+        if len(self.severity_classes) == 2:
+            # Binary models keep one logit, for the second class; the first one's is 0
+            coefficients = np.hstack([np.zeros_like(coefficients), coefficients])
+            intercept = np.array([0.0, intercept[0]])
+        offsets = np.cumsum([0] + [len(c) for c in categories])
+        self.severity_tables = [coefficients[a:b] for a, b in zip(offsets[:-1], offsets[1:])]
+        self.severity_intercept = intercept
+
+    def _build_tables(self):
+        self._cdfs = {node: _cdf_table(counts) for node, counts in self.counts.items()}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_cdfs", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._build_tables()
+
+    def sample(self, n_rows, rng) -> pd.DataFrame:
+        """
+        `n_rows` new rows in the raw schema (categorical columns as pandas
+        Categoricals), drawn with the numpy Generator `rng`.
+        """
+        codes = {}
+        for node in self.order:
+            parent = self.parents[node]
+            rows = np.zeros(n_rows, dtype=np.int64) if parent is None else codes[parent]
+            codes[node] = _draw(self._cdfs[node], len(self.levels[node]), rows, rng)
+
+        logits = self.severity_intercept + sum(
+            table[codes[column]] for column, table in zip(self.severity_inputs, self.severity_tables)
+        )
+        probabilities = np.exp(logits - logits.max(1, keepdims=True))
+        cdf = np.cumsum(probabilities / probabilities.sum(1, keepdims=True), axis=1)
+        severity = np.minimum((rng.random(n_rows)[:, None] > cdf).sum(1), len(self.severity_classes) - 1)
+
+        cluster = self.levels["Cluster"][codes["Cluster"]].astype(np.int64)
+        noise = rng.standard_normal((n_rows, 2))
+        coordinates = self.cluster_means[cluster] + np.einsum("nij,nj->ni", self.cluster_chols[cluster], noise)
+        coordinates = np.round(np.clip(coordinates, *self.bounds), 8)
+
+        hours = self.levels["Hour"][codes["Hour"]].astype(np.int64)
+        seconds = hours * 3600 + rng.integers(0, 3600, n_rows)
+
+        frame = {
+            "Date": pd.Categorical.from_codes(codes["Date"], categories=self.levels["Date"]),
+            "Time": pd.Categorical.from_codes(seconds, categories=TIME_STRINGS),
+        }
+        for column in CATEGORICAL_COLUMNS:
+            frame[column] = pd.Categorical.from_codes(codes[column], categories=self.levels[column])
+        frame["Latitude"] = coordinates[:, 0]
+        frame["Longitude"] = coordinates[:, 1]
+        frame["Severity"] = pd.Categorical.from_codes(severity, categories=self.severity_classes)
+        return pd.DataFrame(frame)
+
+    def iter_chunks(self, n_rows, seed=None, chunksize=None):
+        """
+        Yields `n_rows` rows as frames of at most `chunksize` rows.
+        """
+        config = self.synthetic_data_config
+        rng = np.random.default_rng(config.seed if seed is None else seed)
+        chunksize = chunksize or config.chunksize
+        for start in range(0, n_rows, chunksize):
+            yield self.sample(min(chunksize, n_rows - start), rng)
+
+    @timed_stage("synthetic_data")
+    def generate(self, path, n_rows, seed=None, chunksize=None):
+        """
+        Streams `n_rows` rows to `path` (.csv, or .parquet with one row group
+        per chunk) and returns the path.
+        """
+        from src.Pipeline.bulk_predict import ChunkWriter
+
+        logging.info(f"Generating {n_rows} synthetic accidents to {path}")
+        try:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            with ChunkWriter(path) as writer:
+                for chunk in self.iter_chunks(n_rows, seed, chunksize):
+                    writer.write(chunk)
+            set_stage_rows(n_rows)
+            return path
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @classmethod
+    def from_csv(cls, config: SyntheticDataConfig = None):
+        """
+        Generator fitted on the config's source file (the raw dataset by default).
+        """
+        generator = cls(config)
+        return generator.fit(read_accidents(generator.synthetic_data_config.source_data_path, timestamps=False))
+
+
+def distribution_gaps(real: pd.DataFrame, synthetic: pd.DataFrame):
+    """
+    Largest absolute differences between two raw-schema frames, for checking a
+    generator: per categorical column (and Severity) the marginal frequencies,
+    the Severity distribution within each Accident_Type, and the coordinate
+    means / standard deviations in units of the real standard deviation.
+    """
+    def frequency_gap(a, b):
+        return float(a.value_counts(normalize=True).sub(b.value_counts(normalize=True), fill_value=0).abs().max())
+
+    gaps = {column: frequency_gap(real[column].astype(str), synthetic[column].astype(str))
+            for column in [*CATEGORICAL_COLUMNS, "Severity"]}
+    gaps["Severity | Accident_Type"] = max(
+        frequency_gap(group["Severity"].astype(str),
+                      synthetic.loc[synthetic["Accident_Type"].astype(str) == value, "Severity"].astype(str))
+        for value, group in real.groupby(real["Accident_Type"].astype(str))
+    )
+    for column in ("Latitude", "Longitude"):
+        std = real[column].std()
+        gaps[f"{column} mean"] = float(abs(real[column].mean() - synthetic[column].mean()) / std)
+        gaps[f"{column} std"] = float(abs(real[column].std() - synthetic[column].std()) / std)
+    return gaps
+
+
+def main(argv=None):
+    defaults = SyntheticDataConfig()
+    parser = argparse.ArgumentParser(description="Generate synthetic accidents in the raw dataset's schema.")
+    parser.add_argument("output", help=".csv or .parquet file to write")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--chunksize", type=int, default=defaults.chunksize)
+    parser.add_argument("--source", default=defaults.source_data_path, help="raw-schema CSV to learn from")
+    parser.add_argument("--check", action="store_true", help="print distribution gaps against the source")
+    args = parser.parse_args(argv)
+
+    config = SyntheticDataConfig(source_data_path=args.source, seed=args.seed, chunksize=args.chunksize)
+    generator = SyntheticAccidentGenerator.from_csv(config)
+    start = time.perf_counter()
+    generator.generate(args.output, args.rows)
+    seconds = time.perf_counter() - start
+    print(f"Wrote {args.rows} rows in {seconds:.2f}s ({args.rows / seconds:,.0f} rows/sec) -> {args.output}")
+    if args.check:
+        real = read_accidents(args.source, timestamps=False)
+        sample = next(generator.iter_chunks(min(args.rows, config.chunksize), seed=args.seed))
+        for name, gap in distribution_gaps(real, sample).items():
+            print(f"  {name:<26} {gap:.4f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
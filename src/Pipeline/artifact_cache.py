@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+from src.logger import logging
+from src.Pipeline.model_registry import file_sha256
+
+
+# Bump when a stage's code changes in a way that invalidates previously cached outputs
+CACHE_VERSION = 1
+
+ENTRY_MANIFEST = "entry.json"
+
+
+def fingerprint(*parts):
+    """
+    Returns a SHA-256 key for any JSON-serialisable description of a stage's inputs.
+    Objects JSON cannot encode (e.g. estimators inside a grid) contribute their repr.
+    """
+    payload = json.dumps([CACHE_VERSION, *parts], sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _path_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names
+    )
+
+
+class ArtifactCache:
+    """
+    Content-addressed store of stage outputs: <root>/<key[:2]>/<key>/ holds the
+    files a stage produced for inputs fingerprinting to `key`, plus a small
+    entry.json with creation time, last use and size used for eviction.
+    """
+
+    def __init__(self, root, max_bytes=None, max_age_seconds=None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        os.makedirs(self.root, exist_ok=True)
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def file_fingerprint(self, file_path):
+        """
+        SHA-256 of a file, memoised on (path, mtime, size) so an unchanged
+        multi-GB raw file is not re-read on every run.
+        """
+        memo_path = os.path.join(self.root, "file_hashes.json")
+        try:
+            with open(memo_path) as f:
+                memo = json.load(f)
+        except (OSError, ValueError):
+            memo = {}
+
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        stamp = [stat.st_mtime_ns, stat.st_size]
+        cached = memo.get(path)
+        if cached is not None and cached["stamp"] == stamp:
+            return cached["sha256"]
+
+        digest = file_sha256(path)
+        memo[path] = {"stamp": stamp, "sha256": digest}
+        with open(memo_path, "w") as f:
+            json.dump(memo, f)
+        return digest
+
+    def get(self, key):
+        """
+        Returns the entry directory for `key`, or None on a miss. Marks a hit as used.
+        """
+        entry_dir = self._entry_dir(key)
+        manifest_path = os.path.join(entry_dir, ENTRY_MANIFEST)
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        manifest["last_used"] = time.time()
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f)
+        return entry_dir
+
+    def put(self, key, outputs: dict):
+        """
+        Copies `outputs` ({name: file or directory path}) into the entry for `key`
+        and returns the entry directory. The entry only becomes visible once complete.
+        """
+        entry_dir = self._entry_dir(key)
+        tmp_dir = f"{entry_dir}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        for name, src in outputs.items():
+            dst = os.path.join(tmp_dir, name)
+            if os.path.isdir(src):
+                shutil.copytree(src, dst)
+            else:
+                shutil.copy2(src, dst)
+
+        now = time.time()
+        manifest = {"key": key, "created": now, "last_used": now, "size": _path_size(tmp_dir)}
+        with open(os.path.join(tmp_dir, ENTRY_MANIFEST), "w") as f:
+            json.dump(manifest, f)
+
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(tmp_dir, entry_dir)
+        return entry_dir
+
+    def entries(self):
+        """
+        Returns the manifests of every complete entry.
+        """
+        manifests = []
+        for prefix in os.listdir(self.root):
+            prefix_dir = os.path.join(self.root, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for name in os.listdir(prefix_dir):
+                manifest_path = os.path.join(prefix_dir, name, ENTRY_MANIFEST)
+                if os.path.exists(manifest_path):
+                    with open(manifest_path) as f:
+                        manifests.append(json.load(f))
+        return manifests
+
+    def evict(self, keep=()):
+        """
+        Removes entries unused for longer than max_age_seconds, then the least
+        recently used ones until the cache fits in max_bytes. Keys in `keep`
+        (the current run's entries) are never evicted. Returns the evicted keys.
+        """
+        now = time.time()
+        entries = sorted(self.entries(), key=lambda m: m["last_used"])
+        evicted = []
+
+        if self.max_age_seconds is not None:
+            for manifest in entries:
+                if manifest["key"] not in keep and now - manifest["last_used"] > self.max_age_seconds:
+                    evicted.append(manifest["key"])
+
+        if self.max_bytes is not None:
+            total = sum(m["size"] for m in entries if m["key"] not in evicted)
+            for manifest in entries:
+                if total <= self.max_bytes:
+                    break
+                if manifest["key"] in keep or manifest["key"] in evicted:
+                    continue
+                evicted.append(manifest["key"])
+                total -= manifest["size"]
+
+        for key in evicted:
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+        if evicted:
+            logging.info(f"Artifact cache evicted {len(evicted)} entries")
+        return evicted
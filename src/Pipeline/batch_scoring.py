@@ -0,0 +1,361 @@
+"""Multi-process batch scoring of large accident files.
+
+Splits the input into row ranges and scores them in a process pool:
+
+    CSV            : byte ranges of `chunk_size` lines, found by one newline scan
+                     (fields must not contain quoted line breaks)
+    Feather        : row slices of the memory-mapped file
+    Parquet        : one task per row group
+    directory      : the Feather/Parquet partitions written by streaming ingestion
+
+Workers never receive the model through the task pipe. Each one loads the fused
+inference artifact itself, from the path, when it starts. A save_artifact
+directory is memory-mapped, so the model's arrays (a packed forest, see
+ModelTrainerConfig.pack_trees) and the compiled encoder tables are read-only
+pages of one file in the page cache, shared by every worker. A
+joblib pickle (legacy artifact) is loaded once per worker instead. Each worker
+checks that the artifact's content hash still matches the one the run started
+with, so a retrain during a run fails it instead of mixing two models.
+
+Artifacts that carry an InputSchema have every chunk validated and coerced
+first; invalid values are scored as missing and flagged in VALID_INPUT_COLUMN.
+
+Results come back in task order and are written one chunk at a time. At most
+`max_pending` chunks are in flight, so memory stays bounded whatever the file size.
+
+Usage:
+    python -m src.Pipeline.batch_scoring input.csv predictions.csv [--workers 8] [--chunk-size 100000]
+"""
+import argparse
+import io
+import multiprocessing as mp
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# Ensure project root is in sys.path for src imports
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.dtypes import apply_dtypes, read_accidents
+from src.exception import CustomException
+from src.logger import logging, set_stage_rows, skip_unused_record_fields, timed_stage
+from src.Pipeline.predict_pipeline import (
+    FEATURE_COLUMNS,
+    VALID_INPUT_COLUMN,
+    PredictPipelineConfig,
+    result_frame,
+    score_frame,
+)
+from src.utils import ARTIFACT_MANIFEST, file_sha256
+
+# Environment variables that cap the native thread pools of NumPy's BLAS and the boosting libraries
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+@dataclass
+class BatchScoringConfig:
+    # Fused inference artifact (save_artifact directory or joblib pickle)
+    inference_model_path: str = field(default_factory=lambda: PredictPipelineConfig().inference_model_path)
+    workers: int = field(default_factory=lambda: os.cpu_count() or 1)
+    chunk_size: int = 100_000            # Rows per task
+    max_pending: int = None              # Chunks in flight; None means 2 x workers
+    threads_per_worker: int = 1          # Native threads each worker's model may use
+    # "spawn" starts each worker from a fresh interpreter (cheap since the serving
+    # path imports lazily); a forked worker inherits the parent's loaded libraries
+    start_method: str = "spawn"
+    keep_columns: tuple = ()             # Input columns copied into the output, e.g. an id
+
+
+def csv_row_ranges(path, chunk_size, block_bytes=64 * 1024 * 1024):
+    """
+    Returns [(start, end)] byte ranges that together cover the data lines of a CSV
+    file (the header excluded), each holding `chunk_size` lines except the last.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be a positive integer")
+    with open(path, "rb") as f:
+        f.readline()
+        start = data_start = f.tell()
+        size = os.fstat(f.fileno()).st_size
+        ranges, pending, offset = [], 0, data_start
+        while True:
+            block = f.read(block_bytes)
+            if not block:
+                break
+            newlines = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == ord("\n"))
+            # Newlines that end a chunk: every chunk_size-th one, counting on from the last boundary
+            for i in newlines[chunk_size - pending - 1::chunk_size]:
+                end = offset + int(i) + 1
+                ranges.append((start, end))
+                start = end
+            pending = (pending + len(newlines)) % chunk_size
+            offset += len(block)
+    if start < size and size > data_start:
+        ranges.append((start, size))
+    return ranges
+
+
+def plan_tasks(input_path, chunk_size):
+    """
+    Returns the scoring tasks for `input_path` in output order: (kind, path, a, b)
+    tuples a worker reads with read_task.
+    """
+    if os.path.isdir(input_path):
+        parts = sorted(
+            os.path.join(input_path, name) for name in os.listdir(input_path)
+            if name.endswith((".feather", ".parquet"))
+        )
+        if not parts:
+            raise FileNotFoundError(f"No dataset partitions found in: {input_path}")
+        return [task for part in parts for task in plan_tasks(part, chunk_size)]
+    if not os.path.exists(input_path):
+        raise FileNotFoundError(f"File not found: {input_path}")
+
+    if input_path.endswith(".csv"):
+        return [("csv", input_path, start, end) for start, end in csv_row_ranges(input_path, chunk_size)]
+    if input_path.endswith(".feather"):
+        import pyarrow.feather as feather
+
+        n_rows = feather.read_table(input_path, memory_map=True).num_rows
+        return [("feather", input_path, start, min(start + chunk_size, n_rows))
+                for start in range(0, n_rows, chunk_size)]
+    if input_path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        return [("parquet", input_path, group, group + 1)
+                for group in range(pq.ParquetFile(input_path).num_row_groups)]
+    raise ValueError(f"Unsupported input format: {input_path}")
+
+
+def read_task(task, columns):
+    """
+    Reads the rows of one task, restricted to `columns`, in the src.dtypes
+    registry dtypes with float64 coordinates.
+    """
+    kind, path, a, b = task
+    if kind == "csv":
+        with open(path, "rb") as f:
+            header = f.readline().decode().rstrip("\r\n")
+            f.seek(a)
+            data = f.read(b - a)
+        names = list(pd.read_csv(io.StringIO(header), nrows=0).columns)
+        return read_accidents(io.BytesIO(data), timestamps=False, compact_coordinates=False,
+                              header=None, names=names, usecols=columns)
+    if kind == "feather":
+        import pyarrow.feather as feather
+
+        table = feather.read_table(path, columns=columns, memory_map=True).slice(a, b - a)
+    else:
+        import pyarrow.parquet as pq
+
+        table = pq.ParquetFile(path).read_row_groups(range(a, b), columns=columns)
+    # Same registry dtypes as the CSV branch
+    return apply_dtypes(table.to_pandas(), compact_coordinates=False)
+
+
+def model_digest(model_path):
+    """
+    Content hash identifying the artifact: its manifest for a directory, the file otherwise.
+    """
+    return file_sha256(os.path.join(model_path, ARTIFACT_MANIFEST) if os.path.isdir(model_path) else model_path)
+
+
+# Per-process state of a scoring worker, set by _init_worker
+_worker = {}
+
+
+def _init_worker(model_path, digest, threads, keep_columns):
+    # Before the model's library is imported: most size their thread pool at load time
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+    try:
+        # NumPy's BLAS is already loaded by this module's imports
+        from threadpoolctl import threadpool_limits
+
+        _worker["thread_limits"] = threadpool_limits(threads)
+    except ImportError:  # pragma: no cover
+        pass
+
+    from src.utils import _limit_threads, load_artifact, load_object
+
+    if model_digest(model_path) != digest:
+        raise RuntimeError(f"Inference artifact changed since the scoring run started: {model_path}")
+    model = load_artifact(model_path) if os.path.isdir(model_path) else load_object(model_path)
+    if threads == 1 and hasattr(model.model, "get_params"):
+        _limit_threads(model.model)
+    _worker.update(model=model, keep_columns=list(keep_columns))
+
+
+def _score_task(task):
+    keep_columns = _worker["keep_columns"]
+    model = _worker["model"]
+    df = read_task(task, list(dict.fromkeys(FEATURE_COLUMNS + keep_columns)))
+    validation = None if model.schema is None else model.schema.validate(df)
+    result = score_frame(model, df if validation is None else validation.frame)
+    if validation is not None:
+        result[VALID_INPUT_COLUMN] = ~validation.invalid
+    if keep_columns:
+        result = pd.concat([df[keep_columns], result], axis=1)
+    return result
+
+
+class BatchScoringEngine:
+    def __init__(self, config: BatchScoringConfig = None):
+        self.batch_scoring_config = config or BatchScoringConfig()
+
+    def model_path(self):
+        path = self.batch_scoring_config.inference_model_path
+        if not os.path.exists(path):
+            legacy = PredictPipelineConfig().legacy_inference_model_path
+            if path == PredictPipelineConfig().inference_model_path and os.path.exists(legacy):
+                return legacy
+            raise FileNotFoundError(f"Inference artifact not found: {path}")
+        return path
+
+    def iter_scores(self, input_path):
+        """
+        Yields one result frame per task, in input order, each with a fresh
+        RangeIndex; predict_batch's columns, after any `keep_columns`.
+        """
+        config = self.batch_scoring_config
+        if config.workers <= 0:
+            raise ValueError("workers must be a positive integer")
+        tasks = iter(plan_tasks(input_path, config.chunk_size))
+        model_path = self.model_path()
+        max_pending = config.max_pending or 2 * config.workers
+
+        with ProcessPoolExecutor(
+            max_workers=config.workers,
+            mp_context=mp.get_context(config.start_method),
+            initializer=_init_worker,
+            initargs=(model_path, model_digest(model_path), config.threads_per_worker, tuple(config.keep_columns)),
+        ) as pool:
+            pending = deque(pool.submit(_score_task, task) for _, task in zip(range(max_pending), tasks))
+            while pending:
+                result = pending.popleft().result()
+                # Refill before yielding, so workers keep busy while the caller writes
+                task = next(tasks, None)
+                if task is not None:
+                    pending.append(pool.submit(_score_task, task))
+                yield result
+
+    def empty_result(self):
+        """
+        The result frame of an input without rows: the columns _score_task
+        returns for the configured artifact and keep_columns, no rows.
+        """
+        from src.utils import load_artifact, load_object
+
+        model_path = self.model_path()
+        model = load_artifact(model_path) if os.path.isdir(model_path) else load_object(model_path)
+        labels, probabilities, classes = np.empty(0, dtype=object), None, None
+        if hasattr(model.model, "predict_proba"):
+            classes = model.classes_
+            probabilities = np.empty((0, len(classes)))
+        result = result_frame(pd.RangeIndex(0), labels, probabilities, classes)
+        if model.schema is not None:
+            result[VALID_INPUT_COLUMN] = np.empty(0, dtype=bool)
+        keep_columns = self.batch_scoring_config.keep_columns
+        if keep_columns:
+            result = pd.concat([pd.DataFrame(columns=keep_columns), result], axis=1)
+        return result
+
+    @timed_stage("batch_scoring")
+    def score_file(self, input_path, output_path):
+        """
+        Scores every row of `input_path` into `output_path` (.csv or .parquet) in
+        input order. The output is written to a temporary file and renamed when
+        complete. Returns {"rows", "chunks", "workers", "seconds", "rows_per_sec"}.
+        """
+        config = self.batch_scoring_config
+        logging.info(f"Batch scoring {input_path} -> {output_path} "
+                     f"(workers={config.workers}, chunk_size={config.chunk_size})")
+        try:
+            if not output_path.endswith((".csv", ".parquet")):
+                raise ValueError(f"Unsupported output format: {output_path}")
+            if os.path.dirname(output_path):
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            tmp_path = f"{output_path}.tmp"
+            start = time.perf_counter()
+            rows = chunks = 0
+            writer = None
+
+            def write(result, first):
+                nonlocal writer
+                if output_path.endswith(".csv"):
+                    result.to_csv(tmp_path, mode="w" if first else "a", header=first, index=False)
+                else:
+                    import pyarrow as pa
+                    import pyarrow.parquet as pq
+
+                    table = pa.Table.from_pandas(result, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(tmp_path, table.schema)
+                    writer.write_table(table.cast(writer.schema))
+
+            try:
+                for result in self.iter_scores(input_path):
+                    write(result, first=not chunks)
+                    rows += len(result)
+                    chunks += 1
+                if not chunks:
+                    # No rows (e.g. a header-only CSV): still write the result columns
+                    write(self.empty_result(), first=True)
+                if writer is not None:
+                    writer.close()
+                    writer = None
+                os.replace(tmp_path, output_path)
+            except BaseException:
+                # Leave no partial output behind
+                if writer is not None:
+                    writer.close()
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+            seconds = time.perf_counter() - start
+            set_stage_rows(rows)
+            summary = {"rows": rows, "chunks": chunks, "workers": config.workers, "seconds": seconds,
+                       "rows_per_sec": rows / seconds if seconds else None}
+            logging.info(f"Batch scoring completed: {rows} rows in {chunks} chunks, {seconds:.2f}s")
+            return summary
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a large accident file in parallel.")
+    parser.add_argument("input", help="CSV, Feather or Parquet file, or a directory of partitions")
+    parser.add_argument("output", help=".csv or .parquet file for the predictions, in input order")
+    parser.add_argument("--model-path", default=None, help="fused inference artifact (default: artifacts/)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=BatchScoringConfig.chunk_size)
+    parser.add_argument("--threads-per-worker", type=int, default=BatchScoringConfig.threads_per_worker)
+    parser.add_argument("--keep-columns", default="", help="comma-separated input columns to copy to the output")
+    args = parser.parse_args(argv)
+    skip_unused_record_fields()
+
+    config = BatchScoringConfig(
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        threads_per_worker=args.threads_per_worker,
+        keep_columns=tuple(c for c in args.keep_columns.split(",") if c),
+    )
+    if args.model_path:
+        config.inference_model_path = args.model_path
+    summary = BatchScoringEngine(config).score_file(args.input, args.output)
+    print(f"Scored {summary['rows']} rows in {summary['seconds']:.2f}s "
+          f"({summary['rows_per_sec']:,.0f} rows/sec, {summary['workers']} workers) -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
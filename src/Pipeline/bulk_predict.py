@@ -0,0 +1,133 @@
+"""Command-line bulk scoring for files in the Traffic_Accident_Severity_Dataset schema.
+
+Usage:
+    bulk-predict rawdata/Traffic_Accident_Severity_Dataset.csv predictions.csv --chunksize 50000
+    python -m src.Pipeline.bulk_predict incidents.parquet scored.parquet
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+# Ensure project root is in sys.path for src imports
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.dtypes import apply_dtypes, read_accidents
+from src.logger import logging, skip_unused_record_fields
+from src.Pipeline.predict_pipeline import PredictPipeline, PredictPipelineConfig
+
+
+DEFAULT_CHUNKSIZE = 50_000
+
+
+def _is_parquet(path):
+    return os.path.splitext(path)[1].lower() in (".parquet", ".pq")
+
+
+def iter_input_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Reads a CSV or Parquet file as a stream of DataFrames of at most `chunksize`
+    rows, in the src.dtypes registry dtypes with float64 coordinates.
+    """
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            yield apply_dtypes(batch.to_pandas(), compact_coordinates=False)
+    else:
+        yield from read_accidents(path, timestamps=False, compact_coordinates=False, chunksize=chunksize)
+
+
+class ChunkWriter:
+    """
+    Appends scored chunks to a CSV or Parquet file without holding earlier chunks in memory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.rows_written = 0
+        self._parquet_writer = None
+        self._csv_file = None
+
+    def write(self, df: pd.DataFrame):
+        if _is_parquet(self.path):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            header = self._csv_file is None
+            if header:
+                self._csv_file = open(self.path, "w", newline="")
+            df.to_csv(self._csv_file, index=False, header=header)
+        self.rows_written += len(df)
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+        if self._csv_file is not None:
+            self._csv_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def bulk_predict(input_path, output_path, chunksize=DEFAULT_CHUNKSIZE, model_path=None):
+    """
+    Streams `input_path` through PredictPipeline.predict_batch and writes each input
+    chunk, extended with the prediction and probability columns, to `output_path`.
+
+    Returns:
+        tuple: (rows scored, elapsed seconds)
+    """
+    config = PredictPipelineConfig(inference_model_path=model_path) if model_path else None
+    pipeline = PredictPipeline(config)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    logging.info(f"Bulk prediction started: {input_path} -> {output_path} (chunksize={chunksize})")
+
+    start = time.perf_counter()
+    chunks = iter_input_chunks(input_path, chunksize)
+    with ChunkWriter(output_path) as writer:
+        for chunk in chunks:
+            scored = pipeline.predict_batch(chunk)
+            writer.write(pd.concat([chunk, scored], axis=1))
+    elapsed = time.perf_counter() - start
+
+    logging.info(f"Bulk prediction completed: {writer.rows_written} rows in {elapsed:.2f}s")
+    return writer.rows_written, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="bulk-predict",
+        description="Score a CSV/Parquet file of accidents in vectorized chunks.",
+    )
+    parser.add_argument("input", help="CSV or Parquet file in the raw dataset schema")
+    parser.add_argument("output", help="CSV or Parquet file to write predictions to")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                        help=f"rows scored per vectorized call (default: {DEFAULT_CHUNKSIZE})")
+    parser.add_argument("--model-path", default=None,
+                        help="artifact directory or pickle to load (default: PredictPipelineConfig.inference_model_path)")
+    args = parser.parse_args(argv)
+    skip_unused_record_fields()
+
+    rows, elapsed = bulk_predict(args.input, args.output, args.chunksize, args.model_path)
+    rate = rows / elapsed if elapsed else float("inf")
+    print(f"Scored {rows} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec) -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,325 @@
+"""Incremental retraining on a new batch of accidents.
+
+Appends the batch to the stored dataset and, unless the drift check says the
+data moved, continues training the served model on the batch instead of
+re-running the full model search:
+
+    1. summarize the batch and compare it with the running statistics of the
+       data the model was trained on (check_drift), including the served
+       model's accuracy on the batch
+    2. unless drift, a model type that cannot be updated, a batch missing one
+       of the model's classes, or too many rows appended since the last full
+       retrain call for a full retrain: continue training (IncrementalTrainer)
+       on the batch's training rows, in memory
+    3. append the batch (DataIngestion.initiate_batch_append), merge its
+       statistics into the running ones and save them with the batch's digest
+    4. full retrain (also when the update in 2 failed) -> full TrainPipeline run
+       on the whole history; otherwise save the updated model and inference
+       artifact, unless it scores worse than the served model on the newest
+       test rows, in which case the served model is kept
+
+The batch reaches the stored history only after the update succeeded, and the
+saved digest keeps a retried run (after a failed retrain or save) from
+appending it twice.
+
+The preprocessor is not refitted between full retrains: the served model's
+splits and coefficients are expressed in its feature space, so shifting
+medians, scaler moments or the one-hot vocabulary under an existing model would
+silently change what it predicts. The running statistics are what moves;
+new categories or shifted moments are drift and trigger the full retrain that
+refits the preprocessor.
+
+Usage:
+    python -m src.Pipeline.incremental_pipeline new_batch.csv [--force-full]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+
+# Ensure project root is in sys.path for src imports
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import pandas as pd
+from sklearn.metrics import accuracy_score
+
+from src.Components.data_transformation import CATEGORICAL_COLUMNS, NUMERICAL_COLUMNS, TARGET_COLUMN
+from src.Components.feature_stats import DriftThresholds, RunningFeatureStats, check_drift
+from src.Components.incremental_trainer import IncrementalTrainer
+from src.dtypes import read_accidents
+from src.exception import CustomException
+from src.logger import logging, timed_stage
+from src.Pipeline.inference_model import InferenceModel
+from src.Pipeline.train_pipeline import TrainPipeline
+from src.utils import is_artifact, load_artifact, load_object, read_dataset, read_manifest, save_artifact, save_object
+
+
+def file_digest(path, block_size=1 << 20):
+    """
+    sha256 of a file's bytes, identifying a batch that was already appended.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class IncrementalPipelineConfig:
+    # Running statistics of the training history and the append counters
+    feature_stats_path: str = os.path.join("artifacts", "feature_stats.pkl")
+    # Full retrain once this fraction of rows was appended since the last one
+    max_appended_fraction: float = 0.25
+    # Newest stored test rows the updated model is scored on
+    eval_rows: int = 50_000
+
+
+class IncrementalPipeline:
+    def __init__(self, config: IncrementalPipelineConfig = None, thresholds: DriftThresholds = None,
+                 train_pipeline: TrainPipeline = None):
+        self.incremental_pipeline_config = config or IncrementalPipelineConfig()
+        self.drift_thresholds = thresholds or DriftThresholds()
+        self.train_pipeline = train_pipeline or TrainPipeline()
+        self.data_ingestion = self.train_pipeline.data_ingestion
+        self.incremental_trainer = IncrementalTrainer()
+
+    def history_path(self):
+        ingestion_config = self.data_ingestion.ingestion_config
+        if os.path.exists(ingestion_config.raw_data_path):
+            return ingestion_config.raw_data_path
+        return ingestion_config.source_data_path
+
+    def summarize(self, df):
+        return RunningFeatureStats.from_frame(df, NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS, TARGET_COLUMN)
+
+    def load_state(self):
+        """
+        Returns {"stats", "base_rows", "appended_rows", "updates", "appended_batches"
+        (digests of the batches appended since the last full retrain)}; on the
+        first run the stored history is summarized once.
+        """
+        path = self.incremental_pipeline_config.feature_stats_path
+        if os.path.exists(path):
+            state = load_object(path)
+            state.setdefault("appended_batches", [])
+            return state
+        return self.fresh_state()
+
+    def fresh_state(self):
+        stats = self.summarize(read_dataset(self.history_path()))
+        return {"stats": stats, "base_rows": stats.n_rows, "appended_rows": 0, "updates": 0,
+                "appended_batches": []}
+
+    def save_state(self, state):
+        save_object(self.incremental_pipeline_config.feature_stats_path, state)
+
+    def load_served_model(self):
+        """
+        Returns (model name, fitted model, InferenceModel, manifest) of the served
+        artifact, or None when there is no artifact to update.
+        """
+        trainer_config = self.train_pipeline.model_trainer.model_trainer_config
+        artifact_path = trainer_config.inference_model_file_path
+        if not (is_artifact(artifact_path) and os.path.exists(trainer_config.trained_model_file_path)):
+            return None
+        manifest = read_manifest(artifact_path)
+        # Loaded into memory: the artifact directory is replaced when the update is saved
+        inference_model = load_artifact(artifact_path, mmap_mode=None)
+        model = load_object(trainer_config.trained_model_file_path)
+        return manifest["metrics"]["model"], model, inference_model, manifest
+
+    def encode_target(self, labels):
+        label_encoder_path = self.train_pipeline.data_transformation.data_transformation_config.label_encoder_obj_file_path
+        return load_object(label_encoder_path).transform(labels)
+
+    def score(self, model, inference_model, df):
+        known = df[TARGET_COLUMN].isin(inference_model.classes)
+        df = df[known]
+        if not len(df):
+            return None
+        return float(accuracy_score(self.encode_target(df[TARGET_COLUMN]), model.predict(inference_model.transform(df))))
+
+    @timed_stage("incremental_pipeline")
+    def run(self, batch_path, force_full=False):
+        """
+        Adds the batch at `batch_path` to the training data and updates the model.
+        Returns {"mode": "incremental" | "kept" (the update scored worse and the
+        served model was kept) | "full", "reasons", "drift", "seconds", "report"}.
+        """
+        try:
+            start = time.perf_counter()
+            state = self.load_state()
+            batch = read_dataset(batch_path)
+            digest = file_digest(batch_path)
+            # A retry of a run that appended the batch and then failed
+            appended = digest in state["appended_batches"]
+            served = self.load_served_model()
+
+            batch_accuracy = reference_accuracy = None
+            if served is not None:
+                _, model, inference_model, manifest = served
+                batch_accuracy = self.score(model, inference_model, batch)
+                reference_accuracy = manifest["metrics"].get("test_accuracy")
+            drift = check_drift(state["stats"], self.summarize(batch), self.drift_thresholds,
+                                batch_accuracy=batch_accuracy, reference_accuracy=reference_accuracy)
+
+            if force_full:
+                drift.flag("full retrain requested")
+            if served is None:
+                drift.flag("no served model artifact to update")
+            elif not IncrementalTrainer.supports(served[1]):
+                drift.flag(f"{served[0]} cannot be updated incrementally")
+            appended_rows = state["appended_rows"] + (0 if appended else len(batch))
+            max_appended = self.incremental_pipeline_config.max_appended_fraction * state["base_rows"]
+            if appended_rows > max_appended:
+                drift.flag(f"{appended_rows} rows appended since the last full retrain")
+
+            batch_rows = read_accidents(batch_path, timestamps=False, compact_coordinates=False)
+            train_part, test_part = self.data_ingestion.split_batch(batch_rows)
+            update = None
+            if not drift.needs_full_retrain:
+                # Warm-started forests and boosters cannot learn a class the batch lacks
+                missing = sorted(set(served[2].classes) - set(train_part[TARGET_COLUMN].astype(str)))
+                if missing:
+                    drift.flag(f"batch has no training rows of {', '.join(missing)}")
+                else:
+                    try:
+                        update = self.update_model(served, train_part, None if appended else test_part)
+                    except Exception as e:
+                        logging.warning(f"Incremental update failed, falling back to a full retrain: {e}")
+                        drift.flag(f"incremental update failed: {e}")
+
+            if not appended:
+                self.data_ingestion.initiate_batch_append(batch_path)
+                state["stats"].update(batch)
+                state["appended_rows"] = appended_rows
+                state["appended_batches"].append(digest)
+                self.save_state(state)
+
+            if drift.needs_full_retrain:
+                logging.info(f"Full retrain: {'; '.join(drift.reasons)}")
+                report = self.full_retrain()
+                state = self.fresh_state()
+                mode = "full"
+            else:
+                mode, report = self.save_update(served, update, len(train_part))
+                state["updates"] += mode == "incremental"
+
+            self.save_state(state)
+            seconds = time.perf_counter() - start
+            logging.info(f"Retrain ({mode}) on a {len(batch)}-row batch took {seconds:.2f}s")
+            return {"mode": mode, "reasons": drift.reasons, "drift": drift.metrics,
+                    "seconds": seconds, "report": report}
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def full_retrain(self):
+        """
+        Runs the full TrainPipeline on the stored history (raw copy plus every
+        appended batch). Returns the ModelTrainer report.
+        """
+        ingestion_config = self.data_ingestion.ingestion_config
+        ingestion_config.source_data_path = self.history_path()
+        return self.train_pipeline.run()
+
+    def update_model(self, served, train_part, test_part=None):
+        """
+        Continues training the served model on the batch's training rows and
+        scores it and the served model on the newest stored test rows (plus the
+        batch's `test_part` when it is not stored yet). Nothing is saved.
+        Returns {"model", "accuracy", "served_accuracy", "X_eval", "eval_rows"}.
+        Raises when the model cannot be updated on this batch.
+        """
+        name, model, inference_model, manifest = served
+        updated = self.incremental_trainer.continue_training(
+            model, inference_model.transform(train_part), self.encode_target(train_part[TARGET_COLUMN])
+        )
+        if updated is None:
+            raise ValueError(f"{name} cannot be updated incrementally")
+        if hasattr(model, "classes_") and list(updated.classes_) != list(model.classes_):
+            raise ValueError(f"updated model has classes {list(updated.classes_)}, not {list(model.classes_)}")
+
+        ingestion_config = self.data_ingestion.ingestion_config
+        test_path = (ingestion_config.test_dataset_dir if ingestion_config.mode == "streaming"
+                     else ingestion_config.test_data_path)
+        eval_rows = self.incremental_pipeline_config.eval_rows
+        # Raw Date/Time and float64 coordinates like the batch rows; the preprocessors do not use Date/Time
+        test_df = read_dataset(test_path, timestamps=False, compact_coordinates=False).tail(eval_rows)
+        if test_part is not None and len(test_part):
+            test_df = pd.concat([test_df, test_part], ignore_index=True).tail(eval_rows)
+        X_eval = inference_model.transform(test_df)
+        y_eval = self.encode_target(test_df[TARGET_COLUMN])
+        return {
+            "model": updated,
+            "accuracy": float(accuracy_score(y_eval, updated.predict(X_eval))),
+            "served_accuracy": float(accuracy_score(y_eval, model.predict(X_eval))),
+            "X_eval": X_eval,
+            "eval_rows": len(test_df),
+        }
+
+    def save_update(self, served, update, train_rows):
+        """
+        Saves model.pkl and the inference artifact of an update from update_model,
+        unless it scores worse than the served model. Returns (mode, text report).
+        """
+        name, _, inference_model, manifest = served
+        accuracy, served_accuracy = update["accuracy"], update["served_accuracy"]
+        scores = (f"Accuracy on newest {update['eval_rows']} test rows: {accuracy:.4f} "
+                  f"(served model: {served_accuracy:.4f})")
+        if accuracy < served_accuracy:
+            logging.info(f"Incremental update of {name} scored {accuracy:.4f} < {served_accuracy:.4f}; "
+                         f"keeping the served model")
+            return "kept", f"Model: {name} (update rejected, served model kept)\n{scores}"
+
+        trainer = self.train_pipeline.model_trainer
+        trainer_config = trainer.model_trainer_config
+        updated = update["model"]
+        save_object(file_path=trainer_config.trained_model_file_path, obj=updated)
+        updated_inference_model = InferenceModel(
+            preprocessor=inference_model.preprocessor,
+            model=trainer.export_model(updated, update["X_eval"]),
+            classes=inference_model.classes,
+            input_format=inference_model.input_format,
+            schema=inference_model.schema,
+        )
+        metrics = dict(manifest["metrics"])
+        metrics.update({
+            "test_accuracy": accuracy,
+            "train_rows": metrics.get("train_rows", 0) + train_rows,
+            "incremental_updates": metrics.get("incremental_updates", 0) + 1,
+        })
+        save_artifact(
+            trainer_config.inference_model_file_path,
+            updated_inference_model,
+            manifest={**updated_inference_model.describe(), "metrics": metrics},
+        )
+        return "incremental", f"Model: {name} (incremental update)\n{scores}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Append a batch of accidents and update the model.")
+    parser.add_argument("batch", help="CSV (or Parquet/Feather) file of new accidents in the raw schema")
+    parser.add_argument("--force-full", action="store_true", help="always run a full retrain")
+    parser.add_argument("--max-appended-fraction", type=float,
+                        default=IncrementalPipelineConfig.max_appended_fraction)
+    args = parser.parse_args(argv)
+
+    config = IncrementalPipelineConfig(max_appended_fraction=args.max_appended_fraction)
+    result = IncrementalPipeline(config).run(args.batch, force_full=args.force_full)
+    print(f"Mode: {result['mode']} ({result['seconds']:.2f}s)")
+    for reason in result["reasons"]:
+        print(f"  - {reason}")
+    print(json.dumps(result["drift"], indent=2, sort_keys=True))
+    print(result["report"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+
+from src.utils import issparse
+
+
+FEATURE_COLUMNS = [
+    "Weather",
+    "Road_Condition",
+    "Time_of_Day",
+    "Traffic",
+    "Accident_Type",
+    "Vehicle_Type",
+    "Accident_Reason",
+    "Latitude",
+    "Longitude",
+]
+
+
+class InferenceModel:
+    """
+    Fused inference graph: the fitted preprocessor followed by the trained estimator.
+    Takes raw frames in the CustomData schema, so one artifact is enough to predict.
+    The preprocessor is the compiled lookup encoder when DataTransformation exported one.
+
+    `classes` decodes the model's integer outputs back to labels (the fitted
+    LabelEncoder's classes_), and `input_format` ("dense" | "csr") is the feature
+    layout the model was trained on, applied to every transformed batch.
+    `schema` is the InputSchema learned from the training data, if any.
+    """
+
+    # Class-level defaults keep artifacts pickled before these attributes existed loadable
+    classes = None
+    input_format = None
+    schema = None
+
+    def __init__(self, preprocessor, model, feature_columns=None, classes=None, input_format=None, schema=None):
+        self.preprocessor = preprocessor
+        self.model = model
+        self.feature_columns = list(feature_columns or FEATURE_COLUMNS)
+        self.classes = None if classes is None else np.asarray(classes)
+        self.input_format = input_format
+        self.schema = schema
+
+    @property
+    def classes_(self):
+        if self.classes is None:
+            return self.model.classes_
+        return self.classes[self.model.classes_]
+
+    def _decode(self, predictions):
+        return predictions if self.classes is None else self.classes[np.asarray(predictions, dtype=np.intp)]
+
+    def _as_model_input(self, features):
+        if self.input_format == "csr" and not issparse(features):
+            from scipy import sparse
+
+            return sparse.csr_matrix(features)
+        if self.input_format == "dense" and issparse(features):
+            return features.toarray()
+        return features
+
+    def transform(self, data: pd.DataFrame):
+        return self._as_model_input(self.preprocessor.transform(data[self.feature_columns]))
+
+    def transform_record(self, record):
+        """
+        Transforms one {column: value} mapping, using the compiled preprocessor's
+        DataFrame-free path when available.
+        """
+        if hasattr(self.preprocessor, "transform_record"):
+            return self._as_model_input(self.preprocessor.transform_record(record))
+        return self.transform(pd.DataFrame([record]))
+
+    def predict_record(self, record):
+        """
+        Scores one {column: value} mapping; returns (label, {class: probability}).
+        """
+        features = self.transform_record(record)
+        if not hasattr(self.model, "predict_proba"):
+            return self._decode(self.model.predict(features))[0], {}
+        probabilities = self.model.predict_proba(features)[0]
+        return self.classes_[probabilities.argmax()], dict(zip(self.classes_, probabilities))
+
+    def get_categories(self):
+        """
+        Returns {categorical column: categories the fitted encoder learned}.
+        """
+        if hasattr(self.preprocessor, "get_categories"):
+            return self.preprocessor.get_categories()
+        cat_pipeline = self.preprocessor.named_transformers_["cat_pipeline"]
+        columns = next(cols for name, _, cols in self.preprocessor.transformers_ if name == "cat_pipeline")
+        encoder = cat_pipeline.named_steps["one_hot_encoder"]
+        return {column: list(cats) for column, cats in zip(columns, encoder.categories_)}
+
+    def describe(self):
+        """
+        JSON-ready description for an artifact manifest: input schema, the
+        transformed feature names, the classes and the estimator type.
+        """
+        if self.schema is not None:
+            schema = self.schema.describe()
+        else:
+            categories = self.get_categories()
+            schema = {
+                column: {"type": "category", "categories": [str(c) for c in categories[column]]}
+                if column in categories else {"type": "float64"}
+                for column in self.feature_columns
+            }
+        feature_names = (
+            [str(name) for name in self.preprocessor.get_feature_names_out()]
+            if hasattr(self.preprocessor, "get_feature_names_out") else None
+        )
+        return {
+            # A packed model reports the estimator it was packed from
+            "estimator": getattr(self.model, "source", None) or type(self.model).__name__,
+            "model_class": type(self.model).__name__,
+            "feature_columns": self.feature_columns,
+            "schema": schema,
+            "feature_names": feature_names,
+            "classes": [str(c) for c in self.classes_],
+            "input_format": self.input_format,
+        }
+
+    def predict(self, data: pd.DataFrame):
+        return self._decode(self.model.predict(self.transform(data)))
+
+    def predict_proba(self, data: pd.DataFrame):
+        return self.model.predict_proba(self.transform(data))
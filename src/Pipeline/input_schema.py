@@ -0,0 +1,249 @@
+"""Typed input schema for the CustomData columns, learned from the training data.
+
+    categorical column : the categories seen in training; anything else is an
+                         unknown category
+    numeric column     : float64 within the training range, widened by
+                         `range_margin` x its span and clipped to the
+                         column's physical bounds (Latitude +-90, Longitude +-180)
+
+Missing values are valid everywhere; the preprocessors impute them.
+
+InputSchema.validate checks a whole frame with vectorized pandas operations
+(one hash lookup per categorical column, comparisons per numeric column) and
+returns a ValidationResult. That result holds a per-row error mask and the frame
+coerced to compact types: categoricals as pandas Categoricals of the learned
+categories (int8 codes), numerics as float64. Invalid values are coerced to
+missing. record_errors checks one {column: value} mapping with plain dict and
+set lookups, for the single-record serving path.
+
+The schema is saved in the inference artifact and in its manifest ("schema").
+"""
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+# Hard limits a numeric column's learned range is clipped to
+PHYSICAL_BOUNDS = {"Latitude": (-90.0, 90.0), "Longitude": (-180.0, 180.0)}
+
+
+class ValidationResult:
+    """
+    Outcome of InputSchema.validate on one frame.
+
+        frame   : the input with the schema columns coerced (invalid values missing)
+        invalid : bool array, True for rows with at least one error
+        errors  : [(column, reason, bool row mask)], one entry per failed check
+    """
+
+    def __init__(self, frame, source, errors):
+        self.frame = frame
+        self.source = source
+        self.errors = errors
+        self.invalid = np.zeros(len(frame), dtype=bool)
+        for _, _, mask in errors:
+            self.invalid |= mask
+
+    @property
+    def n_invalid(self):
+        return int(self.invalid.sum())
+
+    @property
+    def valid(self):
+        return not self.invalid.any()
+
+    def summary(self):
+        """
+        Returns {"<column>: <reason>": number of rows} for every failed check.
+        """
+        return {f"{column}: {reason}": int(mask.sum()) for column, reason, mask in self.errors}
+
+    def messages(self, limit=10):
+        """
+        Readable errors for the first `limit` invalid rows, e.g.
+        "row 3: Weather 'Hail' is not a known category".
+        """
+        messages = []
+        for i in np.flatnonzero(self.invalid)[:limit]:
+            for column, reason, mask in self.errors:
+                if mask[i]:
+                    value = self.source[column].iloc[i] if column in self.source.columns else None
+                    if isinstance(value, np.generic):
+                        value = value.item()
+                    messages.append(f"row {self.source.index[i]}: {column} {value!r} {reason}")
+        return messages
+
+
+class InputSchema:
+    """
+    Allowed categories per categorical column and allowed ranges per numeric column.
+    """
+
+    def __init__(self, categories: dict, ranges: dict):
+        self.categories = {column: list(values) for column, values in categories.items()}
+        self.ranges = {
+            column: None if bounds is None else (float(bounds[0]), float(bounds[1]))
+            for column, bounds in ranges.items()
+        }
+        self._build_lookups()
+
+    def _build_lookups(self):
+        self._dtypes = {column: pd.CategoricalDtype(values) for column, values in self.categories.items()}
+        self._allowed = {column: frozenset(values) for column, values in self.categories.items()}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_dtypes", None)
+        state.pop("_allowed", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._build_lookups()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, categorical_columns, numerical_columns, range_margin=0.1):
+        """
+        Learns the schema from training data.
+        """
+        categories = {column: sorted(df[column].dropna().unique()) for column in categorical_columns}
+        ranges = {}
+        for column in numerical_columns:
+            values = pd.to_numeric(df[column], errors="coerce")
+            low, high = values.min(), values.max()
+            if pd.isna(low):
+                ranges[column] = None
+                continue
+            pad = (high - low) * range_margin
+            lower, upper = PHYSICAL_BOUNDS.get(column, (-math.inf, math.inf))
+            ranges[column] = (max(low - pad, lower), min(high + pad, upper))
+        return cls(categories, ranges)
+
+    @classmethod
+    def from_categories(cls, categories: dict, numerical_columns):
+        """
+        Schema without learned ranges, for artifacts saved before schemas
+        existed: categories from the fitted encoder, numerics bounded only
+        physically.
+        """
+        return cls(categories, {column: PHYSICAL_BOUNDS.get(column) for column in numerical_columns})
+
+    def describe(self):
+        """
+        JSON-ready form, as stored in the artifact manifest under "schema".
+        """
+        schema = {column: {"type": "category", "categories": [str(c) for c in values]}
+                  for column, values in self.categories.items()}
+        for column, bounds in self.ranges.items():
+            schema[column] = {"type": "float64", "range": None if bounds is None else list(bounds)}
+        return schema
+
+    @classmethod
+    def from_manifest(cls, schema: dict):
+        """
+        Rebuilds the schema from its describe() form (a manifest's "schema").
+        """
+        categories = {c: spec["categories"] for c, spec in schema.items() if spec["type"] == "category"}
+        ranges = {c: spec.get("range") for c, spec in schema.items() if spec["type"] != "category"}
+        return cls(categories, ranges)
+
+    def save(self, file_path):
+        if os.path.dirname(file_path):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w") as f:
+            json.dump(self.describe(), f, indent=2)
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path) as f:
+            return cls.from_manifest(json.load(f))
+
+    def validate(self, df: pd.DataFrame) -> ValidationResult:
+        """
+        Checks every schema column of `df` at once and returns a ValidationResult
+        whose frame has the columns coerced. A missing column marks every row invalid
+        and is added all-missing, so the frame can still be scored.
+        """
+        coerced = {}
+        errors = []
+        n_rows = len(df)
+        for column, dtype in self._dtypes.items():
+            if column not in df.columns:
+                errors.append((column, "column is missing", np.ones(n_rows, dtype=bool)))
+                coerced[column] = pd.Series(pd.Categorical([None] * n_rows, dtype=dtype), index=df.index)
+                continue
+            values = df[column]
+            if values.dtype == dtype:
+                coerced[column] = values
+                continue
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                # Recode the (few) categories instead of hashing every row
+                categorical = values.cat.set_categories(dtype.categories)
+                unknown = categorical.isna().to_numpy() & values.notna().to_numpy()
+            else:
+                # One hash lookup per row; missing values and unknown categories both get
+                # code -1, and only those rows are checked for missingness
+                codes = dtype.categories.get_indexer(values)
+                categorical = pd.Series(pd.Categorical.from_codes(codes, dtype=dtype), index=df.index)
+                unknown = codes < 0
+                if unknown.any():
+                    rows = np.flatnonzero(unknown)
+                    unknown[rows] = values.iloc[rows].notna().to_numpy()
+            if unknown.any():
+                errors.append((column, "is not a known category", unknown))
+            coerced[column] = categorical
+
+        for column, bounds in self.ranges.items():
+            if column not in df.columns:
+                errors.append((column, "column is missing", np.ones(n_rows, dtype=bool)))
+                coerced[column] = pd.Series(np.full(n_rows, np.nan), index=df.index)
+                continue
+            values = df[column]
+            numbers = values if values.dtype == np.float64 else pd.to_numeric(values, errors="coerce").astype(np.float64)
+            array = numbers.to_numpy()
+            missing = np.isnan(array)
+            not_numeric = missing & values.notna().to_numpy()
+            if not_numeric.any():
+                errors.append((column, "is not a number", not_numeric))
+            if bounds is not None:
+                with np.errstate(invalid="ignore"):
+                    outside = ~missing & ((array < bounds[0]) | (array > bounds[1]))
+                if outside.any():
+                    errors.append((column, f"is outside [{bounds[0]:.6g}, {bounds[1]:.6g}]", outside))
+                    array = np.where(outside, np.nan, array)
+                    numbers = pd.Series(array, index=df.index)
+            coerced[column] = numbers
+
+        return ValidationResult(df.assign(**coerced), df, errors)
+
+    def record_errors(self, record) -> dict:
+        """
+        Checks one {column: value} mapping; returns {column: reason} for every
+        invalid value (empty when the record is valid).
+        """
+        errors = {}
+        for column, allowed in self._allowed.items():
+            value = record.get(column)
+            if value is None:
+                continue
+            try:
+                known = value != value or value in allowed
+            except TypeError:
+                # Unhashable JSON values (lists, objects) are never a category
+                known = False
+            if not known:
+                errors[column] = "is not a known category"
+        for column, bounds in self.ranges.items():
+            value = record.get(column)
+            if value is None:
+                continue
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                errors[column] = "is not a number"
+                continue
+            if bounds is not None and value == value and not bounds[0] <= value <= bounds[1]:
+                errors[column] = f"is outside [{bounds[0]:.6g}, {bounds[1]:.6g}]"
+        return errors
@@ -0,0 +1,168 @@
+import os
+import threading
+import time
+
+from src.logger import logging
+from src.utils import ARTIFACT_MANIFEST, file_sha256, load_artifact, load_object, wait_for_artifact
+
+
+class _RegistryEntry:
+    __slots__ = ("obj", "signature", "digest", "checked_at")
+
+    def __init__(self, obj, signature, digest):
+        self.obj = obj
+        self.signature = signature
+        self.digest = digest
+        self.checked_at = time.monotonic()
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of deserialized artifacts, keyed by absolute path.
+
+    An artifact is loaded lazily on first use and then served from memory. A
+    lookup stats the file at most once every `check_interval_seconds` (lookups in
+    between touch no file at all); if its mtime or size changed, the content hash
+    is recomputed and the artifact reloaded only when the hash differs, so a
+    retrain that overwrites the file is picked up without restarting the process.
+
+    A directory written by save_artifact is watched through its manifest (which
+    carries the payload's content hash) and loaded memory-mapped. A lookup that
+    lands in the middle of save_artifact's swap waits for the new directory, and
+    a load the swap overlapped is repeated.
+    """
+
+    def __init__(self, loader=load_object, check_interval_seconds=1.0):
+        self._loader = loader
+        self._check_interval = check_interval_seconds
+        self._lock = threading.Lock()
+        self._entries = {}
+        # Entries by the path as given, for lookups within the check interval
+        self._recent = {}
+
+    @staticmethod
+    def _signature(path):
+        # For artifact directories, the manifest stands in for the whole directory
+        if os.path.isdir(path):
+            path = os.path.join(path, ARTIFACT_MANIFEST)
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, file_path):
+        return self._entry(file_path).obj
+
+    def get_with_version(self, file_path):
+        """
+        Returns (artifact, content hash) from one lookup, so both describe the same load.
+        """
+        entry = self._entry(file_path)
+        return entry.obj, entry.digest
+
+    def peek(self, file_path):
+        """
+        Returns (artifact, content hash) when `file_path` was checked within the
+        check interval, else None; never touches the filesystem.
+        """
+        entry = self._fresh(file_path)
+        return None if entry is None else (entry.obj, entry.digest)
+
+    def _fresh(self, file_path):
+        entry = self._recent.get(file_path)
+        if entry is not None and time.monotonic() - entry.checked_at < self._check_interval:
+            return entry
+        return None
+
+    def _entry(self, file_path):
+        entry = self._fresh(file_path)
+        if entry is not None:
+            return entry
+        path = os.path.abspath(file_path)
+        for attempt in range(3):
+            if not wait_for_artifact(path):
+                raise FileNotFoundError(f"File not found: {file_path}")
+            try:
+                entry = self._get(path, file_path)
+                break
+            except FileNotFoundError:
+                # Swapped out by save_artifact between our checks; wait for the new one
+                if attempt == 2:
+                    raise
+        if entry.signature is not None:
+            # An artifact that kept changing while loading is checked again on the next lookup
+            entry.checked_at = time.monotonic()
+            self._recent[file_path] = entry
+        return entry
+
+    def _get(self, path, file_path):
+        if os.path.isdir(path) and not os.path.exists(os.path.join(path, ARTIFACT_MANIFEST)):
+            raise FileNotFoundError(f"Not an artifact directory (no {ARTIFACT_MANIFEST}): {file_path}")
+
+        # Fast path without the lock: unchanged file, already loaded
+        entry = self._entries.get(path)
+        if entry is not None and entry.signature == self._signature(path):
+            return entry
+
+        with self._lock:
+            signature = self._signature(path)
+            entry = self._entries.get(path)
+            if entry is not None and entry.signature == signature:
+                return entry
+
+            is_dir = os.path.isdir(path)
+            digest = file_sha256(os.path.join(path, ARTIFACT_MANIFEST) if is_dir else path)
+            if entry is not None and entry.digest == digest:
+                # Touched or rewritten with identical content: keep the loaded object
+                entry.signature = signature
+                return entry
+
+            if is_dir:
+                obj, signature, digest = self._load_artifact_dir(path, digest)
+            else:
+                obj = self._loader(path)
+            entry = self._entries[path] = _RegistryEntry(obj, signature, digest)
+            logging.info(f"Model registry loaded {path} (sha256={digest[:12]})")
+            return entry
+
+    def _load_artifact_dir(self, path, digest, attempts=3):
+        """
+        Loads an artifact directory, repeating the load when save_artifact
+        swapped it in the meantime (its manifest hash changed). Returns
+        (object, signature, manifest digest); the signature is None when the
+        artifact kept changing, so the next lookup loads it again.
+        """
+        manifest_path = os.path.join(path, ARTIFACT_MANIFEST)
+        for _ in range(attempts):
+            obj = load_artifact(path)
+            signature = self._signature(path)
+            loaded_digest, digest = digest, file_sha256(manifest_path)
+            if loaded_digest == digest:
+                return obj, signature, digest
+        return obj, None, digest
+
+    def version(self, file_path):
+        """
+        Returns the content hash of the currently loaded artifact, loading it if needed.
+        """
+        return self._entry(file_path).digest
+
+    def invalidate(self, file_path=None):
+        """
+        Drops one cached artifact, or all of them when no path is given.
+        """
+        with self._lock:
+            if file_path is None:
+                self._entries.clear()
+                self._recent.clear()
+            else:
+                entry = self._entries.pop(os.path.abspath(file_path), None)
+                self._recent = {key: value for key, value in self._recent.items() if value is not entry}
+
+
+_registry = ModelRegistry()
+
+
+def get_model_registry():
+    """
+    Returns the registry shared by every PredictPipeline and the app in this process.
+    """
+    return _registry
@@ -1,6 +1,27 @@
-import pandas as pd
-import joblib
+import json
 import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.logger import LogRateLimiter, StageTimer, log_error_record
+from src.Pipeline.inference_model import FEATURE_COLUMNS, InferenceModel
+from src.Pipeline.input_schema import InputSchema
+from src.Pipeline.model_registry import get_model_registry
+from src.Pipeline.prediction_cache import PredictionCache
+from src.utils import wait_for_artifact
+
+
+PREDICTION_COLUMN = "Predicted_Severity"
+PROBABILITY_PREFIX = "Prob_"
+# Per-row validation outcome added to predict_batch results in "flag" mode
+VALID_INPUT_COLUMN = "Valid_Input"
+# How PredictPipeline treats rows that fail InputSchema validation
+VALIDATION_MODES = ("off", "flag", "reject")
+# Which fused artifact PredictPipeline serves: the trained model or its distilled student
+BACKENDS = ("full", "distilled")
+
 
 class CustomData:
     def __init__(self, Weather, Road_Condition, Time_of_Day, Traffic, Accident_Type,
@@ -28,11 +49,348 @@ class CustomData:
             "Longitude": [self.Longitude]
         })
 
+    def get_data_as_dict(self):
+        return {column: getattr(self, column) for column in FEATURE_COLUMNS}
+
+
+@dataclass
+class PredictPipelineConfig:
+    # Fused preprocessor + model written by ModelTrainer: an artifact directory
+    # (memory-mapped, see src.utils.save_artifact) or a joblib pickle
+    inference_model_path: str = os.path.join("artifacts", "inference_model")
+    # Fused pickle written by older trainers, used when the artifact is absent
+    legacy_inference_model_path: str = os.path.join("artifacts", "inference_model.pkl")
+    # Separate artifacts, used only when no fused artifact exists yet. The sidecar
+    # ModelTrainer writes next to model.pkl names its preprocessor and input format;
+    # without one, model.pkl is only paired with the one-hot preprocessor when no
+    # native preprocessor (which it may have been trained on instead) exists
+    model_path: str = os.path.join("artifacts", "model.pkl")
+    model_metadata_path: str = os.path.join("artifacts", "model.json")
+    preprocessor_path: str = os.path.join("artifacts", "severity_preprocessor.pkl")
+    native_preprocessor_path: str = os.path.join("artifacts", "severity_preprocessor_native.pkl")
+    label_encoder_path: str = os.path.join("artifacts", "severity_label_encoder.pkl")
+    # Student written by ModelDistiller, served instead with backend="distilled"
+    distilled_model_path: str = os.path.join("artifacts", "inference_model_distilled")
+    backend: str = "full"
+    # Optional prediction cache (see PredictionCache); 0 entries disables it
+    cache_size: int = 0
+    cache_ttl_seconds: float = None
+    cache_coordinate_decimals: int = 3
+    # Input validation against the artifact's InputSchema: "flag" scores every row,
+    # with invalid values treated as missing, and marks them in VALID_INPUT_COLUMN;
+    # "reject" raises ValueError on any invalid row; "off" skips the checks
+    validation: str = "flag"
+    # Validation errors logged per source ("batch" / "record") every interval; the
+    # rest are counted and reported with the next record let through
+    validation_log_burst: int = 5
+    validation_log_interval_seconds: float = 60.0
+
+
+def iter_frame_chunks(df: pd.DataFrame, chunksize: int):
+    """
+    Yields consecutive row slices of `df` holding at most `chunksize` rows.
+    """
+    if chunksize <= 0:
+        raise ValueError("chunksize must be a positive integer")
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+def result_frame(index, labels, probabilities, classes) -> pd.DataFrame:
+    """
+    Builds the predict_batch result: the predicted label plus one probability
+    column per class when probabilities are available.
+    """
+    result = pd.DataFrame(index=index)
+    result[PREDICTION_COLUMN] = labels
+    if probabilities is not None:
+        for i, label in enumerate(classes):
+            result[f"{PROBABILITY_PREFIX}{label}"] = probabilities[:, i]
+    return result
+
+
+def score_frame(model: InferenceModel, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Scores a frame in the CustomData schema with an already loaded inference
+    model; same result as PredictPipeline.predict_batch without a cache.
+    """
+    return result_frame(df.index, *PredictPipeline._scores(model, df[FEATURE_COLUMNS]))
+
 
 class PredictPipeline:
-    def __init__(self):
-        model_path = os.path.join("artifacts", "model.pkl")
-        self.model = joblib.load(model_path)
+    def __init__(self, config: PredictPipelineConfig = None):
+        self.predict_pipeline_config = config or PredictPipelineConfig()
+        self.registry = get_model_registry()
+        config = self.predict_pipeline_config
+        if config.validation not in VALIDATION_MODES:
+            raise ValueError(f"validation must be one of {VALIDATION_MODES}, got {config.validation!r}")
+        if config.backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {BACKENDS}, got {config.backend!r}")
+        self._fallback_schema = None
+        self._model_metadata = None
+        self._served_path = None
+        self._validation_log = LogRateLimiter(config.validation_log_burst, config.validation_log_interval_seconds)
+        self.cache = PredictionCache(
+            max_entries=config.cache_size,
+            ttl_seconds=config.cache_ttl_seconds,
+            coordinate_decimals=config.cache_coordinate_decimals,
+        ) if config.cache_size > 0 else None
+        # Load eagerly so a missing artifact fails at construction, not first request
+        self.model
+
+    def _served(self):
+        """
+        Returns (inference model, version) of the artifact(s) currently served,
+        resolved together so the version always describes the returned model.
+        """
+        config = self.predict_pipeline_config
+        if config.backend == "distilled":
+            # No fallback: a missing student should fail loudly, not silently serve the slow model
+            return self.registry.get_with_version(config.distilled_model_path)
+        # The artifact served last, when the registry checked it within its interval
+        if self._served_path is not None:
+            served = self.registry.peek(self._served_path)
+            if served is not None:
+                return served
+        # Waits out a save_artifact swap rather than falling back while the directory is renamed
+        for path in (config.inference_model_path, config.legacy_inference_model_path):
+            if path and wait_for_artifact(path):
+                served = self.registry.get_with_version(path)
+                self._served_path = path
+                return served
+        self._served_path = None
+        return self._separate_model()
+
+    def model_version(self):
+        """
+        Content hash of the artifact(s) currently served; changes when a retrain replaces them.
+        """
+        return self._served()[1]
+
+    def _separate_artifacts(self):
+        """
+        Returns (preprocessor path, label encoder path or None, input format) of
+        model.pkl, read from ModelTrainer's sidecar. Raises when there is no
+        sidecar and model.pkl could belong to either preprocessor.
+        """
+        config = self.predict_pipeline_config
+        if os.path.exists(config.model_metadata_path):
+            stamp = os.stat(config.model_metadata_path).st_mtime_ns
+            if self._model_metadata is None or self._model_metadata[0] != stamp:
+                with open(config.model_metadata_path) as f:
+                    self._model_metadata = (stamp, json.load(f))
+            metadata = self._model_metadata[1]
+            return metadata["preprocessor_path"], metadata.get("label_encoder_path"), metadata.get("input_format")
+        if os.path.exists(config.native_preprocessor_path):
+            raise FileNotFoundError(
+                f"No fused inference artifact and no {config.model_metadata_path} naming the preprocessor "
+                f"{config.model_path} was trained on; retrain to write them"
+            )
+        # Saved before native-categorical models existed: the one-hot preprocessor is the only one
+        label_encoder_path = config.label_encoder_path if os.path.exists(config.label_encoder_path) else None
+        return config.preprocessor_path, label_encoder_path, None
+
+    def _separate_model(self):
+        """
+        Builds the inference model from the separate artifacts; returns (model, version).
+        """
+        preprocessor_path, label_encoder_path, input_format = self._separate_artifacts()
+        preprocessor, preprocessor_version = self.registry.get_with_version(preprocessor_path)
+        model, model_version = self.registry.get_with_version(self.predict_pipeline_config.model_path)
+        versions = [preprocessor_version, model_version]
+        # model.pkl predicts integer codes when a label encoder was saved next to it
+        label_encoder = None
+        if label_encoder_path:
+            label_encoder, label_encoder_version = self.registry.get_with_version(label_encoder_path)
+            versions.append(label_encoder_version)
+        inference_model = InferenceModel(
+            preprocessor=preprocessor,
+            model=model,
+            classes=None if label_encoder is None else label_encoder.classes_,
+            input_format=input_format,
+        )
+        return inference_model, "+".join(versions)
+
+    @property
+    def model(self):
+        """
+        The fused inference model, served from the process-wide registry.
+        Looked up on every access so a retrained artifact is picked up automatically.
+        """
+        return self._served()[0]
+
+    @property
+    def schema(self):
+        return self._schema(*self._served())
+
+    def _schema(self, model, version):
+        """
+        The InputSchema saved in the served artifact; for artifacts saved before
+        schemas existed, one built from the fitted encoder's categories.
+        """
+        if model.schema is not None:
+            return model.schema
+        if self._fallback_schema is None or self._fallback_schema[0] != version:
+            categories = model.get_categories()
+            numerical_columns = [c for c in FEATURE_COLUMNS if c not in categories]
+            self._fallback_schema = (version, InputSchema.from_categories(categories, numerical_columns))
+        return self._fallback_schema[1]
+
+    def validate(self, data: pd.DataFrame):
+        """
+        Validates a frame against the schema; returns the ValidationResult
+        (per-row error mask, coerced frame, readable messages).
+        """
+        return self.schema.validate(data)
+
+    def _validated(self, data: pd.DataFrame, schema):
+        """
+        Applies the configured validation mode to a frame; returns
+        (frame to score, ValidationResult or None).
+        """
+        if self.predict_pipeline_config.validation == "off":
+            return data, None
+        validation = schema.validate(data)
+        if not validation.valid:
+            if self.predict_pipeline_config.validation == "reject":
+                raise ValueError(f"{validation.n_invalid} of {len(data)} rows failed validation: "
+                                 + "; ".join(validation.messages(limit=5)))
+            suppressed = self._validation_log.allow("batch")
+            if suppressed is not None:
+                log_error_record("validation_error", source="batch", rows=len(data),
+                                 invalid_rows=validation.n_invalid, checks=validation.summary(),
+                                 suppressed=suppressed)
+        return validation.frame, validation
 
     def predict(self, data: pd.DataFrame):
-        return self.model.predict(data)
+        with StageTimer("predict", rows=len(data)):
+            model, version = self._served()
+            data, _ = self._validated(data, self._schema(model, version))
+            if self.cache is not None:
+                return self._cached_scores(model, version, data[FEATURE_COLUMNS])[0]
+            return model.predict(data)
+
+    def predict_record(self, record):
+        """
+        Scores one {column: value} mapping, e.g. CustomData.get_data_as_dict(),
+        without building a DataFrame. Returns (label, {class: probability}).
+        Not stage-timed: a log record would cost more than the prediction.
+        """
+        # One lookup per record: the schema, cache version and model all come from it
+        model, version = self._served()
+        if self.predict_pipeline_config.validation != "off":
+            errors = self._schema(model, version).record_errors(record)
+            if errors:
+                if self.predict_pipeline_config.validation == "reject":
+                    details = "; ".join(f"{column} {record.get(column)!r} {reason}" for column, reason in errors.items())
+                    raise ValueError(f"Record failed validation: {details}")
+                suppressed = self._validation_log.allow("record")
+                if suppressed is not None:
+                    # Invalid values are treated as missing
+                    log_error_record("validation_error", source="record", errors=errors,
+                                     values={column: record.get(column) for column in errors},
+                                     suppressed=suppressed)
+                record = {key: None if key in errors else value for key, value in record.items()}
+        if self.cache is None:
+            return model.predict_record(record)
+        self.cache.check_version(version)
+        key = self.cache.record_key(record)
+        cached = self.cache.get(key)
+        if cached is None:
+            label, probabilities = model.predict_record(record)
+            # Same (label, probability row) entry as the batch path stores
+            cached = (label, np.fromiter(probabilities.values(), dtype=np.float64) if probabilities else None)
+            self.cache.put(key, cached, version)
+        label, probabilities = cached
+        return label, {} if probabilities is None else dict(zip(model.classes_, probabilities))
+
+    def cache_stats(self):
+        """
+        Returns the prediction cache counters, or None when caching is disabled.
+        """
+        return None if self.cache is None else self.cache.stats()
+
+    def get_categories(self):
+        """
+        Returns {categorical column: categories learned by the fitted encoder}.
+        """
+        return self.model.get_categories()
+
+    def predict_batch(self, data, chunksize: int = None):
+        """
+        Scores many rows with one vectorized model call per chunk.
+
+        `data` is either a DataFrame in the CustomData schema or an iterator of
+        such DataFrames (e.g. `pd.read_csv(..., chunksize=...)`). A DataFrame
+        without `chunksize` returns a single result frame; otherwise a generator
+        yielding one result frame per chunk is returned, so callers can stream
+        arbitrarily large inputs.
+
+        Each result frame shares the index of its input chunk and holds the
+        predicted label plus one probability column per class when the model
+        supports `predict_proba`. Unless validation is "off" it also holds
+        VALID_INPUT_COLUMN, False for rows that failed validation.
+        """
+        if isinstance(data, pd.DataFrame):
+            if chunksize is None:
+                return self._score_frame(data)
+            data = iter_frame_chunks(data, chunksize)
+        return (self._score_frame(chunk) for chunk in data)
+
+    def _score_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        with StageTimer("predict_batch", rows=len(df)):
+            return self._score_frame_untimed(df)
+
+    def _score_frame_untimed(self, df: pd.DataFrame) -> pd.DataFrame:
+        model, version = self._served()
+        df, validation = self._validated(df, self._schema(model, version))
+        if self.cache is None:
+            result = score_frame(model, df)
+        else:
+            result = result_frame(df.index, *self._cached_scores(model, version, df[FEATURE_COLUMNS]))
+        if validation is not None:
+            result[VALID_INPUT_COLUMN] = ~validation.invalid
+        return result
+
+    @staticmethod
+    def _scores(model, features):
+        """
+        Returns (labels, probabilities or None, classes) for a feature frame.
+        """
+        if not hasattr(model.model, "predict_proba"):
+            return model.predict(features), None, None
+
+        # One predict_proba pass gives both outputs; argmax over it is what
+        # predict() computes for the classifiers ModelTrainer selects from.
+        probabilities = model.predict_proba(features)
+        classes = model.classes_
+        return classes[probabilities.argmax(axis=1)], probabilities, classes
+
+    def _cached_scores(self, model, version, features):
+        """
+        _scores through the prediction cache: only rows whose key is not cached
+        (each distinct key once) reach the model, and the results are merged
+        back in input order.
+        """
+        self.cache.check_version(version)
+        keys = self.cache.make_keys(features)
+        cached = self.cache.get_many(keys)
+
+        # First position of every distinct missing key
+        missing = {}
+        for i, (key, value) in enumerate(zip(keys, cached)):
+            if value is None and key not in missing:
+                missing[key] = i
+        if missing:
+            labels, probabilities, _ = self._scores(model, features.iloc[list(missing.values())])
+            scored = {key: (labels[j], None if probabilities is None else probabilities[j])
+                      for j, key in enumerate(missing)}
+            self.cache.put_many(scored.keys(), scored.values(), version)
+            cached = [scored[key] if value is None else value for key, value in zip(keys, cached)]
+
+        has_proba = hasattr(model.model, "predict_proba")
+        labels = np.array([value[0] for value in cached], dtype=object)
+        if not has_proba:
+            return labels, None, None
+        probabilities = np.array([value[1] for value in cached], dtype=np.float64).reshape(len(cached), -1)
+        return labels, probabilities, model.classes_
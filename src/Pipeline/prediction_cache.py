@@ -0,0 +1,162 @@
+"""Bounded LRU/TTL cache of prediction results for repeated feature combinations.
+
+Every CustomData input except the coordinates is a low-cardinality category, so
+live traffic keeps sending the same combinations. PredictionCache keys a result
+on the categorical values plus the coordinates rounded to
+`coordinate_decimals` places (3 decimals ~ 110 m; None keeps them exact), so
+points that close together share one entry.
+
+Entries are tagged with the model version they were computed with (the
+registry's content hash); the first lookup under a new version empties the
+cache, and writes computed under any other version are dropped, so a
+retrained artifact never serves stale results.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from src.Pipeline.inference_model import FEATURE_COLUMNS
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU mapping of feature key -> cached result, with an optional
+    time-to-live per entry and hit / miss / eviction counters.
+    """
+
+    def __init__(self, max_entries=100_000, ttl_seconds=None, coordinate_decimals=3,
+                 categorical_columns=None, coordinate_columns=("Latitude", "Longitude")):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be a positive integer")
+        self.max_entries = int(max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.coordinate_decimals = coordinate_decimals
+        self.coordinate_columns = list(coordinate_columns)
+        self.categorical_columns = list(
+            categorical_columns or [c for c in FEATURE_COLUMNS if c not in self.coordinate_columns]
+        )
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def _quantize(self, values):
+        values = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=np.float64)
+        if self.coordinate_decimals is not None:
+            values = np.round(values, self.coordinate_decimals)
+        # NaN never equals itself, so missing values key as None
+        return [None if v != v else v for v in values.tolist()]
+
+    def make_keys(self, df: pd.DataFrame):
+        """
+        Returns one hashable key per row of `df`.
+        """
+        columns = [
+            [None if v is None or v != v else v for v in df[c].tolist()] for c in self.categorical_columns
+        ]
+        columns += [self._quantize(df[c]) for c in self.coordinate_columns]
+        return list(zip(*columns))
+
+    def record_key(self, record):
+        """
+        Key of one {column: value} mapping; same key as make_keys gives its row.
+        """
+        key = []
+        for column in self.categorical_columns:
+            value = record.get(column)
+            key.append(None if value is None or value != value else value)
+        for column in self.coordinate_columns:
+            value = record.get(column)
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                value = math.nan
+            if value != value:
+                key.append(None)
+            else:
+                # np.round, not round(): it must match the batch path bit for bit
+                key.append(value if self.coordinate_decimals is None
+                           else float(np.round(value, self.coordinate_decimals)))
+        return tuple(key)
+
+    def check_version(self, version):
+        """
+        Empties the cache when `version` differs from the one its entries were computed with.
+        """
+        if version == self.version:
+            return
+        with self._lock:
+            if version != self.version:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self.version = version
+
+    def get_many(self, keys):
+        """
+        Returns the cached value for each key, None for misses, refreshing the LRU order.
+        """
+        now = time.monotonic()
+        out = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] is not None and entry[0] <= now:
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    self.misses += 1
+                    out.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    out.append(entry[1])
+        return out
+
+    def put_many(self, keys, values, version=None):
+        """
+        Stores results computed with model `version`; dropped when the cache has
+        moved to another version since (a scorer racing a reload).
+        """
+        expires = None if self.ttl_seconds is None else time.monotonic() + self.ttl_seconds
+        with self._lock:
+            if version != self.version:
+                return
+            for key, value in zip(keys, values):
+                self._entries[key] = (expires, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, key):
+        return self.get_many([key])[0]
+
+    def put(self, key, value, version=None):
+        self.put_many([key], [value], version)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Returns the counters, the current size and the hit rate.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "version": self.version,
+        }
@@ -0,0 +1,358 @@
+"""Asyncio streaming stage on top of PredictPipeline, for continuous incident feeds.
+
+    source --(inbox, queue_size records)--> batcher --(max_in_flight batches)--> results
+
+The batcher closes a micro-batch at max_batch_size records, or max_wait_ms after
+its first record arrived, and scores it with PredictPipeline.predict_batch in a
+thread executor. Batches are awaited in the order they were formed, so results
+come out in arrival order. Both stages are bounded: when scoring falls behind,
+the batcher stops taking records, the inbox fills and the source is no longer
+read (backpressure) instead of events piling up in memory.
+
+Usage:
+    python -m src.Pipeline.stream_pipeline [--input events.jsonl|-] [--output scored.jsonl|-]
+                                           [--max-batch-size 256] [--max-wait-ms 20]
+                                           [--queue-size 1024] [--max-in-flight 2]
+                                           [--backend full|distilled]
+
+Input is JSON Lines of CustomData objects ("-", the default, reads stdin line by
+line as events arrive) or a CSV/Parquet file in the raw dataset schema; a line
+that is not a JSON object is logged and skipped. Output is JSON Lines: each
+record's fields plus "severity", "probabilities" and, when the pipeline
+validates input, "valid_input" (False for records scored with invalid values
+treated as missing).
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import NamedTuple
+
+import pandas as pd
+
+# Ensure project root is in sys.path for src imports
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.logger import LogRateLimiter, log_error_record, logging, skip_unused_record_fields
+from src.Pipeline.predict_pipeline import (
+    FEATURE_COLUMNS,
+    PREDICTION_COLUMN,
+    PROBABILITY_PREFIX,
+    VALID_INPUT_COLUMN,
+    CustomData,
+    PredictPipeline,
+    PredictPipelineConfig,
+)
+
+# Marks the end of the source in the inbox and of the batches in the outbox
+_END = object()
+
+
+@dataclass
+class StreamPipelineConfig:
+    max_batch_size: int = 256        # Records scored together in one predict_batch call
+    max_wait_ms: float = 20.0        # How long the first record of a batch waits for company
+    queue_size: int = 1024           # Records buffered between the source and the batcher
+    max_in_flight: int = 2           # Batches being scored or waiting to be consumed
+
+
+class ScoredRecord(NamedTuple):
+    record: CustomData
+    severity: str
+    probabilities: dict
+    valid: bool = None               # VALID_INPUT_COLUMN; None when the pipeline does not validate
+
+
+def _as_dict(record):
+    return record.get_data_as_dict() if isinstance(record, CustomData) else dict(record)
+
+
+class StreamPredictor:
+    """
+    Scores an async iterator of CustomData records (or {column: value} dicts)
+    in micro-batches; see the module docstring.
+    """
+
+    def __init__(self, pipeline: PredictPipeline = None, config: StreamPipelineConfig = None):
+        self.stream_pipeline_config = config or StreamPipelineConfig()
+        self.pipeline = pipeline or PredictPipeline()
+
+    def score_batch(self, records):
+        """
+        Scores a list of records in one predict_batch call; returns their
+        ScoredRecords. Runs in the executor.
+        """
+        frame = pd.DataFrame.from_records([_as_dict(record) for record in records], columns=FEATURE_COLUMNS)
+        result = self.pipeline.predict_batch(frame)
+        probability_columns = [c for c in result.columns if c.startswith(PROBABILITY_PREFIX)]
+        classes = [c[len(PROBABILITY_PREFIX):] for c in probability_columns]
+        # No probability columns (a model without predict_proba) gives empty rows
+        probabilities = result[probability_columns].to_numpy().tolist()
+        if VALID_INPUT_COLUMN in result.columns:
+            valid = result[VALID_INPUT_COLUMN].tolist()
+        else:
+            valid = [None] * len(records)
+        return [
+            ScoredRecord(record, label, dict(zip(classes, row)), is_valid)
+            for record, label, row, is_valid in zip(records, result[PREDICTION_COLUMN].tolist(), probabilities, valid)
+        ]
+
+    async def _feed(self, records, inbox):
+        try:
+            async for record in records:
+                await inbox.put(record)
+        except Exception as e:
+            # Hand the failure down the pipeline rather than leaving the batcher waiting
+            await inbox.put(e)
+        else:
+            await inbox.put(_END)
+
+    async def _batch(self, inbox, outbox, slots, executor):
+        config = self.stream_pipeline_config
+        loop = asyncio.get_running_loop()
+        max_wait = config.max_wait_ms / 1000.0
+        # A get() still waiting when the previous batch hit its deadline; reused so no record is lost
+        pending = None
+        try:
+            while True:
+                first = await (pending or inbox.get())
+                pending = None
+                if first is _END or isinstance(first, BaseException):
+                    await outbox.put(first)
+                    return
+
+                batch, terminal = [first], None
+                deadline = loop.time() + max_wait
+                while len(batch) < config.max_batch_size:
+                    if not inbox.empty():
+                        item = inbox.get_nowait()
+                    else:
+                        timeout = deadline - loop.time()
+                        if timeout <= 0:
+                            break
+                        pending = asyncio.ensure_future(inbox.get())
+                        finished, _ = await asyncio.wait({pending}, timeout=timeout)
+                        if not finished:
+                            break
+                        item, pending = pending.result(), None
+                    if item is _END or isinstance(item, BaseException):
+                        terminal = item
+                        break
+                    batch.append(item)
+
+                # Wait for a free slot before scoring: this is where backpressure starts
+                await slots.acquire()
+                await outbox.put(loop.run_in_executor(executor, self.score_batch, batch))
+                if terminal is not None:
+                    await outbox.put(terminal)
+                    return
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def stream_batches(self, records):
+        """
+        Async generator of micro-batches: one list of ScoredRecords per
+        predict_batch call, in arrival order.
+        """
+        config = self.stream_pipeline_config
+        inbox = asyncio.Queue(maxsize=config.queue_size)
+        outbox = asyncio.Queue()
+        slots = asyncio.Semaphore(config.max_in_flight)
+        executor = ThreadPoolExecutor(config.max_in_flight, thread_name_prefix="stream-scorer")
+        tasks = [
+            asyncio.ensure_future(self._feed(records, inbox)),
+            asyncio.ensure_future(self._batch(inbox, outbox, slots, executor)),
+        ]
+        try:
+            while True:
+                item = await outbox.get()
+                if item is _END:
+                    return
+                if isinstance(item, BaseException):
+                    log_error_record("stream_error", level=logging.ERROR,
+                                     error_type=type(item).__name__, message=str(item))
+                    raise item
+                try:
+                    scored = await item
+                finally:
+                    slots.release()
+                yield scored
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # Batches already handed to a worker finish there; nothing waits for them
+            executor.shutdown(wait=False)
+
+    async def stream(self, records):
+        """
+        Async generator of ScoredRecord(record, severity, probabilities), one
+        per input record, in arrival order.
+        """
+        async for batch in self.stream_batches(records):
+            for scored in batch:
+                yield scored
+
+
+def _custom_data(values):
+    # Missing keys and NaN (empty CSV cells) become None, which the preprocessors impute
+    cleaned = {}
+    for column in FEATURE_COLUMNS:
+        value = values.get(column)
+        cleaned[column] = None if value is None or value != value else value
+    return CustomData(**cleaned)
+
+
+async def read_records(path="-", chunksize=10_000, block_bytes=1 << 16):
+    """
+    Async generator of CustomData records from JSON Lines (a file, or stdin for
+    "-") or from a CSV/Parquet file. Blocking reads run in the default executor;
+    stdin is read a line at a time so each event is passed on as it arrives.
+    A JSON line that does not parse to an object is logged (rate limited) and
+    skipped rather than ending the stream.
+    """
+    loop = asyncio.get_running_loop()
+    if path != "-" and os.path.splitext(path)[1].lower() in (".csv", ".parquet", ".pq"):
+        from src.Pipeline.bulk_predict import iter_input_chunks
+
+        chunks = iter_input_chunks(path, chunksize)
+        while True:
+            chunk = await loop.run_in_executor(None, next, chunks, None)
+            if chunk is None:
+                return
+            for values in chunk[FEATURE_COLUMNS].to_dict("records"):
+                yield _custom_data(values)
+
+    source = sys.stdin if path == "-" else open(path)
+    error_log = LogRateLimiter()
+    line_number = 0
+    try:
+        while True:
+            if source is sys.stdin:
+                line = await loop.run_in_executor(None, source.readline)
+                lines = [line] if line else []
+            else:
+                lines = await loop.run_in_executor(None, source.readlines, block_bytes)
+            if not lines:
+                return
+            for line in lines:
+                line_number += 1
+                if not line.strip():
+                    continue
+                try:
+                    values = json.loads(line)
+                    if not isinstance(values, dict):
+                        raise ValueError("each record must be a JSON object")
+                except ValueError as e:
+                    suppressed = error_log.allow("read_records")
+                    if suppressed is not None:
+                        log_error_record("bad_record", source=path, line=line_number,
+                                         error_type=type(e).__name__, message=str(e), suppressed=suppressed)
+                    continue
+                yield _custom_data(values)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+
+class JsonLinesSink:
+    """
+    Writes micro-batches of ScoredRecords as JSON Lines to a file or stdout
+    ("-"), flushed once per batch.
+    """
+
+    def __init__(self, path="-"):
+        self.path = path
+        self.rows_written = 0
+        self._file = sys.stdout if path == "-" else open(path, "w")
+
+    async def write(self, batch):
+        text = "".join(json.dumps(self._row(scored)) + "\n" for scored in batch)
+        # A slow reader on the other end of a pipe blocks here, not the event loop
+        await asyncio.get_running_loop().run_in_executor(None, self._write, text)
+        self.rows_written += len(batch)
+
+    @staticmethod
+    def _row(scored):
+        row = {**_as_dict(scored.record), "severity": scored.severity, "probabilities": scored.probabilities}
+        if scored.valid is not None:
+            row["valid_input"] = scored.valid
+        return row
+
+    def _write(self, text):
+        self._file.write(text)
+        self._file.flush()
+
+    def close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+async def run_stream(input_path="-", output_path="-", config: StreamPipelineConfig = None,
+                     pipeline: PredictPipeline = None):
+    """
+    Scores `input_path` into `output_path` (see read_records / JsonLinesSink).
+
+    Returns:
+        tuple: (records scored, elapsed seconds)
+    """
+    predictor = StreamPredictor(pipeline, config)
+    logging.info(f"Stream prediction started: {input_path} -> {output_path}")
+    start = time.perf_counter()
+    with JsonLinesSink(output_path) as sink:
+        async for batch in predictor.stream_batches(read_records(input_path)):
+            await sink.write(batch)
+    elapsed = time.perf_counter() - start
+    logging.info(f"Stream prediction completed: {sink.rows_written} records in {elapsed:.2f}s")
+    return sink.rows_written, elapsed
+
+
+def main(argv=None):
+    defaults = StreamPipelineConfig()
+    parser = argparse.ArgumentParser(
+        prog="stream-predict",
+        description="Score a stream of accident records (JSON Lines) in micro-batches.",
+    )
+    parser.add_argument("--input", default="-", help="JSON Lines, CSV or Parquet file; '-' reads stdin")
+    parser.add_argument("--output", default="-", help="JSON Lines file to write; '-' writes stdout")
+    parser.add_argument("--max-batch-size", type=int, default=defaults.max_batch_size)
+    parser.add_argument("--max-wait-ms", type=float, default=defaults.max_wait_ms)
+    parser.add_argument("--queue-size", type=int, default=defaults.queue_size)
+    parser.add_argument("--max-in-flight", type=int, default=defaults.max_in_flight)
+    parser.add_argument("--model-path", default=None,
+                        help="artifact directory or pickle to load (default: PredictPipelineConfig.inference_model_path)")
+    parser.add_argument("--backend", choices=("full", "distilled"), default="full")
+    args = parser.parse_args(argv)
+    skip_unused_record_fields()
+
+    pipeline_config = PredictPipelineConfig(backend=args.backend)
+    if args.model_path:
+        pipeline_config.inference_model_path = args.model_path
+    config = StreamPipelineConfig(
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        queue_size=args.queue_size,
+        max_in_flight=args.max_in_flight,
+    )
+    rows, elapsed = asyncio.run(run_stream(args.input, args.output, config, PredictPipeline(pipeline_config)))
+    rate = rows / elapsed if elapsed else float("inf")
+    # stdout may be the sink, so the summary goes to stderr
+    print(f"Scored {rows} records in {elapsed:.2f}s ({rate:,.0f} records/sec) -> {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""End-to-end training driver with a content-addressed stage cache.
+
+Usage:
+    python -m src.Pipeline.train_pipeline [--force] [--max-cache-size-mb 2048] [--max-cache-age-days 30]
+                                          [--no-distill]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from dataclasses import asdict, dataclass
+
+# Ensure project root is in sys.path for src imports
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.Components.data_ingestion import DataIngestion
+from src.Components.data_transformation import DataTransformation
+from src.Components.model_distillation import ModelDistiller
+from src.Components.model_trainer import MODEL_INPUT_FORMATS, ModelTrainer
+from src.exception import CustomException
+from src.logger import logging
+from src.Pipeline.artifact_cache import ArtifactCache, fingerprint
+from src.utils import load_object, save_object
+
+# Layout of the cached evaluate_models report entries; bump it when the entry
+# changes so entries of the old layout miss. 2: (model, score, fit s, evaluation)
+REPORT_ENTRY_VERSION = 2
+
+@dataclass
+class TrainPipelineConfig:
+    cache_dir: str = os.path.join("artifacts", "cache")
+    max_cache_bytes: int = 2 * 1024 ** 3          # Evict least recently used entries beyond this size
+    max_cache_age_days: float = 30.0              # Evict entries unused for longer than this
+    distill: bool = True                          # Export a distilled low-latency model (see ModelDistiller)
+
+
+def _put_objects(cache, key, objects: dict, files: dict = None):
+    """
+    Stores pickled `objects` ({name: obj}) and existing `files` ({name: path}) as one cache entry.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        outputs = dict(files or {})
+        for name, obj in objects.items():
+            path = os.path.join(tmp_dir, name)
+            save_object(path, obj)
+            outputs[name] = path
+        return cache.put(key, outputs)
+
+
+class ModelReportCache:
+    """
+    Per-model cache handed to ModelTrainer. An entry is keyed on the transformed
+    data, the model's own parameters, its hyperparameter grid, its input
+    format and the search settings, so editing one model's grid only
+    invalidates that model.
+    """
+
+    def __init__(self, cache, data_key, search_settings, force=False, used_keys=None):
+        self.cache = cache
+        self.data_key = data_key
+        self.search_settings = search_settings
+        self.force = force
+        self.used_keys = used_keys if used_keys is not None else set()
+
+    def _key(self, name, model, grid):
+        return fingerprint("model", REPORT_ENTRY_VERSION, self.data_key, name, model.get_params(), grid,
+                           MODEL_INPUT_FORMATS.get(name), self.search_settings)
+
+    def load(self, name, model, grid):
+        if self.force:
+            return None
+        key = self._key(name, model, grid)
+        entry_dir = self.cache.get(key)
+        if entry_dir is None:
+            return None
+        self.used_keys.add(key)
+        logging.info(f"Stage cache hit: model '{name}'")
+        return load_object(os.path.join(entry_dir, "report_entry.pkl"))
+
+    def store(self, name, model, grid, entry):
+        key = self._key(name, model, grid)
+        _put_objects(self.cache, key, {"report_entry.pkl": entry})
+        self.used_keys.add(key)
+
+
+class TrainPipeline:
+    """
+    Runs ingestion -> transformation -> model training -> distillation, reusing cached stage
+    outputs whose input fingerprint (raw-file hash, stage configs and, for each
+    model, its hyperparameter grid) is unchanged.
+    """
+
+    def __init__(self, config: TrainPipelineConfig = None):
+        self.train_pipeline_config = config or TrainPipelineConfig()
+        self.cache = ArtifactCache(
+            self.train_pipeline_config.cache_dir,
+            max_bytes=self.train_pipeline_config.max_cache_bytes,
+            max_age_seconds=self.train_pipeline_config.max_cache_age_days * 24 * 3600,
+        )
+        self.data_ingestion = DataIngestion()
+        self.data_transformation = DataTransformation()
+        self.model_trainer = ModelTrainer()
+        self.model_distiller = ModelDistiller()
+
+    def run_ingestion(self, force, used_keys):
+        ingestion_config = self.data_ingestion.ingestion_config
+        raw_hash = self.cache.file_fingerprint(ingestion_config.source_data_path)
+        key = fingerprint("ingestion", raw_hash, asdict(ingestion_config))
+        used_keys.add(key)
+
+        entry_dir = None if force else self.cache.get(key)
+        if entry_dir is None:
+            train_path, test_path = self.data_ingestion.initiate_data_ingestion()
+            names = {
+                "train" + os.path.splitext(train_path)[1]: train_path,
+                "test" + os.path.splitext(test_path)[1]: test_path,
+            }
+            entry_dir = self.cache.put(key, names)
+        else:
+            logging.info("Stage cache hit: data ingestion")
+
+        # Downstream stages read the cached copies directly
+        train_name = next(name for name in os.listdir(entry_dir) if name.startswith("train"))
+        test_name = next(name for name in os.listdir(entry_dir) if name.startswith("test"))
+        return key, os.path.join(entry_dir, train_name), os.path.join(entry_dir, test_name)
+
+    def run_transformation(self, ingestion_key, train_path, test_path, force, used_keys):
+        transformation_config = self.data_transformation.data_transformation_config
+        key = fingerprint("transformation", ingestion_key, asdict(transformation_config))
+        used_keys.add(key)
+        restored = {
+            "preprocessor.pkl": transformation_config.preprocessor_obj_file_path,
+            "compiled_preprocessor.pkl": transformation_config.compiled_preprocessor_obj_file_path,
+            "label_encoder.pkl": transformation_config.label_encoder_obj_file_path,
+            "native_preprocessor.pkl": transformation_config.native_preprocessor_obj_file_path,
+            "input_schema.json": transformation_config.input_schema_file_path,
+        }
+        if transformation_config.geo_features:
+            restored["geo_index"] = transformation_config.geo_index_file_path
+
+        entry_dir = None if force else self.cache.get(key)
+        if entry_dir is None:
+            *arrays, preprocessor_path = self.data_transformation.initiate_data_transformation(
+                train_path, test_path
+            )
+            native_train, native_test, _ = self.data_transformation.initiate_native_transformation(
+                train_path, test_path
+            )
+            _put_objects(self.cache, key, {
+                "arrays.pkl": tuple(arrays),
+                "native_frames.pkl": (native_train, native_test),
+            }, files=restored)
+        else:
+            logging.info("Stage cache hit: data transformation")
+            arrays = load_object(os.path.join(entry_dir, "arrays.pkl"))
+            native_train, native_test = load_object(os.path.join(entry_dir, "native_frames.pkl"))
+            # Put the fitted preprocessors back where the rest of the project expects them
+            for name, destination in restored.items():
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                source = os.path.join(entry_dir, name)
+                if os.path.isdir(source):
+                    shutil.rmtree(destination, ignore_errors=True)
+                    shutil.copytree(source, destination)
+                else:
+                    shutil.copy2(source, destination)
+            preprocessor_path = transformation_config.compiled_preprocessor_obj_file_path
+
+        native_features = (native_train, native_test, transformation_config.native_preprocessor_obj_file_path)
+        return key, list(arrays), native_features, preprocessor_path
+
+    def run(self, force=False):
+        """
+        Runs the whole training pipeline. `force` recomputes every stage and
+        overwrites its cache entries. Returns the ModelTrainer report, followed
+        by the latency/accuracy table of the distilled students.
+        """
+        try:
+            used_keys = set()
+            ingestion_key, train_path, test_path = self.run_ingestion(force, used_keys)
+            transformation_key, arrays, native_features, preprocessor_path = self.run_transformation(
+                ingestion_key, train_path, test_path, force, used_keys
+            )
+            X_train, y_train, X_test, y_test = arrays
+
+            model_cache = ModelReportCache(
+                self.cache,
+                data_key=transformation_key,
+                search_settings=self.model_trainer.model_trainer_config.search_settings(),
+                force=force,
+                used_keys=used_keys,
+            )
+            report = self.model_trainer.initiate_model_trainer(
+                X_train, y_train, X_test, y_test, preprocessor_path,
+                label_encoder_path=self.data_transformation.data_transformation_config.label_encoder_obj_file_path,
+                input_schema_path=self.data_transformation.data_transformation_config.input_schema_file_path,
+                model_cache=model_cache,
+                native_features=native_features,
+            )
+            if self.train_pipeline_config.distill:
+                # Not cached: it depends on the model just saved and takes a fraction of the search time
+                _, distillation = self.model_distiller.initiate_model_distillation(train_path, test_path)
+                report = f"{report}\n\n{ModelDistiller.format_report(distillation)}"
+
+            self.cache.evict(keep=used_keys)
+            return report
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the accident severity model, reusing cached stages.")
+    parser.add_argument("--force", action="store_true", help="ignore the stage cache and recompute everything")
+    parser.add_argument("--cache-dir", default=TrainPipelineConfig.cache_dir)
+    parser.add_argument("--max-cache-size-mb", type=float, default=TrainPipelineConfig.max_cache_bytes / 1024 ** 2)
+    parser.add_argument("--max-cache-age-days", type=float, default=TrainPipelineConfig.max_cache_age_days)
+    parser.add_argument("--no-distill", action="store_true", help="skip the distilled low-latency model export")
+    args = parser.parse_args(argv)
+
+    config = TrainPipelineConfig(
+        cache_dir=args.cache_dir,
+        max_cache_bytes=int(args.max_cache_size_mb * 1024 ** 2),
+        max_cache_age_days=args.max_cache_age_days,
+        distill=not args.no_distill,
+    )
+    print(TrainPipeline(config).run(force=args.force))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
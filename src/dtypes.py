@@ -0,0 +1,124 @@
+"""Dtype registry for the accident schema, applied wherever the accident data is read.
+
+pd.read_csv reads every text column as Python-object strings and every
+coordinate as float64. The registry reads them compactly instead:
+
+    categorical columns, Severity : category (int8 codes plus one copy of each label)
+    Latitude, Longitude           : float32 (~0.4 m resolution at these coordinates)
+                                    in memory; readers whose rows are written back out,
+                                    fitted on or scored pass compact_coordinates=False
+                                    and keep the source's float64 values
+    Date, Time                    : category while raw; read_accidents replaces them
+                                    with the int8/int16 TIMESTAMP_FEATURES
+
+Timestamp features are parsed once per distinct Date/Time value (a few hundred
+dates, at most 86,400 times of day) and mapped onto the rows through the
+category codes, instead of parsing every row's string.
+"""
+import numpy as np
+import pandas as pd
+
+# Categorical model inputs; imported from here by modules that must stay cheap to import
+CATEGORICAL_FEATURES = (
+    "Weather",
+    "Road_Condition",
+    "Time_of_Day",
+    "Traffic",
+    "Accident_Type",
+    "Vehicle_Type",
+    "Accident_Reason",
+)
+CATEGORY_COLUMNS = (*CATEGORICAL_FEATURES, "Severity")
+COORDINATE_COLUMNS = ("Latitude", "Longitude")
+TIMESTAMP_COLUMNS = ("Date", "Time")
+
+ACCIDENT_DTYPES = {
+    **{column: "category" for column in TIMESTAMP_COLUMNS},
+    **{column: "category" for column in CATEGORY_COLUMNS},
+    **{column: "float32" for column in COORDINATE_COLUMNS},
+}
+# ACCIDENT_DTYPES with the coordinates kept exactly as in the source file
+EXACT_COORDINATE_DTYPES = {**ACCIDENT_DTYPES, **{column: "float64" for column in COORDINATE_COLUMNS}}
+
+DATE_FORMAT = "%d-%m-%Y"
+TIME_FORMAT = "%H:%M:%S"
+# Raw column -> (parse format, {feature: (DatetimeIndex attribute, dtype)});
+# missing or unparseable values become -1
+TIMESTAMP_FEATURES = {
+    "Date": (DATE_FORMAT, {
+        "Year": ("year", "int16"),
+        "Month": ("month", "int8"),
+        "Day": ("day", "int8"),
+        "Day_of_Week": ("dayofweek", "int8"),
+    }),
+    "Time": (TIME_FORMAT, {
+        "Hour": ("hour", "int8"),
+        "Minute": ("minute", "int8"),
+        "Second": ("second", "int8"),
+    }),
+}
+
+
+def _dtypes(compact_coordinates):
+    return ACCIDENT_DTYPES if compact_coordinates else EXACT_COORDINATE_DTYPES
+
+
+def apply_dtypes(df: pd.DataFrame, compact_coordinates=True) -> pd.DataFrame:
+    """
+    Casts the registry columns of a frame read some other way (an upload,
+    Parquet/Feather partitions) to the registry dtypes; other columns are kept.
+    """
+    casts = {column: dtype for column, dtype in _dtypes(compact_coordinates).items()
+             if column in df.columns and df[column].dtype != dtype}
+    return df.astype(casts) if casts else df
+
+
+def add_timestamp_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Replaces the raw Date/Time columns with their TIMESTAMP_FEATURES.
+    """
+    features = {}
+    for column, (fmt, parts) in TIMESTAMP_FEATURES.items():
+        if column not in df.columns:
+            continue
+        values = df[column]
+        if not isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype("category")
+        parsed = pd.to_datetime(values.cat.categories.astype(str), format=fmt, errors="coerce")
+        codes = values.cat.codes.to_numpy()
+        for name, (attribute, dtype) in parts.items():
+            # One entry per category plus a trailing -1 that code -1 (missing) picks
+            table = np.append(pd.Index(getattr(parsed, attribute)).fillna(-1).to_numpy(), -1).astype(dtype)
+            features[name] = table[codes]
+    if not features:
+        return df
+    return df.drop(columns=[c for c in TIMESTAMP_FEATURES if c in df.columns]).assign(**features)
+
+
+def compact_frame(df: pd.DataFrame, timestamps=True, compact_coordinates=True) -> pd.DataFrame:
+    """
+    apply_dtypes, then (with `timestamps`) add_timestamp_features.
+    """
+    df = apply_dtypes(df, compact_coordinates)
+    return add_timestamp_features(df) if timestamps else df
+
+
+def read_accidents(path, timestamps=True, compact_coordinates=True, **read_csv_kwargs):
+    """
+    pd.read_csv with the registry dtypes. With `timestamps`, Date/Time come back
+    as TIMESTAMP_FEATURES; without, as raw categories (for writing the data back
+    out unchanged). Without `compact_coordinates`, Latitude/Longitude stay float64.
+    Accepts read_csv's keyword arguments; with `chunksize` it returns an iterator
+    of compacted chunks.
+    """
+    reader = pd.read_csv(path, dtype=_dtypes(compact_coordinates), **read_csv_kwargs)
+    if read_csv_kwargs.get("chunksize") is None and not read_csv_kwargs.get("iterator"):
+        return add_timestamp_features(reader) if timestamps else reader
+    return (add_timestamp_features(chunk) if timestamps else chunk for chunk in reader)
+
+
+def memory_per_million_rows(df: pd.DataFrame) -> float:
+    """
+    Bytes the frame's columns take per million rows, object strings included.
+    """
+    return float(df.memory_usage(deep=True, index=False).sum()) * 1e6 / max(len(df), 1)
@@ -1,31 +1,67 @@
-import traceback   # Used to extract detailed stack trace information
 import sys         # Gives access to system-specific parameters and functions (like current exception info)
 
 # Custom exception class that extends Python's built-in Exception class
 class CustomException(Exception):
+    """
+    Exception carrying where the error happened, raised by every pipeline stage:
 
-    # Constructor method for initializing the custom exception
-    def _init_(self, error_message, error_detail: sys):
-        super()._init_(error_message)  # Call the base Exception constructor
-        # Create a detailed error message using the static method below
-        self.error_message = self.get_detailed_error_message(error_message, error_detail)
+        except Exception as e:
+            raise CustomException(e, sys)
 
-    # Static method to build a detailed error message with file name & line number
-    @staticmethod
-    def get_detailed_error_message(error_message, error_detail: sys):
-        
-        # Get the traceback object from the current exception
-        _, _, exc_tb = sys.exc_info()
+    Only the file name and line number are captured when it is raised; the
+    "Error in <file> , line <n> : <message>" text is built when it is printed,
+    and to_record() gives the same details as a structured log record.
+    """
 
-        # Extract the file name where the exception occurred
-        file_name = exc_tb.tb_frame.f_code.co_filename
+    # Constructor method for initializing the custom exception
+    def __init__(self, error_message, error_detail: sys = sys):
+        super().__init__(error_message)  # Call the base Exception constructor
+        if isinstance(error_message, CustomException):
+            # Re-raised by an outer stage: keep the location and type of the original error
+            self.file_name, self.line_number = error_message.file_name, error_message.line_number
+            self.error_type, self.message = error_message.error_type, error_message.message
+            return
+        self.file_name, self.line_number = self.get_error_location(error_message, error_detail)
+        # Type of the wrapped exception, or of this one when raised with a plain message
+        self.error_type = type(error_message).__name__ if isinstance(error_message, BaseException) else type(self).__name__
+        self.message = str(error_message)
 
-        # Extract the line number where the exception occurred
-        line_number = exc_tb.tb_lineno
+    # Static method to find the file name & line number where the error occurred
+    @staticmethod
+    def get_error_location(error_message, error_detail: sys = sys):
+        # Traceback of the wrapped exception, else of the exception being handled
+        exc_tb = getattr(error_message, "__traceback__", None) or error_detail.exc_info()[2]
+        if exc_tb is None:
+            # Raised with a plain message outside an except block: report the raising frame
+            frame = sys._getframe(2)
+            return frame.f_code.co_filename, frame.f_lineno
+        # The innermost frame is where the exception was raised
+        while exc_tb.tb_next is not None:
+            exc_tb = exc_tb.tb_next
+        return exc_tb.tb_frame.f_code.co_filename, exc_tb.tb_lineno
 
+    # Static method kept for callers that only need the formatted text
+    @staticmethod
+    def get_detailed_error_message(error_message, error_detail: sys = sys):
+        file_name, line_number = CustomException.get_error_location(error_message, error_detail)
         # Return a formatted error string with file name, line number, and the message
         return f"Error in {file_name} , line {line_number} : {error_message}"
-    
+
+    @property
+    def error_message(self):
+        return f"Error in {self.file_name} , line {self.line_number} : {self.message}"
+
+    def to_record(self):
+        """
+        The error as a structured record for src.logger.log_error_record.
+        """
+        return {
+            "error_type": self.error_type,
+            "file": self.file_name,
+            "line": self.line_number,
+            "message": self.message,
+        }
+
     # When the exception object is converted to string, return the detailed error message
-    def _str_(self):
-        return self.error_message
\ No newline at end of file
+    def __str__(self):
+        return self.error_message
@@ -1,16 +1,28 @@
 """For logging execution and errors"""
+# Import functools to preserve function metadata in the stage decorator
+import functools
+# Import json to emit structured stage records
+import json
 # Import Python's built-in logging module
 import logging
 # Import os module for file path operations (like creating log directory)
 import os
+# Import queue for the non-blocking handler's buffer
+import queue
+# Import sys for platform checks
+import sys
+# Import threading to track the active stage per thread
+import threading
+# Import time for wall-clock and CPU timers
+import time
 # Import datetime module for timestamping log files
 from datetime import datetime
+# Import the queue handler / listener pair that moves file writes off the caller's thread
+from logging.handlers import QueueHandler, QueueListener
 
 
 #Name of the log folder where logs will be stored
 LOG_DIR = "logs"
-#create log folder if it doesn't exist
-os.makedirs(LOG_DIR, exist_ok=True)
 
 
 
@@ -19,20 +31,145 @@ LOG_FILE = os.path.join(
     LOG_DIR,
     f"log_{datetime.now().strftime('%Y-%m-%d')}.log")
 
-#Configure the ROOT logger once for whole application
+
+class LazyFileHandler(logging.FileHandler):
+    """
+    FileHandler that creates the log folder and opens the file on the first
+    record instead of at import, so importing src.logger (e.g. from a prediction
+    worker that never logs) touches no files.
+    """
+
+    def __init__(self, filename, mode="a", encoding=None):
+        super().__init__(filename, mode=mode, encoding=encoding, delay=True)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+class _FlushMarker:
+    # Queued by BackgroundQueueHandler.flush; set once the listener reaches it
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class _Listener(QueueListener):
+    def handle(self, record):
+        if isinstance(record, _FlushMarker):
+            for handler in self.handlers:
+                handler.flush()
+            record.done.set()
+        else:
+            super().handle(record)
+
+
+class BackgroundQueueHandler(QueueHandler):
+    """
+    Non-blocking handler: the calling thread only puts the record on an
+    in-process queue, and a listener thread formats it and writes it with the
+    wrapped handlers. The listener starts with the first record (so, like
+    LazyFileHandler, importing src.logger starts nothing), is restarted in a
+    forked child, and is drained and stopped at exit by logging.shutdown.
+
+    Records are queued unformatted, so the message (and any JSON payload, see
+    JsonMessage) is built on the listener thread. Arguments passed to a log call
+    must therefore not be mutated afterwards.
+    """
+
+    def __init__(self, *handlers):
+        super().__init__(queue.SimpleQueue())
+        self.handlers = handlers
+        self.listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _start(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # A forked child inherits the queue but not the thread draining it
+            self.queue = queue.SimpleQueue()
+            self.listener = _Listener(self.queue, *self.handlers, respect_handler_level=True)
+            self.listener.start()
+            self._pid = os.getpid()
+
+    def _after_fork(self):
+        self._start_lock = threading.Lock()
+        self.listener, self._pid = None, None
+
+    def prepare(self, record):
+        # Only the traceback must be rendered now: its frames change once the caller moves on
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        if self._pid != os.getpid():
+            self._start()
+        super().emit(record)
+
+    def flush(self, timeout=None):
+        """
+        Blocks until every record queued so far has been written.
+        """
+        if self.listener is not None and self._pid == os.getpid():
+            marker = _FlushMarker()
+            self.queue.put(marker)
+            marker.done.wait(timeout)
+
+    def close(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                self.listener.stop()
+            self.listener, self._pid = None, None
+        super().close()
+
+
+#Write all logs to this file, opened when the first record is written, from a background thread
+_file_handler = LazyFileHandler(LOG_FILE)
+#Log message format:
+#   - %(asctime)s: Timestamp of the log entry
+#   - %(levelname)s: Log level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+#   - %(message)s: The actual log message
+_file_handler.setFormatter(logging.Formatter("[%(asctime)s] %(levelname)s - %(message)s"))
+log_handler = BackgroundQueueHandler(_file_handler)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=log_handler._after_fork)
+
+#Configure the ROOT logger once for whole application (a no-op if the
+#embedding application configured logging first). logging.shutdown closes
+#log_handler at exit, which drains the queue.
 logging.basicConfig(
-    #Write all logs to this file
-    filename=LOG_FILE,
-    #Log message format:
-    #   - %(asctime)s: Timestamp of the log entry
-    #   - %(levelname)s: Log level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
-    #   - %(message)s: The actual log message
-    format="[%(asctime)s] %(levelname)s - %(message)s",
+    handlers=[log_handler],
     # Minumum log level to record (INFO)
     level=logging.INFO
 )
 
 
+def skip_unused_record_fields():
+    """
+    Stops the logging module from looking up each record's caller (file,
+    function, line), thread and process, which the format above never uses and
+    which are about half the cost of creating a record. These are process-wide
+    logging settings, so only entry points that own the whole process (the
+    serving CLIs' main()) call this; importing src.logger changes nothing.
+    """
+    # The documented switches for this (see "Optimization" in the logging HOWTO)
+    logging._srcfile = None
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+
+def flush_logs():
+    """
+    Waits until every record logged so far is in the log file (e.g. before
+    reading it back or before a process hands over to another).
+    """
+    log_handler.flush()
+
+
 def get_logger(name) :
     """
     Returns a named logger that inherits the root configuration above.
@@ -43,4 +180,233 @@ def get_logger(name) :
     #Ensure this logger emits INFO and above messages
     logger.setLevel(logging.INFO)
     # Return the configured logger
-    return logger
\ No newline at end of file
+    return logger
+
+
+class JsonMessage:
+    """
+    Log message that renders `record` (a dict) as JSON when the record is
+    formatted, i.e. on the listener thread rather than in the caller.
+    """
+
+    __slots__ = ("record",)
+
+    def __init__(self, record):
+        self.record = record
+
+    def __str__(self):
+        return json.dumps(self.record, default=str)
+
+
+# ---------------------------------------------------------------------------
+# Stage instrumentation: timing, memory and optional profiling
+# ---------------------------------------------------------------------------
+try:
+    # Unix-only; peak RSS is reported as None where it is unavailable (e.g. Windows)
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+# Comma-separated stage names to profile, or "*" for every stage
+PROFILE_STAGES_ENV = "SRC_PROFILE_STAGES"
+# "cprofile" (default, stdlib) or "pyinstrument" (if installed)
+PROFILER_ENV = "SRC_PROFILER"
+PROFILE_DIR = os.path.join(LOG_DIR, "profiles")
+
+# All stage records go through this logger so they are easy to filter
+stage_logger = logging.getLogger("src.instrumentation")
+
+# Per-thread stack of active StageTimers, so code inside a stage can attach its row count
+_active_stages = threading.local()
+
+
+def _peak_rss_mb():
+    """Process peak resident set size in MB (high-water mark since start)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _profiling_requested(stage):
+    wanted = os.environ.get(PROFILE_STAGES_ENV, "")
+    if not wanted:
+        return False
+    names = {name.strip() for name in wanted.split(",")}
+    return "*" in names or stage in names
+
+
+class StageTimer:
+    """
+    Measures one pipeline stage and logs a structured JSON record:
+        {"event": "stage", "stage": ..., "wall_s": ..., "cpu_s": ...,
+         "peak_rss_mb": ..., "peak_rss_growth_mb": ..., "rows": ..., "status": "ok"|"error"}
+
+    Use as a context manager (set `.rows` inside the block when the row count
+    is known) or as a decorator via `timed_stage`. peak_rss_mb is the process
+    high-water mark when the stage ends; peak_rss_growth_mb is how much the
+    stage raised it.
+
+    When the stage is listed in $SRC_PROFILE_STAGES, the block also runs under
+    cProfile (or pyinstrument with $SRC_PROFILER=pyinstrument) and the profile
+    is written to logs/profiles/.
+    """
+
+    # Only the outermost profiled stage is profiled; profilers do not nest
+    _profiling_active = False
+
+    def __init__(self, stage, rows=None, logger=None):
+        self.stage = stage
+        self.rows = rows
+        self.logger = logger or stage_logger
+        self.record = None
+        self._profiler = None
+
+    def __enter__(self):
+        if _profiling_requested(self.stage) and not StageTimer._profiling_active:
+            self._start_profiler()
+        self._peak_start = _peak_rss_mb()
+        self._cpu_start = time.process_time()
+        self._wall_start = time.perf_counter()
+        if not hasattr(_active_stages, "stack"):
+            _active_stages.stack = []
+        _active_stages.stack.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall_start
+        cpu = time.process_time() - self._cpu_start
+        peak = _peak_rss_mb()
+        _active_stages.stack.pop()
+        if self._profiler is not None:
+            self._stop_profiler()
+
+        self.record = {
+            "event": "stage",
+            "stage": self.stage,
+            "wall_s": round(wall, 6),
+            "cpu_s": round(cpu, 6),
+            "peak_rss_mb": None if peak is None else round(peak, 1),
+            "peak_rss_growth_mb": None if peak is None else round(peak - self._peak_start, 1),
+            "rows": self.rows,
+            "status": "ok" if exc_type is None else "error",
+        }
+        self.logger.info(JsonMessage(self.record), extra={"stage_metrics": self.record})
+        return False
+
+    def _start_profiler(self):
+        StageTimer._profiling_active = True
+        if os.environ.get(PROFILER_ENV, "cprofile").lower() == "pyinstrument":
+            from pyinstrument import Profiler
+
+            self._profiler = Profiler()
+            self._profiler.start()
+        else:
+            import cProfile
+
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def _stop_profiler(self):
+        StageTimer._profiling_active = False
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        base = os.path.join(PROFILE_DIR, f"{self.stage.replace('/', '_')}_{stamp}")
+        if hasattr(self._profiler, "disable"):
+            self._profiler.disable()
+            self._profiler.dump_stats(f"{base}.prof")
+            path = f"{base}.prof"
+        else:
+            self._profiler.stop()
+            path = f"{base}.html"
+            with open(path, "w") as f:
+                f.write(self._profiler.output_html())
+        self.logger.info(f"Profile for stage '{self.stage}' written to {path}")
+        self._profiler = None
+
+
+def timed_stage(stage):
+    """
+    Decorator form of StageTimer: @timed_stage("model_trainer").
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with StageTimer(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def set_stage_rows(rows):
+    """
+    Sets the row count reported by the innermost active stage in this thread.
+    Lets a @timed_stage function report rows once it knows them.
+    """
+    stack = getattr(_active_stages, "stack", None)
+    if stack:
+        stack[-1].rows = rows
+
+
+def log_stage_record(stage, **fields):
+    """
+    Logs a structured record for work measured elsewhere (e.g. in a worker process).
+    """
+    record = {"event": "stage", "stage": stage, **fields}
+    stage_logger.info(JsonMessage(record), extra={"stage_metrics": record})
+    return record
+
+
+# ---------------------------------------------------------------------------
+# Structured, rate-limited error records
+# ---------------------------------------------------------------------------
+# Error records for bad input and failed requests go through this logger
+error_logger = logging.getLogger("src.errors")
+
+
+class LogRateLimiter:
+    """
+    Lets at most `burst` records per key through every `interval` seconds and
+    counts the rest, so a batch in which every row fails the same way costs one
+    record and a dict lookup per suppressed row rather than a flood of lines.
+
+        suppressed = limiter.allow("predict_batch")
+        if suppressed is not None:
+            log_error_record("validation_error", ..., suppressed=suppressed)
+
+    allow() returns None when the record should be dropped, otherwise the number
+    of records dropped for that key since the previous one let through.
+    """
+
+    def __init__(self, burst=5, interval=60.0):
+        self.burst = burst
+        self.interval = interval
+        # key -> [window start, records allowed in the window, records suppressed]
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def allow(self, key):
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = 0 if window is None else window[2]
+                self._windows[key] = [now, 1, 0]
+                return suppressed
+            if window[1] < self.burst:
+                window[1] += 1
+                return 0
+            window[2] += 1
+            return None
+
+
+def log_error_record(event, level=logging.WARNING, logger=None, **fields):
+    """
+    Logs a structured record {"event": event, **fields} (rendered as JSON on
+    the listener thread) and returns it. Field values that are not JSON types
+    are written with str().
+    """
+    record = {"event": event, **fields}
+    (logger or error_logger).log(level, JsonMessage(record), extra={"error_record": record})
+    return record
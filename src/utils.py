@@ -1,43 +1,491 @@
+import hashlib
+import inspect
+import json
+import math
 import os
-import joblib
-from sklearn.model_selection import GridSearchCV
+import shutil
+import sys
+import time
+import warnings
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from src.dtypes import compact_frame, read_accidents
+from src.logger import StageTimer, log_stage_record, logging, set_stage_rows, timed_stage
+
+# joblib, scipy and sklearn are imported inside the functions that use them: this
+# module sits on the serving import path, which should not load the training stack.
+
+
+def issparse(X):
+    """
+    scipy.sparse.issparse without importing scipy: if scipy.sparse was never
+    imported, X cannot be a sparse matrix.
+    """
+    sparse = sys.modules.get("scipy.sparse")
+    return sparse is not None and sparse.issparse(X)
 
 
 def save_object(file_path, obj):
     """
     Saves a Python object to the specified file path using joblib.
+    Writes to a temporary file first and renames it into place, so readers
+    never observe a partially written artifact.
     """
+    import joblib
+
     os.makedirs(os.path.dirname(file_path), exist_ok=True)
-    joblib.dump(obj, file_path)
+    tmp_path = f"{file_path}.tmp"
+    joblib.dump(obj, tmp_path)
+    os.replace(tmp_path, file_path)
 
 
 def load_object(file_path):
     """
     Loads a Python object from the specified file path using joblib.
     """
+    import joblib
+
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
     return joblib.load(file_path)
 
 
-def evaluate_models(X_train, y_train, X_test, y_test, models: dict, param: dict):
+def file_sha256(file_path, chunk_size=1 << 20):
+    """
+    Returns the hex SHA-256 digest of a file, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Layout of an artifact directory written by save_artifact
+ARTIFACT_FORMAT_VERSION = 1
+ARTIFACT_MANIFEST = "manifest.json"
+ARTIFACT_PAYLOAD = "payload.joblib"
+
+
+def save_artifact(directory, obj, manifest=None):
+    """
+    Saves `obj` as an artifact directory:
+
+        payload.joblib : the object, dumped uncompressed so every numpy array in
+                         it can be memory-mapped by load_artifact
+        manifest.json  : `manifest` (schema, feature names, metrics, ...) plus the
+                         format version, object type, payload size and content hash
+
+    The directory is written next to its destination and swapped in whole, so
+    readers never see a payload that does not match its manifest. The swap is
+    two renames (a directory cannot be replaced atomically): between them the
+    destination is briefly missing while `<directory>.old` exists, which
+    wait_for_artifact recognizes, so readers wait for the new directory
+    instead of treating the artifact as absent. Returns the manifest dict.
+    """
+    import joblib
+
+    directory = os.path.normpath(directory)
+    parent = os.path.dirname(directory) or "."
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = f"{directory}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    payload_path = os.path.join(tmp_dir, ARTIFACT_PAYLOAD)
+    joblib.dump(obj, payload_path, compress=0)
+    manifest = {
+        "format_version": ARTIFACT_FORMAT_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "object": f"{type(obj).__module__}.{type(obj).__qualname__}",
+        **(manifest or {}),
+        "payload": ARTIFACT_PAYLOAD,
+        "payload_bytes": os.path.getsize(payload_path),
+        "content_hash": file_sha256(payload_path),
+    }
+    with open(os.path.join(tmp_dir, ARTIFACT_MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2, default=str)
+
+    # Swap directories: rename the old one aside first, since a rename cannot replace a non-empty directory
+    old_dir = f"{directory}.old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(directory):
+        os.replace(directory, old_dir)
+    os.replace(tmp_dir, directory)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return manifest
+
+
+def wait_for_artifact(path, timeout=5.0, poll_interval=0.001):
+    """
+    Returns whether `path` exists, first waiting (up to `timeout` seconds) while
+    save_artifact is between the two renames of its swap. A path that is simply
+    absent returns False at once.
+    """
+    old_dir = f"{os.path.normpath(path)}.old"
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        if not os.path.exists(old_dir) or time.monotonic() > deadline:
+            # Either no swap is running, or one left the .old directory behind
+            return os.path.exists(path)
+        time.sleep(poll_interval)
+    return True
+
+
+def is_artifact(path):
+    return os.path.isfile(os.path.join(path, ARTIFACT_MANIFEST))
+
+
+def read_manifest(directory):
+    """
+    Returns the manifest of an artifact directory without loading its payload.
+    """
+    manifest_path = os.path.join(directory, ARTIFACT_MANIFEST)
+    if not (wait_for_artifact(directory) and os.path.exists(manifest_path)):
+        raise FileNotFoundError(f"Artifact manifest not found: {manifest_path}")
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def load_artifact(directory, mmap_mode="r", verify=False):
+    """
+    Loads the object saved by save_artifact. With mmap_mode="r" its numpy arrays
+    are read-only memory maps of the payload file, shared through the page cache
+    by every process that loads the same artifact. `verify` re-hashes the payload
+    against the manifest's content hash first.
+    """
+    import joblib
+
+    manifest = read_manifest(directory)
+    if manifest.get("format_version") != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format version {manifest.get('format_version')} in {directory}")
+    payload_path = os.path.join(directory, manifest["payload"])
+    if verify and file_sha256(payload_path) != manifest["content_hash"]:
+        raise ValueError(f"Artifact payload does not match its manifest hash: {payload_path}")
+    return joblib.load(payload_path, mmap_mode=mmap_mode)
+
+
+def read_dataset(path, timestamps=True, compact_coordinates=True):
+    """
+    Reads a dataset written by DataIngestion: a CSV file, a single Parquet/Feather
+    file, or a directory of Parquet/Feather partitions. Feather partitions are
+    memory-mapped rather than read into intermediate buffers. Columns come back
+    in the src.dtypes registry dtypes, with Date/Time as timestamp features
+    (raw categories when `timestamps` is False) and float32 coordinates (float64
+    without `compact_coordinates`).
+    """
+
+    if os.path.isdir(path):
+        parts = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.endswith((".feather", ".parquet"))
+        )
+        if not parts:
+            raise FileNotFoundError(f"No dataset partitions found in: {path}")
+    elif os.path.exists(path):
+        parts = [path]
+    else:
+        raise FileNotFoundError(f"File not found: {path}")
+
+    if parts[0].endswith(".csv"):
+        return read_accidents(parts[0], timestamps=timestamps, compact_coordinates=compact_coordinates)
+
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+
+    tables = [
+        feather.read_table(part, memory_map=True) if part.endswith(".feather") else pq.read_table(part)
+        for part in parts
+    ]
+    # Partitions may carry different category dictionaries; promote them to one schema
+    return compact_frame(pa.concat_tables(tables, promote_options="permissive").to_pandas(), timestamps=timestamps,
+                        compact_coordinates=compact_coordinates)
+
+
+# Feature layouts a model can be trained and served on (see as_model_input)
+INPUT_FORMATS = ("dense", "csr")
+
+
+def as_model_input(X, input_format):
     """
-    Trains and evaluates multiple models using GridSearchCV.
-    
+    Returns the feature matrix X in the given layout:
+        "csr"   : scipy CSR matrix (kept sparse; what linear models and XGBoost take fastest)
+        "dense" : float32 ndarray (what sklearn's tree models convert to internally)
+        None    : X unchanged
+    """
+    if input_format is None:
+        return X
+    if input_format == "csr":
+        from scipy import sparse
+
+        return X if sparse.issparse(X) and X.format == "csr" else sparse.csr_matrix(X)
+    if input_format == "dense":
+        if issparse(X):
+            X = X.toarray()
+        return np.asarray(X, dtype=np.float32)
+    raise ValueError(f"Unknown input format: {input_format}")
+
+
+@timed_stage("evaluate_models")
+def evaluate_models(X_train, y_train, X_test, y_test, models: dict, param: dict,
+                    search="grid", n_jobs=-1, cv=3, factor=3,
+                    time_budget=None, cpu_budget=None, random_state=42, input_formats=None,
+                    feature_sets=None, cross_validate=True):
+    """
+    Trains and evaluates multiple models.
+
+    X_train / X_test may be dense arrays or sparse matrices. `input_formats`
+    maps model name -> "dense" | "csr" (see as_model_input); each layout is
+    built once and shared by the models that use it. Models not listed get
+    the matrices unchanged. A format may also name an entry of `feature_sets`,
+    {name: (X_train, X_test)}, for models trained on other features of the
+    same rows (e.g. the native categorical frames).
+
+    search="grid" runs one GridSearchCV per model, one model after another.
+    search="halving" schedules every (model, params, fold) fit of all models in
+    one shared worker pool and prunes weak configurations by successive halving;
+    `time_budget` (wall seconds) and `cpu_budget` (CPU seconds summed over all
+    fits) stop the search early, keeping each model's best configuration so far.
+
+    Both modes cross-validate on the same folds (see FoldCache) and score each
+    fit with one timed predict pass (see prediction_metrics). In halving mode,
+    `cross_validate=False` skips the fold fits of models with a single
+    candidate (their "cv" entry is then None).
+
     Returns:
-        dict: model name -> (best_model, best_score)
+        dict: model name -> (best_model, best_score, fit_seconds, evaluation), where
+        evaluation is {"test": metrics, "cv": fold-averaged metrics, "cv_rows": rows}
     """
+    from src.Components.model_evaluation import FoldCache
+
+    set_stage_rows(X_train.shape[0])
+    formats = {name: (input_formats or {}).get(name) for name in models}
+    feature_sets = feature_sets or {}
+    train_inputs, test_inputs = {}, {}
+    for fmt in set(formats.values()):
+        if fmt in feature_sets:
+            train_inputs[fmt], test_inputs[fmt] = feature_sets[fmt]
+        else:
+            train_inputs[fmt], test_inputs[fmt] = as_model_input(X_train, fmt), as_model_input(X_test, fmt)
+
+    y_train, y_test = np.asarray(y_train), np.asarray(y_test)
+    n_classes = int(max(y_train.max(), y_test.max())) + 1
+    folds = FoldCache(y_train, cv, random_state)
+
+    if search == "halving":
+        return _halving_search(
+            {name: (fmt, train_inputs[fmt]) for name, fmt in formats.items()}, y_train,
+            {name: test_inputs[fmt] for name, fmt in formats.items()}, y_test, models, param,
+            folds=folds, n_classes=n_classes, n_jobs=n_jobs, factor=factor,
+            time_budget=time_budget, cpu_budget=cpu_budget, cross_validate=cross_validate,
+        )
+    if search != "grid":
+        raise ValueError(f"Unknown search mode: {search}")
+
+    from sklearn.model_selection import GridSearchCV
+
+    from src.Components.model_evaluation import prediction_metrics
+
     report = {}
 
     for name, model in models.items():
         params = param.get(name, {})
 
-        gs = GridSearchCV(model, params, cv=3, n_jobs=-1, verbose=0)
-        gs.fit(X_train, y_train)
+        start = time.perf_counter()
+        with StageTimer(f"evaluate_models/{name}", rows=X_train.shape[0]):
+            gs = GridSearchCV(model, params, cv=folds.splits, scoring=prediction_metrics, refit="accuracy",
+                              n_jobs=n_jobs, verbose=0)
+            gs.fit(train_inputs[formats[name]], y_train)
+        fit_seconds = time.perf_counter() - start
 
         best_model = gs.best_estimator_
-        score = best_model.score(X_test, y_test)
+        test = prediction_metrics(best_model, test_inputs[formats[name]], y_test, n_classes)
+        score = test["accuracy"]
+
+        results, best = gs.cv_results_, gs.best_index_
+        cv_metrics = {"folds": len(folds)}
+        for key in results:
+            if key.startswith("mean_test_"):
+                metric = key[len("mean_test_"):]
+                cv_metrics[metric] = float(results[key][best])
+                cv_metrics[f"{metric}_std"] = float(results[f"std_test_{metric}"][best])
+
+        report[name] = (best_model, score, fit_seconds,
+                        {"test": test, "cv": cv_metrics, "cv_rows": folds.min_train_rows})
+        logging.info(f"{name}: test score {score:.4f}, fit time {fit_seconds:.2f}s")
+
+    return report
 
-        report[name] = (best_model, score)
 
+def _limit_threads(estimator):
+    """
+    Pins an estimator to one thread so the shared worker pool is the only
+    source of parallelism and workers do not oversubscribe the CPUs.
+    """
+    params = estimator.get_params()
+    if type(estimator).__module__.startswith("sklearn"):
+        # sklearn already treats n_jobs=None as a single thread
+        if params.get("n_jobs") not in (None, 1):
+            estimator.set_params(n_jobs=1)
+        return estimator
+    # XGBoost/CatBoost default to every core when left unset
+    accepted = set(params) | set(inspect.signature(type(estimator).__init__).parameters)
+    for name in ("n_jobs", "thread_count"):
+        if name in accepted:
+            estimator.set_params(**{name: 1})
+    return estimator
+
+
+def _fit_and_score(task, estimator, fold, n_resources, n_classes):
+    """
+    Fits on the first `n_resources` (shuffled) training rows of a cached fold
+    and scores the fold's validation rows in one prediction_metrics pass.
+    """
+    from sklearn.base import clone
+
+    from src.Components.model_evaluation import prediction_metrics
+
+    X_tr, y_tr, X_va, y_va = fold
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    X_tr = X_tr.iloc[:n_resources] if isinstance(X_tr, pd.DataFrame) else X_tr[:n_resources]
+    estimator = clone(estimator).fit(X_tr, y_tr[:n_resources])
+    fit_seconds = time.perf_counter() - wall_start
+    metrics = prediction_metrics(estimator, X_va, y_va, n_classes)
+    return task, metrics, fit_seconds, time.process_time() - cpu_start
+
+
+def _refit_and_score(estimator, X_train, y_train, X_test, y_test, n_classes):
+    from sklearn.base import clone
+
+    from src.Components.model_evaluation import prediction_metrics
+
+    start = time.perf_counter()
+    estimator = clone(estimator).fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    return estimator, prediction_metrics(estimator, X_test, y_test, n_classes), fit_seconds
+
+
+def _halving_search(X_train, y_train, X_test, y_test, models, param, folds, n_classes, n_jobs, factor,
+                    time_budget, cpu_budget, cross_validate=True):
+    """
+    Successive halving over all models at once. X_train maps each model name
+    to (feature set name, training matrix), X_test to its test matrix; the
+    fold matrices of each feature set come from `folds` (a FoldCache) and are
+    sliced once for all models and rounds.
+
+    Round k fits every surviving candidate on the first r_k rows of each
+    (shuffled) training fold, with r_k growing by `factor` per round up to the
+    full fold; each model then keeps its best ceil(n / factor) candidates. A
+    model is done once a single candidate is left. All fits of a round share
+    one joblib pool, so fast models do not wait for a slow model's search.
+    With `cross_validate`, models with a single candidate are cross-validated
+    on the full folds next to the final refits.
+    """
+    from joblib import Parallel, delayed
+    from sklearn.base import clone
+    from sklearn.model_selection import ParameterGrid
+
+    from src.Components.model_evaluation import mean_metrics
+
+    search_start = time.perf_counter()
+    cpu_used = 0.0
+
+    candidates = {
+        name: [_limit_threads(clone(model).set_params(**p)) for p in ParameterGrid(param.get(name, {}))]
+        for name, model in models.items()
+    }
+    scores = {name: [None] * len(cands) for name, cands in candidates.items()}
+    # Fold-averaged metrics of each candidate's latest complete round, and its rows per fold
+    cv_metrics = {name: [None] * len(cands) for name, cands in candidates.items()}
+    search_seconds = {name: 0.0 for name in models}
+
+    fold_sets = {name: folds.folds(key, X) for name, (key, X) in X_train.items()}
+    max_resources = folds.min_train_rows
+    n_rounds = 1 + int(math.floor(math.log(max(len(c) for c in candidates.values()), factor)))
+    min_resources = max(2 * len(folds) * n_classes, max_resources // factor ** (n_rounds - 1))
+
+    def over_budget():
+        return ((time_budget is not None and time.perf_counter() - search_start > time_budget) or
+                (cpu_budget is not None and cpu_used > cpu_budget))
+
+    active = {name: list(range(len(cands))) for name, cands in candidates.items()}
+    round_index = 0
+    with Parallel(n_jobs=n_jobs, return_as="generator_unordered") as parallel:
+        while any(len(ids) > 1 for ids in active.values()) and not over_budget():
+            n_resources = min(max_resources, min_resources * factor ** round_index)
+            tasks = [
+                (name, cid)
+                for name, ids in active.items() if len(ids) > 1
+                for cid in ids
+            ]
+            logging.info(f"Halving round {round_index}: {len(tasks)} candidates on {n_resources} rows per fold")
+
+            fold_results = {task: [] for task in tasks}
+            results = parallel(
+                delayed(_fit_and_score)(task, candidates[task[0]][task[1]], fold, n_resources, n_classes)
+                for task in tasks for fold in fold_sets[task[0]]
+            )
+            for task, metrics, fit_seconds, cpu_seconds in results:
+                fold_results[task].append(metrics)
+                search_seconds[task[0]] += fit_seconds
+                cpu_used += cpu_seconds
+                if over_budget():
+                    with warnings.catch_warnings():
+                        warnings.simplefilter("ignore")
+                        results.close()
+                    logging.info("Search budget exhausted; abandoning remaining fits")
+                    break
+
+            for (name, cid), values in fold_results.items():
+                if len(values) == len(folds):
+                    cv_metrics[name][cid] = (mean_metrics(values), n_resources)
+                    scores[name][cid] = cv_metrics[name][cid][0]["accuracy"]
+
+            for name, ids in active.items():
+                if len(ids) > 1:
+                    ranked = sorted(ids, key=lambda cid: -np.inf if scores[name][cid] is None else scores[name][cid],
+                                    reverse=True)
+                    active[name] = ranked[:max(1, math.ceil(len(ids) / factor))]
+            round_index += 1
+
+    # Refit each model's best surviving candidate on the full training set, and
+    # cross-validate the models the search never scored (a single candidate).
+    # This always runs, even past the budget, so every model gets a result.
+    unscored = [name for name, cands in candidates.items() if cross_validate and len(cands) == 1]
+    with Parallel(n_jobs=n_jobs) as parallel:
+        results = parallel(
+            [delayed(_refit_and_score)(candidates[name][ids[0]], X_train[name][1], y_train, X_test[name], y_test,
+                                       n_classes)
+             for name, ids in active.items()]
+            + [delayed(_fit_and_score)((name, 0), candidates[name][0], fold, max_resources, n_classes)
+               for name in unscored for fold in fold_sets[name]]
+        )
+    refits, cv_fits = results[:len(active)], results[len(active):]
+    unscored_results = {name: [] for name in unscored}
+    for (name, _), metrics, fit_seconds, _ in cv_fits:
+        unscored_results[name].append(metrics)
+        search_seconds[name] += fit_seconds
+    for name, values in unscored_results.items():
+        cv_metrics[name][0] = (mean_metrics(values), max_resources)
+
+    report = {}
+    for name, (best_model, test, refit_seconds) in zip(active, refits):
+        fit_seconds = search_seconds[name] + refit_seconds
+        cv, cv_rows = cv_metrics[name][active[name][0]] or (None, None)
+        report[name] = (best_model, test["accuracy"], fit_seconds, {"test": test, "cv": cv, "cv_rows": cv_rows})
+        # Fits ran in worker processes, so record the wall time they reported
+        log_stage_record(f"evaluate_models/{name}", wall_s=round(fit_seconds, 6),
+                         rows=len(y_train), status="ok")
+        logging.info(
+            f"{name}: test score {test['accuracy']:.4f}, fit time {fit_seconds:.2f}s "
+            f"(search {search_seconds[name]:.2f}s, refit {refit_seconds:.2f}s, "
+            f"CV on {cv_rows or 0} rows per fold)"
+        )
+
+    logging.info(f"Halving search finished in {time.perf_counter() - search_start:.2f}s "
+                 f"({round_index} rounds, {cpu_used:.1f} CPU-s in search fits)")
     return report
@@ -1,5 +1,5 @@
 from src.logger import get_logger
-from src.exception import exception as CustomException
+from src.exception import CustomException
 import sys
 logger = get_logger(__name__)
 def divide_numbers(a, b):
@@ -10,7 +10,7 @@ def divide_numbers(a, b):
     except Exception as e:
         logger.error(f"An unexpected error occurred: {e}")
         raise CustomException("An unexpected error occurred during division.", sys) from e
-if __name__ == "_main_":
+if __name__ == "__main__":
     try:
         logger.info("Starting division tests.")
         divide_numbers(10,0)  # Should log error and raise CustomException
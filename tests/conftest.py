@@ -0,0 +1,59 @@
+"""Shared fixtures: a small fused inference artifact trained on the raw dataset.
+
+The artifact has the production layout (compiled preprocessor, label classes,
+InputSchema) with a LogisticRegression, so serving-path tests run in seconds.
+"""
+import os
+import sys
+
+import pytest
+
+# Ensure project root is in sys.path for src imports
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.Components.compiled_preprocessor import compile_preprocessor
+from src.Components.data_transformation import CATEGORICAL_COLUMNS, NUMERICAL_COLUMNS, TARGET_COLUMN, DataTransformation
+from src.Pipeline.inference_model import FEATURE_COLUMNS, InferenceModel
+from src.Pipeline.input_schema import InputSchema
+from src.utils import read_dataset, save_artifact
+
+RAW_DATA_PATH = os.path.join(PROJECT_ROOT, "rawdata", "Traffic_Accident_Severity_Dataset.csv")
+
+
+@pytest.fixture(scope="session")
+def raw_frame():
+    return read_dataset(RAW_DATA_PATH, compact_coordinates=False)
+
+
+@pytest.fixture(scope="session")
+def inference_artifact(raw_frame, tmp_path_factory):
+    """
+    Path of a save_artifact directory holding a fitted InferenceModel.
+    """
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.preprocessing import LabelEncoder
+
+    features = raw_frame[FEATURE_COLUMNS]
+    preprocessor = DataTransformation().get_data_transformer_object().fit(features)
+    label_encoder = LabelEncoder().fit(raw_frame[TARGET_COLUMN])
+    model = LogisticRegression(max_iter=200).fit(
+        preprocessor.transform(features), label_encoder.transform(raw_frame[TARGET_COLUMN])
+    )
+    path = str(tmp_path_factory.mktemp("artifacts") / "inference_model")
+    save_artifact(path, InferenceModel(
+        compile_preprocessor(preprocessor), model, classes=label_encoder.classes_, input_format="csr",
+        schema=InputSchema.from_frame(features, CATEGORICAL_COLUMNS, NUMERICAL_COLUMNS),
+    ))
+    return path
+
+
+@pytest.fixture(scope="session")
+def valid_record(raw_frame):
+    """
+    One training row as a {column: value} request body.
+    """
+    row = raw_frame[FEATURE_COLUMNS].iloc[0]
+    return {column: (str(row[column]) if column in CATEGORICAL_COLUMNS else float(row[column]))
+            for column in FEATURE_COLUMNS}
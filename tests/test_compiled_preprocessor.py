@@ -0,0 +1,137 @@
+"""Parity of the compiled preprocessor with the fitted sklearn ColumnTransformer.
+
+Fits DataTransformation's preprocessor on the raw dataset and checks that
+CompiledPreprocessor reproduces sklearn's output bit for bit, through both the
+batch (transform) and the per-record (transform_record) paths.
+
+Run with:
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Ensure project root is in sys.path for src imports
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.Components.compiled_preprocessor import SMALL_BATCH_ROWS, compile_preprocessor, verify_parity
+from src.Components.data_transformation import (
+    CATEGORICAL_COLUMNS,
+    NUMERICAL_COLUMNS,
+    TARGET_COLUMN,
+    DataTransformation,
+)
+from src.Components.geo_features import GeoFeatureIndex, GeoFeaturePreprocessor
+from src.utils import issparse, read_dataset
+
+RAW_DATA_PATH = os.path.join(PROJECT_ROOT, "rawdata", "Traffic_Accident_Severity_Dataset.csv")
+FEATURE_COLUMNS = NUMERICAL_COLUMNS + CATEGORICAL_COLUMNS
+
+
+def dense(X):
+    X = X.toarray() if issparse(X) else X
+    return np.asarray(X, dtype=np.float64)
+
+
+def assert_parity(preprocessor, compiled, frame):
+    expected = dense(preprocessor.transform(frame))
+    np.testing.assert_array_equal(compiled.transform(frame), expected)
+    for i, record in enumerate(frame.to_dict(orient="records")):
+        np.testing.assert_array_equal(compiled.transform_record(record)[0], expected[i])
+
+
+@pytest.fixture(scope="module")
+def raw():
+    df = read_dataset(RAW_DATA_PATH)
+    # Coordinates are fitted in float64, as in initiate_data_transformation
+    return df.astype({c: "float64" for c in NUMERICAL_COLUMNS})
+
+
+@pytest.fixture(scope="module")
+def fitted(raw):
+    preprocessor = DataTransformation().get_data_transformer_object()
+    preprocessor.fit(raw.drop(columns=[TARGET_COLUMN]))
+    return preprocessor, compile_preprocessor(preprocessor)
+
+
+@pytest.fixture(scope="module")
+def sample(raw):
+    # Plain object columns, the way requests arrive, rather than the dataset's categoricals
+    return raw[FEATURE_COLUMNS].head(40).astype({c: object for c in CATEGORICAL_COLUMNS}).reset_index(drop=True)
+
+
+def test_verify_parity_on_raw_data(raw, fitted):
+    preprocessor, compiled = fitted
+    verify_parity(preprocessor, compiled, raw)
+
+
+def test_categorical_dtype_batch(raw, fitted):
+    preprocessor, compiled = fitted
+    frame = raw[FEATURE_COLUMNS]
+    assert isinstance(frame["Weather"].dtype, pd.CategoricalDtype)
+    np.testing.assert_array_equal(compiled.transform(frame), dense(preprocessor.transform(frame)))
+
+
+def test_every_known_category(sample, fitted):
+    preprocessor, compiled = fitted
+    n = max(len(cats) for cats in compiled.categories)
+    frame = sample.iloc[np.arange(n) % len(sample)].reset_index(drop=True)
+    for column, cats in zip(compiled.categorical_columns, compiled.categories):
+        frame[column] = [cats[i % len(cats)] for i in range(n)]
+    assert_parity(preprocessor, compiled, frame)
+
+
+@pytest.mark.parametrize("rows", [3, SMALL_BATCH_ROWS + 8])
+def test_unseen_categories(sample, fitted, rows):
+    preprocessor, compiled = fitted
+    frame = sample.head(rows).copy()
+    frame["Weather"] = "Hail"
+    frame["Vehicle_Type"] = "Hovercraft"
+    assert_parity(preprocessor, compiled, frame)
+
+
+@pytest.mark.parametrize("rows", [3, SMALL_BATCH_ROWS + 8])
+def test_missing_values(sample, fitted, rows):
+    preprocessor, compiled = fitted
+    frame = sample.head(rows).copy()
+    # NaN, as input validation leaves missing values (sklearn's imputer does not treat None as missing)
+    frame.loc[::2, CATEGORICAL_COLUMNS] = np.nan
+    frame.loc[1::2, NUMERICAL_COLUMNS] = np.nan
+    assert_parity(preprocessor, compiled, frame)
+
+
+def test_single_row(sample, fitted):
+    preprocessor, compiled = fitted
+    assert_parity(preprocessor, compiled, sample.head(1))
+
+
+def test_float32_coordinates(sample, fitted):
+    preprocessor, compiled = fitted
+    frame = sample.astype({c: "float32" for c in NUMERICAL_COLUMNS})
+    # sklearn scales float32 input in float32; the compiled tables always work in
+    # float64, so they match sklearn on the same coordinates widened to float64
+    expected = dense(preprocessor.transform(frame.astype({c: "float64" for c in NUMERICAL_COLUMNS})))
+    np.testing.assert_array_equal(compiled.transform(frame), expected)
+    for i, record in enumerate(frame.to_dict(orient="records")):
+        np.testing.assert_array_equal(compiled.transform_record(record)[0], expected[i])
+
+
+def test_geo_wrapper(raw):
+    transformation = DataTransformation()
+    X = raw.drop(columns=[TARGET_COLUMN])
+    classes, y = np.unique(raw[TARGET_COLUMN].astype(str), return_inverse=True)
+    geo_index = GeoFeatureIndex().fit(X["Latitude"], X["Longitude"], y, classes)
+    preprocessor = transformation.get_data_transformer_object(geo_columns=geo_index.feature_names_out)
+    preprocessor.fit(geo_index.add_features(X))
+
+    wrapped = GeoFeaturePreprocessor(geo_index, preprocessor)
+    compiled = GeoFeaturePreprocessor(geo_index, compile_preprocessor(preprocessor))
+    frame = X[FEATURE_COLUMNS].head(40).astype({c: object for c in CATEGORICAL_COLUMNS}).reset_index(drop=True)
+    frame.loc[0, NUMERICAL_COLUMNS] = np.nan
+    frame.loc[1, "Weather"] = "Hail"
+    assert_parity(wrapped, compiled, frame)
@@ -0,0 +1,105 @@
+"""InputSchema checks and PredictPipeline's reject / flag / off validation modes.
+
+Run with:
+    python -m pytest -q tests
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.Pipeline.input_schema import InputSchema
+from src.Pipeline.predict_pipeline import (
+    FEATURE_COLUMNS,
+    PREDICTION_COLUMN,
+    VALID_INPUT_COLUMN,
+    PredictPipeline,
+    PredictPipelineConfig,
+)
+
+SCHEMA = InputSchema({"Weather": ["Clear", "Rain"]}, {"Latitude": (40.0, 41.0)})
+
+
+def test_validate_flags_and_coerces():
+    df = pd.DataFrame({"Weather": ["Clear", "Hail", None], "Latitude": ["40.5", "abc", 50.0]})
+    result = SCHEMA.validate(df)
+    assert result.invalid.tolist() == [False, True, True]
+    assert result.frame["Weather"].tolist()[:1] == ["Clear"]
+    assert result.frame["Weather"].isna().tolist() == [False, True, True]
+    assert result.frame["Latitude"].dtype == np.float64
+    assert result.frame["Latitude"].isna().tolist() == [False, True, True]
+    assert result.summary() == {"Weather: is not a known category": 1, "Latitude: is not a number": 1,
+                                "Latitude: is outside [40, 41]": 1}
+
+
+def test_validate_categorical_input_matches_object_input():
+    df = pd.DataFrame({"Weather": ["Rain", "Hail", None, "Clear"], "Latitude": [40.5] * 4})
+    by_object = SCHEMA.validate(df)
+    by_category = SCHEMA.validate(df.astype({"Weather": "category"}))
+    assert by_object.invalid.tolist() == by_category.invalid.tolist() == [False, True, False, False]
+    pd.testing.assert_series_equal(by_object.frame["Weather"], by_category.frame["Weather"])
+
+
+def test_missing_column_is_added_all_missing():
+    result = SCHEMA.validate(pd.DataFrame({"Latitude": [40.5, 40.6]}))
+    assert result.invalid.all()
+    assert result.frame["Weather"].isna().all()
+    assert isinstance(result.frame["Weather"].dtype, pd.CategoricalDtype)
+
+
+def test_record_errors():
+    assert SCHEMA.record_errors({"Weather": "Clear", "Latitude": 40.5}) == {}
+    assert SCHEMA.record_errors({"Weather": None, "Latitude": None}) == {}
+    assert SCHEMA.record_errors({"Weather": "Hail", "Latitude": "abc"}) == {
+        "Weather": "is not a known category", "Latitude": "is not a number"}
+    assert SCHEMA.record_errors({"Weather": {"a": 1}, "Latitude": 99})["Latitude"].startswith("is outside")
+
+
+def test_manifest_round_trip():
+    restored = InputSchema.from_manifest(SCHEMA.describe())
+    assert restored.categories == SCHEMA.categories and restored.ranges == SCHEMA.ranges
+
+
+@pytest.fixture(scope="module")
+def frame(raw_frame):
+    df = raw_frame[FEATURE_COLUMNS].head(6).astype({c: object for c in FEATURE_COLUMNS[:7]}).reset_index(drop=True)
+    df.loc[1, "Weather"] = "Hail"
+    df.loc[4, "Latitude"] = 95.0
+    return df
+
+
+def pipeline(artifact, validation):
+    return PredictPipeline(PredictPipelineConfig(inference_model_path=artifact, validation=validation))
+
+
+def test_reject_mode(inference_artifact, frame, valid_record):
+    predict = pipeline(inference_artifact, "reject")
+    with pytest.raises(ValueError, match="2 of 6 rows failed validation"):
+        predict.predict_batch(frame)
+    with pytest.raises(ValueError, match="Weather"):
+        predict.predict_record({**valid_record, "Weather": "Hail"})
+    assert len(predict.predict_batch(frame.drop(index=[1, 4]))) == 4
+
+
+def test_flag_mode_scores_invalid_values_as_missing(inference_artifact, frame, valid_record):
+    predict = pipeline(inference_artifact, "flag")
+    result = predict.predict_batch(frame)
+    assert result[VALID_INPUT_COLUMN].tolist() == [True, False, True, True, False, True]
+    missing = frame.astype({"Weather": object, "Latitude": float})
+    missing.loc[1, "Weather"] = None
+    missing.loc[4, "Latitude"] = np.nan
+    expected = pipeline(inference_artifact, "off").predict_batch(missing)
+    assert result[PREDICTION_COLUMN].tolist() == expected[PREDICTION_COLUMN].tolist()
+    assert predict.predict_record({**valid_record, "Weather": "Hail"}) == \
+        predict.predict_record({**valid_record, "Weather": None})
+
+
+def test_flag_mode_scores_a_frame_missing_a_column(inference_artifact, frame):
+    result = pipeline(inference_artifact, "flag").predict_batch(frame.drop(columns=["Traffic"]))
+    assert not result[VALID_INPUT_COLUMN].any()
+    assert result[PREDICTION_COLUMN].notna().all()
+
+
+def test_off_mode_adds_no_validity_column(inference_artifact, frame):
+    result = pipeline(inference_artifact, "off").predict_batch(frame)
+    assert VALID_INPUT_COLUMN not in result.columns
+    assert len(result) == len(frame)
@@ -0,0 +1,65 @@
+"""PredictionCache keys, version invalidation and PredictPipeline's cached paths.
+
+Run with:
+    python -m pytest -q tests
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.Pipeline.predict_pipeline import FEATURE_COLUMNS, PredictPipeline, PredictPipelineConfig
+from src.Pipeline.prediction_cache import PredictionCache
+
+
+def test_record_key_matches_batch_keys(valid_record):
+    cache = PredictionCache(max_entries=10)
+    assert cache.record_key(valid_record) == cache.make_keys(pd.DataFrame([valid_record]))[0]
+
+
+def test_new_version_empties_the_cache():
+    cache = PredictionCache(max_entries=10)
+    cache.check_version("v1")
+    cache.put("key", "v1 result", "v1")
+    assert cache.get("key") == "v1 result"
+    cache.check_version("v2")
+    assert cache.get("key") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_write_from_an_older_version_is_dropped():
+    cache = PredictionCache(max_entries=10)
+    cache.check_version("v1")
+    # A scorer that started under v1 writes after another thread moved the cache to v2
+    cache.check_version("v2")
+    cache.put_many(["key"], ["v1 result"], "v1")
+    assert cache.get("key") is None
+    cache.put_many(["key"], ["v2 result"], "v2")
+    assert cache.get("key") == "v2 result"
+
+
+def test_lru_eviction():
+    cache = PredictionCache(max_entries=2)
+    cache.put_many(["a", "b"], [1, 2])
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get_many(["a", "b", "c"]) == [1, None, 3]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cached_pipeline_matches_uncached(inference_artifact, raw_frame, valid_record):
+    frame = raw_frame[FEATURE_COLUMNS].head(50)
+    # Repeated rows within a batch are scored once
+    frame = pd.concat([frame, frame], ignore_index=True)
+    plain = PredictPipeline(PredictPipelineConfig(inference_model_path=inference_artifact))
+    cached = PredictPipeline(PredictPipelineConfig(inference_model_path=inference_artifact, cache_size=1000,
+                                                   cache_coordinate_decimals=None))
+    expected = plain.predict_batch(frame)
+    pd.testing.assert_frame_equal(cached.predict_batch(frame), expected)
+    # and served from the cache the second time
+    pd.testing.assert_frame_equal(cached.predict_batch(frame), expected)
+    assert cached.cache_stats()["hits"] == len(frame)
+
+    label, probabilities = cached.predict_record(valid_record)
+    assert label == plain.predict_record(valid_record)[0]
+    assert list(probabilities.values()) == pytest.approx(list(plain.predict_record(valid_record)[1].values()))
+    assert np.isclose(sum(probabilities.values()), 1.0)
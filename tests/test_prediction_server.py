@@ -0,0 +1,131 @@
+"""HTTP behaviour of the micro-batching prediction server.
+
+Run with:
+    python -m pytest -q tests
+"""
+import http.client
+import json
+
+import pytest
+
+from src.Pipeline.prediction_server import MicroBatcher, PredictionServer, PredictionServerConfig
+
+
+def start_server(artifact, **options):
+    import threading
+
+    server = PredictionServer(PredictionServerConfig(port=0, model_path=artifact, **options))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def server_factory(inference_artifact):
+    servers = []
+
+    def factory(**options):
+        servers.append(start_server(inference_artifact, **options))
+        return servers[-1]
+
+    yield factory
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def post(server, path, body):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=10)
+    try:
+        connection.request("POST", path, json.dumps(body), {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def test_list_valued_field_is_rejected_per_record(server_factory, valid_record):
+    server = server_factory(validation="reject")
+    status, body = post(server, "/predict/batch", {"records": [valid_record, {**valid_record, "Weather": ["x"]}]})
+    assert status == 400
+    assert body["invalid_records"] == [{"index": 1, "errors": {"Weather": "is not a known category"}}]
+
+
+@pytest.mark.parametrize("validation", ["flag", "off"])
+def test_list_valued_field_is_a_bad_request(server_factory, valid_record, validation):
+    server = server_factory(validation=validation)
+    status, body = post(server, "/predict", {**valid_record, "Weather": ["x"]})
+    assert status == 400
+    assert "Weather" in body["error"]
+
+
+def test_non_numeric_coordinate_without_validation(server_factory, valid_record):
+    server = server_factory(validation="off")
+    status, body = post(server, "/predict", {**valid_record, "Latitude": "abc"})
+    assert status == 400
+    assert "Latitude" in body["error"]
+    status, _ = post(server, "/predict", {**valid_record, "Latitude": str(valid_record["Latitude"])})
+    assert status == 200
+
+
+def test_failed_batch_only_fails_the_offending_submission():
+    def score(records):
+        if any(record["Weather"] == "bad" for record in records):
+            raise ValueError("bad record")
+        return [record["Weather"] for record in records]
+
+    batcher = MicroBatcher(score, max_batch_size=3, max_wait_ms=1000)
+    try:
+        futures = [batcher.submit([{"Weather": weather}]) for weather in ("Clear", "bad", "Rain")]
+        assert futures[0].result(timeout=10) == ["Clear"]
+        with pytest.raises(ValueError):
+            futures[1].result(timeout=10)
+        assert futures[2].result(timeout=10) == ["Rain"]
+    finally:
+        batcher.close()
+
+
+def test_single_record_matches_batch_scoring(server_factory, valid_record):
+    server = server_factory(validation="flag")
+    status, single = post(server, "/predict", valid_record)
+    assert status == 200
+    status, batch = post(server, "/predict/batch", {"records": [valid_record, valid_record]})
+    assert status == 200
+    row = batch["predictions"][0]
+    assert single["severity"] == row["severity"]
+    assert single["valid_input"] is row["valid_input"] is True
+    assert single["probabilities"] == pytest.approx(row["probabilities"])
+
+
+def test_reject_mode_answers_400_with_the_invalid_records(server_factory, valid_record):
+    server = server_factory(validation="reject")
+    records = [{**valid_record, "Latitude": 95.0}, valid_record, {**valid_record, "Weather": "Hail"}]
+    status, body = post(server, "/predict/batch", {"records": records})
+    assert status == 400
+    assert [entry["index"] for entry in body["invalid_records"]] == [0, 2]
+    status, body = post(server, "/predict", valid_record)
+    assert status == 200 and body["valid_input"] is True
+
+
+def test_flag_mode_scores_and_marks_invalid_records(server_factory, valid_record):
+    server = server_factory(validation="flag")
+    status, body = post(server, "/predict", {**valid_record, "Weather": "Hail"})
+    assert status == 200 and body["valid_input"] is False
+    status, body = post(server, "/predict/batch", {"records": [valid_record, {**valid_record, "Weather": "Hail"}]})
+    assert status == 200
+    assert [row["valid_input"] for row in body["predictions"]] == [True, False]
+
+
+def test_off_mode_scores_without_validity(server_factory, valid_record):
+    server = server_factory(validation="off")
+    status, body = post(server, "/predict", {**valid_record, "Weather": "Hail"})
+    assert status == 200
+    assert "valid_input" not in body and body["severity"] in body["probabilities"]
+
+
+def test_malformed_bodies(server_factory, valid_record):
+    server = server_factory()
+    assert post(server, "/predict", [valid_record])[0] == 400
+    assert post(server, "/predict", {**valid_record, "Unknown": 1})[0] == 400
+    assert post(server, "/predict/batch", {"rows": []})[0] == 400
+    status, body = post(server, "/predict/batch", {"records": []})
+    assert status == 200 and body["predictions"] == []
@@ -0,0 +1,109 @@
+"""StreamPredictor ordering and backpressure, and read_records on malformed input.
+
+Run with:
+    python -m pytest -q tests
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+
+import pandas as pd
+
+from src.Pipeline.predict_pipeline import PREDICTION_COLUMN, PredictPipeline, PredictPipelineConfig
+from src.Pipeline.stream_pipeline import StreamPipelineConfig, StreamPredictor, read_records, run_stream
+
+
+class EchoPipeline:
+    """
+    Stand-in for PredictPipeline: "predicts" each record's Weather after an
+    optional delay, so results identify the records they came from.
+    """
+
+    def __init__(self, delay=None, gate=None):
+        self.delay = delay
+        self.gate = gate
+        self.batches = 0
+
+    def predict_batch(self, frame):
+        if self.gate is not None:
+            self.gate.wait(timeout=10)
+        if self.delay is not None:
+            time.sleep(self.delay())
+        self.batches += 1
+        return pd.DataFrame({PREDICTION_COLUMN: frame["Weather"].tolist()}, index=frame.index)
+
+
+async def records_of(n, pulled=None):
+    for i in range(n):
+        if pulled is not None:
+            pulled.append(i)
+        yield {"Weather": str(i)}
+        await asyncio.sleep(0)
+
+
+async def collect(predictor, records):
+    return [scored.severity async for scored in predictor.stream(records)]
+
+
+def test_results_come_out_in_arrival_order():
+    # Later batches often finish first; the output order must not change
+    rng = random.Random(0)
+    pipeline = EchoPipeline(delay=lambda: rng.uniform(0, 0.01))
+    config = StreamPipelineConfig(max_batch_size=7, max_wait_ms=1, queue_size=16, max_in_flight=4)
+    severities = asyncio.run(collect(StreamPredictor(pipeline, config), records_of(200)))
+    assert severities == [str(i) for i in range(200)]
+    assert pipeline.batches > 1
+
+
+def test_backpressure_bounds_records_read_ahead():
+    config = StreamPipelineConfig(max_batch_size=4, max_wait_ms=1, queue_size=8, max_in_flight=2)
+    gate = threading.Event()
+    predictor = StreamPredictor(EchoPipeline(gate=gate), config)
+    pulled = []
+
+    async def run():
+        stream = predictor.stream_batches(records_of(1000, pulled))
+        first = asyncio.ensure_future(stream.__anext__())
+        # Scoring is blocked: the source must stall once every buffer is full
+        await asyncio.sleep(0.3)
+        read_ahead = len(pulled)
+        gate.set()
+        batches = [await first]
+        batches += [batch async for batch in stream]
+        return read_ahead, sum(len(batch) for batch in batches)
+
+    read_ahead, scored = asyncio.run(run())
+    # inbox + batches in flight + the batch being formed + the record waiting on a full inbox
+    assert read_ahead <= config.queue_size + (config.max_in_flight + 1) * config.max_batch_size + 1
+    assert scored == 1000
+
+
+def test_malformed_lines_are_skipped_in_order(tmp_path, inference_artifact, valid_record):
+    records = [{**valid_record, "Latitude": valid_record["Latitude"] + i * 1e-4} for i in range(5)]
+    lines = [json.dumps(records[0]), "not json", json.dumps(records[1]), "[1, 2]", "",
+             json.dumps(records[2]), '{"Weather": ', json.dumps(records[3]), "42", json.dumps(records[4])]
+    input_path = tmp_path / "events.jsonl"
+    input_path.write_text("\n".join(lines) + "\n")
+    output_path = tmp_path / "scored.jsonl"
+
+    pipeline = PredictPipeline(PredictPipelineConfig(inference_model_path=inference_artifact))
+    config = StreamPipelineConfig(max_batch_size=2, max_wait_ms=1, queue_size=2, max_in_flight=2)
+    rows, _ = asyncio.run(run_stream(str(input_path), str(output_path), config, pipeline))
+
+    scored = [json.loads(line) for line in output_path.read_text().splitlines()]
+    assert rows == len(scored) == 5
+    assert [row["Latitude"] for row in scored] == [record["Latitude"] for record in records]
+    assert all(row["valid_input"] and row["severity"] in row["probabilities"] for row in scored)
+
+
+def test_read_records_fills_missing_fields_with_none(tmp_path):
+    path = tmp_path / "events.jsonl"
+    path.write_text(json.dumps({"Weather": "Rain", "Latitude": float("nan")}) + "\n")
+
+    async def read():
+        return [record async for record in read_records(str(path))]
+
+    (record,) = asyncio.run(read())
+    assert record.Weather == "Rain" and record.Latitude is None and record.Traffic is None